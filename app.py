@@ -2,8 +2,11 @@ import streamlit as st
 import pandas as pd
 from dotenv import load_dotenv
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Load environment variables
 load_dotenv()
@@ -14,7 +17,13 @@ from src.ai_engine import GoldAnalystEngine
 from src.logger import log_prediction
 from src.evaluator import Evaluator
 from tools import fetch_gold_price, fetch_market_news, fetch_historical_data # Keep existing tools for specific grids
-import plotly.graph_objects as go
+
+# Same config loader as the API and the CLI
+from backend.config import get_section
+
+QUOTE_TTL = get_section("providers").get("cache_ttl_seconds", 30)
+DASHBOARD_CONFIG = get_section("dashboard")
+EVALUATION_CONFIG = get_section("evaluation")
 
 # --- Page Config ---
 st.set_page_config(
@@ -266,21 +275,87 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# --- Data Layer ---
+# Streamlit reruns this script on every widget interaction. Providers are built
+# once per process and fetches are memoized with TTLs, so a rerun only refetches
+# what has expired.
+
+@st.cache_resource
+def get_services():
+    return YahooProvider(), MetalsApiProvider(), GoldAnalystEngine(), Evaluator()
+
+@st.cache_resource
+def start_evaluation_worker():
+    """
+    Scores matured predictions in a background thread, once per process.
+    The page only reads the results (load_metrics) and never waits on it.
+    """
+    if not EVALUATION_CONFIG.get("run_in_app", True):
+        return None
+    return get_services()[3].worker().start_thread()
+
+@st.cache_data(ttl=QUOTE_TTL, show_spinner=False)
+def load_gld():
+    return get_services()[0].get_latest("GLD")
+
+@st.cache_data(ttl=QUOTE_TTL, show_spinner=False)
+def load_xau():
+    return get_services()[1].get_latest("XAU")
+
+@st.cache_data(ttl=QUOTE_TTL, show_spinner=False)
+def load_regional_prices():
+    return fetch_gold_price()
+
+@st.cache_data(ttl=DASHBOARD_CONFIG.get("history_ttl_seconds", 3600), show_spinner=False)
+def load_history(period):
+    data = fetch_historical_data(period=period)
+    if data is None or data.empty:
+        return data
+    # Thousands of daily closes collapse to a few hundred points with the same shape
+    from backend.services.history import lttb_indices
+    index = lttb_indices(data.index.asi8, data['Close'].to_numpy(), DASHBOARD_CONFIG.get("sparkline_points", 300))
+    return data.iloc[index]
+
+@st.cache_data(ttl=DASHBOARD_CONFIG.get("news_ttl_seconds", 300), show_spinner=False)
+def load_news():
+    return fetch_market_news()
+
+@st.cache_data(ttl=DASHBOARD_CONFIG.get("metrics_ttl_seconds", 60), show_spinner=False)
+def load_metrics():
+    return get_services()[3].get_metrics()
+
+def load_dashboard_data():
+    """Runs every loader concurrently; cached loaders return immediately."""
+    loaders = {
+        "gld": load_gld,
+        "xau": load_xau,
+        "regional": load_regional_prices,
+        "history": lambda: load_history("1mo"),
+        "news": load_news,
+    }
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=len(loaders),
+        # Cached functions need the session's script context inside worker threads
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    ) as pool:
+        futures = {name: pool.submit(loader) for name, loader in loaders.items()}
+        return {name: future.result() for name, future in futures.items()}
+
 # --- Main Logic ---
 if 'last_run' not in st.session_state:
     st.session_state['last_run'] = None
     st.session_state['ai_result'] = None
 
 # Providers
-yahoo = YahooProvider()
-metals = MetalsApiProvider()
-engine = GoldAnalystEngine()
-evaluator = Evaluator()
+yahoo, metals, engine, evaluator = get_services()
+start_evaluation_worker()
 
 # Fetch Data
 with st.spinner("Fetching live market data..."):
-    gld = yahoo.get_latest("GLD")
-    xau = metals.get_latest("XAU")
+    data = load_dashboard_data()
+    gld = data["gld"]
+    xau = data["xau"]
     
     if gld and xau:
         # --- Hero Price Display ---
@@ -311,9 +386,6 @@ with st.spinner("Fetching live market data..."):
             # Log to DB
             if result and "output" in result:
                 log_prediction(gld['price'], xau['price'], result['input'], result['output'])
-                
-            # Run Evaluation
-            evaluator.run_evaluation()
 
 # --- Recommendation Card ---
 if st.session_state['ai_result']:
@@ -337,7 +409,7 @@ if st.session_state['ai_result']:
     """, unsafe_allow_html=True)
     
     # --- Metrics Grid ---
-    metrics = evaluator.get_metrics()
+    metrics = load_metrics()
     m1, m2, m3, m4 = st.columns(4)
     
     with m1:
@@ -371,8 +443,9 @@ if st.session_state['ai_result']:
 
     # --- Sparkline (Historical) ---
     st.markdown("<div style='margin-top: 48px;'></div>", unsafe_allow_html=True)
-    hist_data = fetch_historical_data(period="1mo")
+    hist_data = data["history"]
     if hist_data is not None and not hist_data.empty:
+        import plotly.graph_objects as go
         fig = go.Figure()
         fig.add_trace(go.Scatter(
             x=hist_data.index, 
@@ -404,7 +477,7 @@ if st.session_state['ai_result']:
         
         # News inside Advanced
         st.markdown("<h3>Latest Market News</h3>", unsafe_allow_html=True)
-        news_items = fetch_market_news()
+        news_items = data["news"]
         if isinstance(news_items, list) and news_items:
             for item in news_items[:3]: # Show top 3
                 st.markdown(f"""
@@ -414,37 +487,10 @@ if st.session_state['ai_result']:
                 </div>
                 """, unsafe_allow_html=True)
 
-# --- Regional Markets & Calculator ---
-st.markdown("<h2>Regional Markets & Calculator</h2>", unsafe_allow_html=True)
-
-# Fetch detailed regional data using the existing tool
-detailed_data = fetch_gold_price()
-
-if detailed_data and "usd" in detailed_data:
-    rates = detailed_data.get('rates', {})
-    usd_prices = detailed_data.get('usd', {})
-    egp_prices = detailed_data.get('egypt', {})
-    uae_prices = detailed_data.get('uae', {})
-
-    m1, m2, m3 = st.columns(3)
-    
-    def price_card_content(title, prices, currency):
-        rows_html = ""
-        for k, v in prices.items():
-            rows_html += f"""<div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 12px; border-bottom: 1px solid var(--color-divider); padding-bottom: 8px;">
-<span style="font-weight: 500; color: var(--color-text-secondary); font-size: 15px;">{k}</span>
-<span style="font-weight: 600; font-size: 18px; color: var(--color-text-primary); font-family: var(--font-primary);">{v:,.2f} <span style="font-size: 12px; color: var(--color-text-tertiary);">{currency}</span></span>
-</div>"""
-        return f"""<div class="metric-card"><div class="card-header">{title}</div>{rows_html}</div>"""
-
-    with m1:
-        st.markdown(price_card_content("🌍 International (USD)", usd_prices, "USD"), unsafe_allow_html=True)
-    with m2:
-        st.markdown(price_card_content("🇪🇬 Egypt (EGP)", egp_prices, "EGP"), unsafe_allow_html=True)
-    with m3:
-        st.markdown(price_card_content("🇦🇪 UAE (AED)", uae_prices, "AED"), unsafe_allow_html=True)
-
-    # Calculator
+# Calculator runs as a fragment: changing weight, karat or market reruns only
+# this block against the already-loaded prices, not the whole dashboard.
+@st.fragment
+def render_calculator(usd_prices, egp_prices, uae_prices):
     with st.container():
         st.markdown("<div class='metric-card' style='margin-top: 24px;'>", unsafe_allow_html=True)
         st.markdown("<h3 style='margin-top:0;'>Gold Value Calculator</h3>", unsafe_allow_html=True)
@@ -481,5 +527,38 @@ if detailed_data and "usd" in detailed_data:
             """, unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
+# --- Regional Markets & Calculator ---
+st.markdown("<h2>Regional Markets & Calculator</h2>", unsafe_allow_html=True)
+
+# Detailed regional data (fetched with the rest of the dashboard above)
+detailed_data = data["regional"]
+
+if detailed_data and "usd" in detailed_data:
+    rates = detailed_data.get('rates', {})
+    usd_prices = detailed_data.get('usd', {})
+    egp_prices = detailed_data.get('egypt', {})
+    uae_prices = detailed_data.get('uae', {})
+
+    m1, m2, m3 = st.columns(3)
+    
+    def price_card_content(title, prices, currency):
+        rows_html = ""
+        for k, v in prices.items():
+            rows_html += f"""<div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 12px; border-bottom: 1px solid var(--color-divider); padding-bottom: 8px;">
+<span style="font-weight: 500; color: var(--color-text-secondary); font-size: 15px;">{k}</span>
+<span style="font-weight: 600; font-size: 18px; color: var(--color-text-primary); font-family: var(--font-primary);">{v:,.2f} <span style="font-size: 12px; color: var(--color-text-tertiary);">{currency}</span></span>
+</div>"""
+        return f"""<div class="metric-card"><div class="card-header">{title}</div>{rows_html}</div>"""
+
+    with m1:
+        st.markdown(price_card_content("🌍 International (USD)", usd_prices, "USD"), unsafe_allow_html=True)
+    with m2:
+        st.markdown(price_card_content("🇪🇬 Egypt (EGP)", egp_prices, "EGP"), unsafe_allow_html=True)
+    with m3:
+        st.markdown(price_card_content("🇦🇪 UAE (AED)", uae_prices, "AED"), unsafe_allow_html=True)
+
+    # Calculator
+    render_calculator(usd_prices, egp_prices, uae_prices)
+
 # --- Footer ---
 st.markdown("<div style='text-align: center; margin-top: 64px; color: var(--color-text-tertiary); font-size: 14px;'>Informational only — not financial advice.</div>", unsafe_allow_html=True)
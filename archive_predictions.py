@@ -0,0 +1,48 @@
+"""
+Moves predictions older than `predictions.archive_after_days` out of the
+predictions table into monthly Parquet files under `predictions.archive_dir`.
+
+    python archive_predictions.py
+    python archive_predictions.py --older-than-days 30 --train-dictionary
+
+Run it from cron or a scheduled job; the evaluator reads both the table and
+the archive, so accuracy and Brier score cover the full history.
+"""
+import argparse
+import os
+import sys
+
+from backend.archive import PredictionArchive, cutoff_for
+from backend.config import get_section
+from src.logger import DB_NAME, repository_for
+
+
+def main(argv=None):
+    config = get_section("predictions")
+
+    parser = argparse.ArgumentParser(description="Archive old predictions to Parquet.")
+    parser.add_argument("--older-than-days", type=float, default=config.get("archive_after_days", 90))
+    parser.add_argument("--archive-dir", default=config.get("archive_dir", "data/archive/predictions"))
+    parser.add_argument("--chunk-size", type=int, default=config.get("export_chunk_size", 5000))
+    parser.add_argument("--train-dictionary", action="store_true",
+                        help="Retrain the payload compression dictionary on recent predictions")
+    parser.add_argument("--db", help=f"SQLite file (default: {DB_NAME}, or DATABASE_URL if set)")
+    args = parser.parse_args(argv)
+
+    repository = repository_for(args.db)
+    cutoff = cutoff_for(args.older_than_days)
+    counts = PredictionArchive(args.archive_dir).archive(repository, cutoff, chunk_size=args.chunk_size)
+    for month, count in counts.items():
+        print(f"{month}: archived {count} predictions")
+    print(f"Archived {sum(counts.values())} predictions older than {cutoff} to {os.path.abspath(args.archive_dir)}")
+
+    if args.train_dictionary:
+        dict_id = repository.train_dictionary()
+        if dict_id is None:
+            print("Not enough predictions to train a compression dictionary yet.", file=sys.stderr)
+        else:
+            print(f"Trained compression dictionary {dict_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Columnar archive for predictions that have aged out of the hot table.
+
+Rows older than a cutoff are moved into monthly Parquet files laid out
+hive-style (`month=2026-01/part-*.parquet`), with payloads stored as plain
+JSON text: Parquet's own zstd column compression handles them well, and the
+files stay readable by pandas, DuckDB or pyarrow with no custom codec. The
+evaluator reads the archive next to the hot table, and month partitions
+keep time-bounded scans from opening unrelated files.
+
+A run writes every month to temporary files first and only renames them
+and deletes the source rows once the whole range has been written, so a
+failed run leaves the hot table untouched.
+"""
+import itertools
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from backend.predictions import ROW_COLUMNS, SUMMARY_COLUMNS, PredictionRepository
+
+
+def cutoff_for(older_than_days: float, now: Optional[datetime] = None) -> str:
+    return ((now or datetime.utcnow()) - timedelta(days=older_than_days)).isoformat() + "Z"
+
+
+class PredictionArchive:
+    def __init__(self, archive_dir: str = "data/archive/predictions", compression: str = "zstd"):
+        self.archive_dir = archive_dir
+        self.compression = compression
+
+    def months(self) -> List[str]:
+        if not os.path.isdir(self.archive_dir):
+            return []
+        return sorted(name.split("=", 1)[1] for name in os.listdir(self.archive_dir) if name.startswith("month="))
+
+    def archive(self, repository: PredictionRepository, cutoff: str, chunk_size: int = 5000) -> Dict[str, int]:
+        """Moves rows with timestamp_utc < cutoff into the archive; returns rows per month."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from backend.export import arrow_schema
+
+        schema = arrow_schema(list(ROW_COLUMNS))
+        run = datetime.utcnow().strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        counts: Dict[str, int] = {}
+        # (temporary, final) paths; dot-prefixed files are ignored by readers
+        written: List[tuple] = []
+        writer = None
+        month = None
+        try:
+            for rows in repository.stream(end=cutoff, chunk_size=chunk_size):
+                # Rows arrive oldest first, so each month is one contiguous run
+                for row_month, group in itertools.groupby(rows, key=lambda row: row["timestamp_utc"][:7]):
+                    if row_month != month:
+                        if writer is not None:
+                            writer.close()
+                        month = row_month
+                        month_dir = os.path.join(self.archive_dir, f"month={month}")
+                        os.makedirs(month_dir, exist_ok=True)
+                        name = f"part-{run}.parquet"
+                        written.append((os.path.join(month_dir, "." + name), os.path.join(month_dir, name)))
+                        writer = pq.ParquetWriter(written[-1][0], schema, compression=self.compression)
+                    group = list(group)
+                    writer.write_table(pa.Table.from_pylist(group, schema=schema))
+                    counts[month] = counts.get(month, 0) + len(group)
+            if writer is not None:
+                writer.close()
+                writer = None
+        except Exception:
+            if writer is not None:
+                writer.close()
+            for tmp, _ in written:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            raise
+
+        for tmp, path in written:
+            os.replace(tmp, path)
+        if counts:
+            repository.delete_before(cutoff)
+        return counts
+
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        return ds.dataset(
+            self.archive_dir,
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive"),
+        )
+
+    def stream(self, start: Optional[str] = None, end: Optional[str] = None, outcome: Optional[str] = None,
+               chunk_size: int = 5000, full: bool = True, columns: Optional[Sequence[str]] = None,
+               columnar: bool = False) -> Iterator[Any]:
+        """Archived rows in chunks, with the same filters and shapes as PredictionRepository.stream."""
+        if not self.months():
+            return
+        import pyarrow.dataset as ds
+
+        if columns is None:
+            columns = ROW_COLUMNS if full else SUMMARY_COLUMNS
+        ts, outcome_field, month = ds.field("timestamp_utc"), ds.field("horizon_1d_outcome"), ds.field("month")
+        conditions = []
+        if start:
+            conditions += [month >= start[:7], ts >= start]
+        if end:
+            conditions += [month <= end[:7], ts < end]
+        if outcome == "PENDING":
+            conditions.append(outcome_field.is_null())
+        elif outcome == "EVALUATED":
+            conditions.append(outcome_field.is_valid())
+        elif outcome:
+            conditions.append(outcome_field == outcome)
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        for batch in self._dataset().to_batches(columns=list(columns), filter=expression, batch_size=chunk_size):
+            if batch.num_rows:
+                yield batch.to_pydict() if columnar else batch.to_pylist()
+
+
+def get_archive() -> PredictionArchive:
+    from backend.config import get_section
+    return PredictionArchive(get_section("predictions").get("archive_dir", "data/archive/predictions"))
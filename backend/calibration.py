@@ -0,0 +1,144 @@
+"""
+Calibration and reliability analytics for logged predictions.
+
+Scored predictions are loaded once into flat NumPy arrays (confidence,
+action, one outcome column per horizon) from columnar chunks of the table
+and the archive. Every metric is then a handful of bincounts over those
+arrays, so the report costs about the same as reading the columns, even
+for millions of predictions.
+
+Confidence is read as the model's probability that its action succeeds
+(confidence / 100). The Brier decomposition is Murphy's:
+brier ~= reliability - resolution + uncertainty, exact when every
+forecast in a bin has the same confidence.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+ACTIONS = ("BUY", "SELL", "HOLD")
+HORIZONS = ("1d", "7d", "30d")
+COLUMNS = ("final_action", "confidence") + tuple(f"horizon_{h}_outcome" for h in HORIZONS)
+
+_ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+_OUTCOME_CODES = {"SUCCESS": 1, "FAILURE": 0}
+DEFAULT_CONFIDENCE = 50.0
+EPSILON = 1e-6
+
+
+def _codes(values: List, codes: Dict[str, int], default: int) -> np.ndarray:
+    """Maps labels to int8 codes with elementwise compares instead of a Python loop."""
+    labels = np.asarray(values, dtype=object)
+    result = np.full(len(labels), default, dtype=np.int8)
+    for label, code in codes.items():
+        result[labels == label] = code
+    return result
+
+
+@dataclass
+class ScoredPredictions:
+    confidence: np.ndarray  # float64 in [0, 1]
+    action: np.ndarray      # int8 index into ACTIONS; missing actions count as HOLD
+    outcomes: np.ndarray    # int8 (n, len(HORIZONS)): 1 success, 0 failure, -1 not evaluated
+
+    def __len__(self):
+        return len(self.confidence)
+
+    @classmethod
+    def from_columns(cls, chunks: Iterable[Dict[str, List]]) -> "ScoredPredictions":
+        """Builds the arrays from columnar chunks holding COLUMNS."""
+        hold = _ACTION_CODES["HOLD"]
+        confidence, action, outcomes = [], [], []
+        for chunk in chunks:
+            # None becomes NaN in a float array
+            values = np.asarray(chunk["confidence"], dtype=np.float64)
+            confidence.append(np.where(np.isnan(values), DEFAULT_CONFIDENCE, values))
+            action.append(_codes(chunk["final_action"], _ACTION_CODES, hold))
+            outcomes.append(np.column_stack([_codes(chunk[f"horizon_{h}_outcome"], _OUTCOME_CODES, -1) for h in HORIZONS]))
+        if not confidence:
+            return cls(np.empty(0), np.empty(0, dtype=np.int8), np.empty((0, len(HORIZONS)), dtype=np.int8))
+        return cls(
+            confidence=np.clip(np.concatenate(confidence) / 100.0, 0.0, 1.0),
+            action=np.concatenate(action),
+            outcomes=np.concatenate(outcomes),
+        )
+
+
+def _rate(successes: np.ndarray, counts: np.ndarray) -> List:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = successes / counts
+    return [round(float(r) * 100, 1) if c else None for r, c in zip(rates, counts)]
+
+
+def calibration_report(scored: ScoredPredictions, horizon: str = "1d", bins: int = 10) -> Dict[str, Any]:
+    """
+    Accuracy, Brier score and its decomposition, log loss and reliability
+    bins for one horizon, plus accuracy per action and per horizon.
+    """
+    per_horizon = {}
+    for index, name in enumerate(HORIZONS):
+        evaluated = scored.outcomes[:, index] >= 0
+        count = int(evaluated.sum())
+        per_horizon[name] = {
+            "count": count,
+            "accuracy": round(float(scored.outcomes[evaluated, index].mean()) * 100, 1) if count else None,
+        }
+
+    column = scored.outcomes[:, HORIZONS.index(horizon)]
+    evaluated = column >= 0
+    p = scored.confidence[evaluated]
+    y = column[evaluated].astype(np.float64)
+    n = len(p)
+    if n == 0:
+        return {"horizon": horizon, "count": 0, "accuracy": 0.0, "brier_score": 0.0, "per_horizon": per_horizon}
+
+    # Reliability diagram: equal-width confidence bins, the top edge in the last bin
+    index = np.minimum((p * bins).astype(np.int64), bins - 1)
+    counts = np.bincount(index, minlength=bins)
+    sum_p = np.bincount(index, weights=p, minlength=bins)
+    sum_y = np.bincount(index, weights=y, minlength=bins)
+    filled = counts > 0
+    mean_p = np.divide(sum_p, counts, out=np.zeros(bins), where=filled)
+    observed = np.divide(sum_y, counts, out=np.zeros(bins), where=filled)
+
+    base_rate = float(y.mean())
+    reliability = float(np.sum(counts * (mean_p - observed) ** 2) / n)
+    resolution = float(np.sum(counts * (observed - base_rate) ** 2) / n)
+    clipped = np.clip(p, EPSILON, 1 - EPSILON)
+    log_loss = float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped)))
+
+    actions = scored.action[evaluated]
+    action_counts = np.bincount(actions, minlength=len(ACTIONS))
+    action_successes = np.bincount(actions, weights=y, minlength=len(ACTIONS))
+    action_rates = _rate(action_successes, action_counts)
+
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    return {
+        "horizon": horizon,
+        "count": n,
+        "accuracy": round(base_rate * 100, 1),
+        "brier_score": round(float(np.mean((p - y) ** 2)), 3),
+        "brier_decomposition": {
+            "reliability": round(reliability, 4),
+            "resolution": round(resolution, 4),
+            "uncertainty": round(base_rate * (1 - base_rate), 4),
+        },
+        "log_loss": round(log_loss, 4),
+        "mean_confidence": round(float(p.mean()) * 100, 1),
+        "reliability_bins": [
+            {
+                "lower": round(float(edges[i]), 2),
+                "upper": round(float(edges[i + 1]), 2),
+                "count": int(counts[i]),
+                "mean_confidence": round(float(mean_p[i]), 4) if filled[i] else None,
+                "observed_frequency": round(float(observed[i]), 4) if filled[i] else None,
+            }
+            for i in range(bins)
+        ],
+        "per_action": {
+            action: {"count": int(action_counts[i]), "accuracy": action_rates[i]}
+            for i, action in enumerate(ACTIONS)
+        },
+        "per_horizon": per_horizon,
+    }
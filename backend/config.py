@@ -0,0 +1,18 @@
+import os
+import yaml
+
+# config.yaml lives in the repo root locally and in /app inside the backend container
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config.yaml")
+if not os.path.exists(CONFIG_PATH):
+    CONFIG_PATH = "config.yaml"
+
+try:
+    with open(CONFIG_PATH, "r") as f:
+        config = yaml.safe_load(f) or {}
+except Exception:
+    config = {}
+
+
+def get_section(name: str) -> dict:
+    """Returns a top-level config section, or an empty dict if it is missing."""
+    return config.get(name) or {}
@@ -0,0 +1,119 @@
+"""
+Background evaluation of logged predictions.
+
+Each horizon keeps a watermark: the (timestamp_utc, id) of the last
+prediction already scored. A run reads only predictions past the watermark
+that are old enough for the horizon, oldest first in keyset batches. Each batch's
+outcomes and the new watermark are written in one transaction, so the
+cost of a run depends on how many predictions matured since the last one,
+not on the size of the table.
+
+Runs are idempotent and safe to overlap (several app processes, a cron job
+and the API worker). Outcomes are only written where none is set yet, and
+the watermark only ever moves forward.
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Sequence
+
+from backend.predictions import PredictionRepository
+
+HORIZON_HOURS = {"1d": 24, "7d": 24 * 7, "30d": 24 * 30}
+COLUMNS = ("id", "timestamp_utc", "gld_price", "final_action")
+
+
+def score_outcome(action: Optional[str], entry_price: float, current_price: float, threshold: float) -> str:
+    """SUCCESS/FAILURE for an action given the move since entry (`threshold` as a fraction)."""
+    pct_change = (current_price - entry_price) / entry_price
+    if action == "BUY":
+        return "SUCCESS" if pct_change >= threshold else "FAILURE"
+    if action == "SELL":
+        return "SUCCESS" if pct_change <= -threshold else "FAILURE"
+    # HOLD (and anything unrecognised)
+    return "SUCCESS" if abs(pct_change) < threshold else "FAILURE"
+
+
+class EvaluationWorker:
+    def __init__(self, repository: PredictionRepository, price_source: Callable[[], Optional[float]],
+                 success_threshold: float = 0.002, horizons: Sequence[str] = ("1d",), chunk_size: int = 5000,
+                 interval_seconds: float = 300):
+        self.repository = repository
+        self.price_source = price_source
+        self.success_threshold = success_threshold
+        self.horizons = tuple(horizons)
+        self.chunk_size = chunk_size
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self, now: Optional[datetime] = None) -> Optional[Dict[str, int]]:
+        """
+        Scores newly matured predictions for every horizon. Returns rows
+        updated per horizon, or None when no current price was available.
+        """
+        now = now or datetime.utcnow()
+        current_price = self.price_source()
+        if not current_price:
+            return None
+
+        updated = {}
+        for horizon in self.horizons:
+            name = f"evaluation:{horizon}"
+            cutoff = (now - timedelta(hours=HORIZON_HOURS[horizon])).isoformat() + "Z"
+            after = self.repository.get_watermark(name)
+            updated[horizon] = 0
+            while True:
+                chunk = self.repository.batch_after(after, cutoff, COLUMNS, limit=self.chunk_size, pending=horizon)
+                if not chunk["id"]:
+                    break
+                outcomes = [
+                    (prediction_id, score_outcome(action, entry, current_price, self.success_threshold))
+                    for prediction_id, action, entry in zip(chunk["id"], chunk["final_action"], chunk["gld_price"])
+                ]
+                after = (chunk["timestamp_utc"][-1], chunk["id"][-1])
+                updated[horizon] += self.repository.set_outcomes(outcomes, horizon=horizon, watermark=(name, *after))
+        return updated
+
+    def _run_logged(self):
+        try:
+            result = self.run_once()
+            if result is None:
+                print("Evaluation Worker: no current price, skipping run")
+        except Exception as e:
+            print(f"Evaluation Worker Error: {e}")
+
+    # --- Scheduling ---
+
+    async def _loop(self):
+        while True:
+            await asyncio.to_thread(self._run_logged)
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Runs on the current event loop (the API lifespan)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def start_thread(self, stop_event: Optional[threading.Event] = None) -> threading.Thread:
+        """Runs in a daemon thread, for processes without an event loop (Streamlit, CLI)."""
+        stop_event = stop_event or threading.Event()
+
+        def loop():
+            while not stop_event.is_set():
+                started = time.monotonic()
+                self._run_logged()
+                stop_event.wait(max(0.0, self.interval_seconds - (time.monotonic() - started)))
+
+        thread = threading.Thread(target=loop, name="evaluation-worker", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,94 @@
+"""
+Streaming serializers for bulk prediction exports.
+
+Each writer takes the row chunks from `PredictionRepository.stream` and
+yields encoded bytes per chunk, so an export of millions of rows holds one
+chunk in memory at a time whether it goes to an HTTP response or a file.
+Parquet writes one row group per chunk; pyarrow is only imported for it.
+"""
+import csv
+import io
+from typing import Any, Dict, Iterable, Iterator, List
+
+from backend.predictions import ROW_COLUMNS, SUMMARY_COLUMNS
+from backend.responses import dumps
+
+Chunks = Iterable[List[Dict[str, Any]]]
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def columns_for(full: bool) -> List[str]:
+    return list(ROW_COLUMNS if full else SUMMARY_COLUMNS)
+
+
+def iter_ndjson(chunks: Chunks) -> Iterator[bytes]:
+    for rows in chunks:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def iter_csv(chunks: Chunks, columns: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+
+def arrow_schema(columns: List[str]):
+    import pyarrow as pa
+
+    types = {"gld_price": pa.float64(), "xau_price": pa.float64(), "confidence": pa.float64()}
+    return pa.schema([(name, types.get(name, pa.string())) for name in columns])
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose contents are taken after each row group."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def iter_parquet(chunks: Chunks, columns: List[str], compression: str = "zstd") -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(columns)
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    for rows in chunks:
+        if rows:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def iter_export(fmt: str, chunks: Chunks, full: bool = True) -> Iterator[bytes]:
+    """Encoded export body; `full` must match how the chunks were read."""
+    if fmt == "ndjson":
+        return iter_ndjson(chunks)
+    if fmt == "csv":
+        return iter_csv(chunks, columns_for(full))
+    if fmt == "parquet":
+        return iter_parquet(chunks, columns_for(full))
+    raise ValueError(f"format must be one of {', '.join(FORMATS)}")
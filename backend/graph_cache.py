@@ -0,0 +1,117 @@
+"""
+Persistent cache for LangGraph node outputs.
+
+The compiled workflow in graph.py gives each node a CachePolicy whose key is
+a hash of the state fields that node reads, so a node only reruns when its
+inputs change or its TTL runs out. Entries live in a small SQLite file, so
+repeated CLI runs (and reruns after a failure further down the graph)
+reuse work that earlier processes already did.
+"""
+import asyncio
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Mapping, Optional, Sequence, Tuple
+
+from langgraph.cache.base import BaseCache, FullKey, Namespace
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS node_cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    encoding TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires REAL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+def state_key(*fields: str) -> Callable[[Any], bytes]:
+    """Cache key over just the given state fields, so unrelated state changes still hit."""
+    def key(state) -> bytes:
+        return pickle.dumps([state.get(field) for field in fields], protocol=5)
+    return key
+
+
+def _namespace(ns: Namespace) -> str:
+    return "/".join(ns)
+
+
+# Node outputs that are not plain JSON types
+ALLOWED_TYPES = [("backend.services.market_data", "Quote")]
+
+
+class SqliteNodeCache(BaseCache):
+    """
+    `cacheable` sees a node's writes, a list of (channel, value), and can
+    refuse to store them, e.g. a failed fetch that the next run should retry.
+    """
+
+    def __init__(self, path: str, cacheable: Optional[Callable[[Any], bool]] = None):
+        super().__init__(serde=JsonPlusSerializer(allowed_msgpack_modules=ALLOWED_TYPES))
+        self.path = path
+        self.cacheable = cacheable
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per call: nodes run on worker threads and event loops
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, keys: Sequence[FullKey]):
+        if not keys:
+            return {}
+        now = time.time()
+        values = {}
+        with self._connect() as conn:
+            for ns, key in keys:
+                row = conn.execute(
+                    "SELECT encoding, value, expires FROM node_cache WHERE namespace = ? AND key = ?",
+                    (_namespace(ns), key),
+                ).fetchone()
+                if row is not None and (row[2] is None or now < row[2]):
+                    values[(ns, key)] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def set(self, pairs: Mapping[FullKey, Tuple[Any, Optional[int]]]):
+        now = time.time()
+        rows = []
+        for (ns, key), (value, ttl) in pairs.items():
+            if self.cacheable is not None and not self.cacheable(value):
+                continue
+            encoding, data = self.serde.dumps_typed(value)
+            rows.append((_namespace(ns), key, encoding, data, now + ttl if ttl is not None else None))
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM node_cache WHERE expires < ?", (now,))
+            conn.executemany("INSERT OR REPLACE INTO node_cache VALUES (?, ?, ?, ?, ?)", rows)
+
+    def clear(self, namespaces: Optional[Sequence[Namespace]] = None):
+        with self._connect() as conn:
+            if namespaces is None:
+                conn.execute("DELETE FROM node_cache")
+            else:
+                conn.executemany("DELETE FROM node_cache WHERE namespace = ?", [(_namespace(ns),) for ns in namespaces])
+
+    async def aget(self, keys: Sequence[FullKey]):
+        return await asyncio.to_thread(self.get, keys)
+
+    async def aset(self, pairs: Mapping[FullKey, Tuple[Any, Optional[int]]]):
+        await asyncio.to_thread(self.set, pairs)
+
+    async def aclear(self, namespaces: Optional[Sequence[Namespace]] = None):
+        await asyncio.to_thread(self.clear, namespaces)
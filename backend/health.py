@@ -0,0 +1,152 @@
+"""
+Background health probing for the database and upstream dependencies.
+
+Probes run on an interval in a background task, so health endpoints only read
+the last result and never queue behind a slow Postgres or upstream.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from backend.metrics import track_upstream
+
+
+@dataclass
+class DependencyStatus:
+    name: str
+    ok: bool
+    latency_ms: Optional[float] = None
+    checked_at: Optional[str] = None
+    error: Optional[str] = None
+    critical: bool = False
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def database_check() -> Callable[[], Awaitable[None]]:
+    """SELECT 1 on the shared engine, run in a worker thread."""
+    def ping():
+        from sqlalchemy import text
+        from backend.database import engine as db_engine
+        with db_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    async def check():
+        await asyncio.to_thread(ping)
+    return check
+
+
+def http_check(client: httpx.AsyncClient, url: str) -> Callable[[], Awaitable[None]]:
+    """Reachability probe: any HTTP answer below 500 counts as up."""
+    async def check():
+        response = await client.head(url)
+        if response.status_code >= 500:
+            raise RuntimeError(f"HTTP {response.status_code}")
+    return check
+
+
+class HealthMonitor:
+    def __init__(self, interval_seconds: float = 15, timeout_seconds: float = 3, critical: Optional[List[str]] = None):
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.critical = set(critical or [])
+        self.checks: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self.statuses: Dict[str, DependencyStatus] = {}
+        self.started_at = time.monotonic()
+        self.last_run: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, check: Callable[[], Awaitable[None]]):
+        self.checks[name] = check
+        self.statuses[name] = DependencyStatus(name=name, ok=False, error="pending", critical=name in self.critical)
+
+    async def _probe(self, name: str, check: Callable[[], Awaitable[None]]) -> DependencyStatus:
+        start = time.perf_counter()
+        error = None
+        try:
+            with track_upstream(name, "health_probe"):
+                await asyncio.wait_for(check(), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout_seconds}s"
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        return DependencyStatus(
+            name=name,
+            ok=error is None,
+            latency_ms=round((time.perf_counter() - start) * 1000, 1),
+            checked_at=datetime.now(timezone.utc).isoformat(),
+            error=error,
+            critical=name in self.critical,
+        )
+
+    async def run_once(self):
+        results = await asyncio.gather(*(self._probe(name, check) for name, check in self.checks.items()))
+        for status in results:
+            self.statuses[status.name] = status
+        self.last_run = time.monotonic()
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Health Monitor Error: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- Read side (never blocks) ---
+
+    @property
+    def stale(self) -> bool:
+        """True if the probe loop has stopped making progress."""
+        if self._task is None or self.last_run is None:
+            return False
+        return time.monotonic() - self.last_run > 3 * (self.interval_seconds + self.timeout_seconds)
+
+    def liveness(self) -> Dict:
+        return {
+            "status": "stale" if self.stale else "ok",
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1),
+            "last_probe_age_seconds": None if self.last_run is None else round(time.monotonic() - self.last_run, 1),
+        }
+
+    def readiness(self) -> Dict:
+        ready = self.last_run is not None and all(
+            status.ok for status in self.statuses.values() if status.critical
+        )
+        return {
+            "status": "ready" if ready else "not_ready",
+            "dependencies": {name: status.to_dict() for name, status in self.statuses.items()},
+        }
+
+    def status_of(self, name: str) -> Optional[DependencyStatus]:
+        return self.statuses.get(name)
+
+
+def build_monitor(health_config: Dict, client: httpx.AsyncClient) -> HealthMonitor:
+    monitor = HealthMonitor(
+        interval_seconds=health_config.get("interval_seconds", 15),
+        timeout_seconds=health_config.get("timeout_seconds", 3),
+        critical=health_config.get("critical", ["database"]),
+    )
+    monitor.register("database", database_check())
+    for name, url in (health_config.get("upstreams") or {}).items():
+        monitor.register(name, http_check(client, url))
+    return monitor
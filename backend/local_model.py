@@ -0,0 +1,217 @@
+"""
+Deterministic local analyst, used when the LLM misses its deadline or fails.
+
+One logistic regression per action estimates P(the action succeeds) from a
+handful of price features; the action with the highest estimate wins and
+that probability is the confidence. The models are fitted offline from the
+evaluated prediction log (python train_local_model.py) and saved as JSON.
+Until a model file exists, hand-set momentum weights stand in.
+
+Prediction is a few multiply-adds in plain Python (microseconds); numpy is
+only imported for training.
+"""
+import itertools
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+ACTIONS = ("BUY", "SELL", "HOLD")
+FEATURES = ("gld_change_pct", "xau_change_pct", "abs_change_pct", "range_position", "range_pct")
+MIN_SAMPLES = 30  # per action; fewer evaluated rows keep the default weights
+
+# [bias, *one weight per FEATURE] on raw (unscaled) features
+DEFAULT_WEIGHTS = {
+    "BUY": [-0.1, 0.8, 0.4, 0.0, 0.5, 0.0],
+    "SELL": [-0.1, -0.8, -0.4, 0.0, -0.5, 0.0],
+    "HOLD": [0.2, 0.0, 0.0, -0.8, 0.0, -0.3],
+}
+
+
+def _change(asset: Dict[str, Any]) -> float:
+    value = asset.get("pct_change_24h")
+    return float(value) if value is not None else 0.0
+
+
+def features(gld_data: Dict[str, Any], xau_data: Dict[str, Any]) -> List[float]:
+    """FEATURES for one GLD/XAU snapshot; missing fields count as neutral."""
+    gld_change, xau_change = _change(gld_data), _change(xau_data)
+    ohlc = gld_data.get("ohlc") or {}
+    high, low = ohlc.get("high"), ohlc.get("low")
+    close = ohlc.get("close", gld_data.get("price"))
+    range_position = range_pct = 0.0
+    if high is not None and low is not None and close and high > low:
+        # -0.5 at the day's low, +0.5 at its high
+        range_position = (close - low) / (high - low) - 0.5
+        range_pct = (high - low) / close * 100
+    return [gld_change, xau_change, abs(gld_change), range_position, range_pct]
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+@dataclass
+class LocalAnalystModel:
+    # Features are standardized as (x - mean) / scale before the weights apply
+    means: List[float] = field(default_factory=lambda: [0.0] * len(FEATURES))
+    scales: List[float] = field(default_factory=lambda: [1.0] * len(FEATURES))
+    weights: Dict[str, List[float]] = field(default_factory=lambda: {a: list(w) for a, w in DEFAULT_WEIGHTS.items()})
+    samples: Dict[str, int] = field(default_factory=dict)
+    trained_utc: Optional[str] = None
+
+    def probabilities(self, gld_data: Dict[str, Any], xau_data: Dict[str, Any]) -> Dict[str, float]:
+        x = [(v - m) / s for v, m, s in zip(features(gld_data, xau_data), self.means, self.scales)]
+        return {
+            action: _sigmoid(w[0] + sum(wi * xi for wi, xi in zip(w[1:], x)))
+            for action, w in self.weights.items()
+        }
+
+    def analyze(self, gld_data: Dict[str, Any], xau_data: Dict[str, Any]) -> Dict[str, Any]:
+        """The LLM's output schema (before mapping), labelled with source "local_model"."""
+        probabilities = self.probabilities(gld_data, xau_data)
+        action = max(ACTIONS, key=lambda a: probabilities.get(a, 0.0))
+        basis = f"trained on {sum(self.samples.values())} evaluated predictions" if self.trained_utc else "default weights"
+        estimates = ", ".join(f"{a} {probabilities[a] * 100:.0f}%" for a in ACTIONS if a in probabilities)
+        return {
+            "recommendation": action,
+            "confidence": round(probabilities[action] * 100, 1),
+            "rationale_brief": "Fast local estimate from price action; the AI analyst was unavailable.",
+            "rationale_technical": (
+                f"Local model ({basis}). Estimated success rates: {estimates}. "
+                f"GLD 24h {_change(gld_data):+.2f}%, XAU 24h {_change(xau_data):+.2f}%."
+            ),
+            "suggested_risk_tier": "Conservative",
+            "source": "local_model",
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "features": list(FEATURES), "means": self.means, "scales": self.scales,
+            "weights": self.weights, "samples": self.samples, "trained_utc": self.trained_utc,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LocalAnalystModel":
+        if tuple(data.get("features", ())) != FEATURES:
+            raise ValueError("model was trained on a different feature set")
+        return cls(data["means"], data["scales"], data["weights"], data.get("samples", {}), data.get("trained_utc"))
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalAnalystModel":
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+# --- Training ---
+
+def fit_logistic(X, y, l2: float = 1.0, iterations: int = 25):
+    """
+    L2-regularized logistic regression by Newton's method. X is (n, k)
+    without an intercept column; returns [bias, *k weights]. The bias is
+    not penalized.
+    """
+    import numpy as np
+
+    X = np.column_stack([np.ones(len(X)), X])
+    y = np.asarray(y, dtype=float)
+    penalty = l2 * np.eye(X.shape[1])
+    penalty[0, 0] = 0.0
+    w = np.zeros(X.shape[1])
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-(X @ w)))
+        gradient = X.T @ (p - y) + penalty @ w
+        hessian = (X.T * (p * (1 - p))) @ X + penalty
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    return w
+
+
+def _standardized(raw: Sequence[float], means: Sequence[float], scales: Sequence[float]) -> List[float]:
+    """Default raw-feature weights re-expressed for standardized features."""
+    weights = [w * s for w, s in zip(raw[1:], scales)]
+    return [raw[0] + sum(w * m for w, m in zip(raw[1:], means))] + weights
+
+
+def train(rows: Iterable[Tuple[Dict[str, Any], Dict[str, Any], str, str]], l2: float = 1.0) -> LocalAnalystModel:
+    """
+    Fits one model per action from (gld_data, xau_data, final_action, outcome)
+    rows, outcome being SUCCESS or FAILURE. Actions with fewer than
+    MIN_SAMPLES rows keep the default weights.
+    """
+    import numpy as np
+
+    X, actions, labels = [], [], []
+    for gld_data, xau_data, action, outcome in rows:
+        if action in ACTIONS and outcome in ("SUCCESS", "FAILURE"):
+            X.append(features(gld_data, xau_data))
+            actions.append(action)
+            labels.append(outcome == "SUCCESS")
+    model = LocalAnalystModel()
+    if not X:
+        return model
+
+    X, actions, labels = np.array(X), np.array(actions), np.array(labels)
+    means = X.mean(axis=0)
+    scales = X.std(axis=0)
+    scales[scales == 0] = 1.0
+    model.means, model.scales = means.tolist(), scales.tolist()
+    Z = (X - means) / scales
+    for action in ACTIONS:
+        mask = actions == action
+        model.samples[action] = int(mask.sum())
+        if mask.sum() >= MIN_SAMPLES:
+            model.weights[action] = fit_logistic(Z[mask], labels[mask], l2=l2).tolist()
+        else:
+            model.weights[action] = _standardized(DEFAULT_WEIGHTS[action], model.means, model.scales)
+    model.trained_utc = datetime.utcnow().isoformat() + "Z"
+    return model
+
+
+def training_rows(repository, archive=None, horizon: str = "1d",
+                  chunk_size: int = 5000) -> Iterable[Tuple[Dict, Dict, str, str]]:
+    """Evaluated predictions from the table and, when given, the Parquet archive, as train() rows."""
+    columns = ("input_json", "final_action", f"horizon_{horizon}_outcome")
+    sources = [repository] + ([archive] if archive is not None else [])
+    chunks = itertools.chain.from_iterable(
+        source.stream(outcome="EVALUATED", columns=columns, chunk_size=chunk_size) for source in sources
+    )
+    for chunk in chunks:
+        for row in chunk:
+            try:
+                assets = json.loads(row["input_json"] or "{}").get("assets", {})
+            except (TypeError, ValueError):
+                continue
+            yield assets.get("GLD") or {}, assets.get("XAU") or {}, row["final_action"], row[columns[2]]
+
+
+_model: Optional[LocalAnalystModel] = None
+
+
+def get_local_model(path: Optional[str] = None) -> LocalAnalystModel:
+    """The trained model from analysis.local_model_path, or the default weights; loaded once."""
+    global _model
+    if _model is None:
+        from backend.config import get_section
+
+        path = path or get_section("analysis").get("local_model_path", "data/models/local_analyst.json")
+        try:
+            _model = LocalAnalystModel.load(path)
+        except FileNotFoundError:
+            _model = LocalAnalystModel()
+        except Exception as e:
+            print(f"Local analyst model at {path} could not be loaded, using default weights: {e}")
+            _model = LocalAnalystModel()
+    return _model
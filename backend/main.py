@@ -1,10 +1,101 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 # Only import simple models at top level
 from backend.models import PriceResponse, NewsItem, AnalysisRequest, AnalysisResponse
-from typing import List, Dict, Any
+from backend.config import get_section
+from backend.responses import FastJSONResponse, CompressionMiddleware, SnapshotCache
+from backend.metrics import MetricsMiddleware, REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE, record_fallback
+from backend.profiling import ServerTimingMiddleware, phase as timing_phase
+import itertools
+import os
+from typing import List, Dict, Any, Optional
 
-app = FastAPI(title="Gold Analyst AI API", version="2.0.0")
+api_config = get_section("api")
+history_config = get_section("history")
+HISTORY_SYMBOLS = tuple(history_config.get("symbols", ["GC=F", "GLD", "EGP=X", "AED=X"]))
+
+predictions_config = get_section("predictions")
+
+# Probes DB and upstreams in the background; health endpoints read the last result
+health_monitor = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global health_monitor
+    import httpx
+    from backend.health import build_monitor
+
+    from backend.services.market_data import get_market_data
+
+    # One keep-alive pool for quote providers, separate from the probes so a
+    # slow upstream can't starve health checks of connections
+    quote_client = httpx.AsyncClient(
+        timeout=get_section("providers").get("timeout_seconds", 5),
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    )
+    market_data = get_market_data()
+    market_data.http_client = quote_client
+
+    # Minute bars for intraday features; off unless the instance has a persistent disk
+    recorder = None
+    recorder_config = get_section("recorder")
+    if recorder_config.get("enabled"):
+        from backend.services.recorder import build_recorder
+        from backend.services.rollups import get_rollups
+        recorder = build_recorder(recorder_config, quote_client, market_data.registry.get("yahoo").chart_base_url, get_rollups())
+        recorder.start()
+
+    # Scores matured predictions; off by default so only one deployment writes outcomes
+    evaluation_worker = None
+    evaluation_config = get_section("evaluation")
+    if evaluation_config.get("worker_enabled"):
+        from backend.evaluation import EvaluationWorker
+        from backend.predictions import get_repository
+
+        def gld_price():
+            quote = market_data.get_quote("gld")
+            return quote.price if quote else None
+
+        evaluation_worker = EvaluationWorker(
+            get_repository(),
+            price_source=gld_price,
+            success_threshold=evaluation_config.get("success_threshold_pct", 0.2) / 100.0,
+            horizons=evaluation_config.get("horizons", ["1d"]),
+            interval_seconds=evaluation_config.get("interval_seconds", 300),
+        )
+        evaluation_worker.start()
+
+    async with httpx.AsyncClient(timeout=get_section("health").get("timeout_seconds", 3)) as probe_client:
+        health_monitor = build_monitor(get_section("health"), probe_client)
+        health_monitor.start()
+        try:
+            yield
+        finally:
+            await health_monitor.stop()
+            if recorder is not None:
+                await recorder.stop()
+            if evaluation_worker is not None:
+                await evaluation_worker.stop()
+            market_data.http_client = None
+            await quote_client.aclose()
+
+app = FastAPI(title="Gold Analyst AI API", version="2.0.0", default_response_class=FastJSONResponse, lifespan=lifespan)
+
+# Compress whatever the snapshot cache did not already pre-compress
+app.add_middleware(CompressionMiddleware, minimum_size=api_config.get("compression_min_bytes", 500))
+app.add_middleware(MetricsMiddleware)
+
+# Server-Timing on every response; stack profiles only when sampled or asked for
+profiling_config = get_section("profiling")
+app.add_middleware(
+    ServerTimingMiddleware,
+    sample_rate=profiling_config.get("sample_rate", 0.0),
+    debug_header=profiling_config.get("debug_header", "X-Debug-Profile"),
+    debug_token=os.getenv("PROFILE_DEBUG_TOKEN"),
+    output_dir=profiling_config.get("output_dir", "profiles"),
+    interval_ms=profiling_config.get("interval_ms", 5),
+)
 
 # CORS
 app.add_middleware(
@@ -19,41 +110,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# NOTE: Database engine import moved to read_root to prevent crash if DB is not ready
-# but we keep it available for health check if possible, or lazy load it too.
-# For maximum safety, we lazy load EVERYTHING.
+# Pre-serialized bodies for the endpoints the frontend polls
+snapshots = SnapshotCache(ttl_seconds=api_config.get("snapshot_ttl_seconds", 30))
+
+# NOTE: The database engine is only imported by the health monitor's probe thread,
+# so a DB that is not ready cannot crash startup. For maximum safety, we lazy load EVERYTHING.
 
 @app.get("/")
-def read_root():
-    db_status = "Disconnected"
-    try:
-        from sqlalchemy import text
-        from backend.database import engine as db_engine
-        with db_engine.connect() as connection:
-            connection.execute(text("SELECT 1"))
+async def read_root():
+    db_status = "Disconnected: health check pending"
+    status = health_monitor.status_of("database") if health_monitor else None
+    if status is not None and status.ok:
         db_status = "Connected"
-    except Exception as e:
-        db_status = f"Disconnected: {str(e)}"
+    elif status is not None and status.checked_at:
+        db_status = f"Disconnected: {status.error}"
     
     return {"message": "Gold Analyst AI API is running", "database": db_status}
 
+@app.get("/health/live")
+async def health_live():
+    if health_monitor is None:
+        return {"status": "ok", "detail": "health monitor not running"}
+    liveness = health_monitor.liveness()
+    return FastJSONResponse(status_code=503 if liveness["status"] != "ok" else 200, content=liveness)
+
+@app.get("/health/ready")
+async def health_ready():
+    if health_monitor is None:
+        return FastJSONResponse(status_code=503, content={"status": "not_ready", "dependencies": {}})
+    readiness = health_monitor.readiness()
+    return FastJSONResponse(status_code=200 if readiness["status"] == "ready" else 503, content=readiness)
+
 @app.get("/price/{ticker}")
-def get_price(ticker: str):
-    from fastapi.responses import JSONResponse
+async def get_price(ticker: str, request: Request):
     try:
         # Lazy import
-        from backend.services import fetch_gold_price
+        from backend.services.providers import fetch_gold_price_async
         
-        data = fetch_gold_price()
+        snapshot = await snapshots.aget_or_build(
+            "price", fetch_gold_price_async,
+            cacheable=lambda data: bool(data) and "error" not in data
+        )
+        data = snapshot.content
         # Validation check manually
         if data and "error" in data:
              # Just return it, don't 500
-             return JSONResponse(status_code=500, content={"detail": data["error"]})
-        return data
+             return FastJSONResponse(status_code=500, content={"detail": data["error"]})
+        return snapshot.to_response(request)
     except Exception as e:
         import traceback
         error_msg = f"Backend Error: {str(e)}"
         print(f"CRITICAL ERROR: {error_msg}\n{traceback.format_exc()}")
+        record_fallback("price_safe_mode")
         
         # Fallback Data (Safe Mode) to prevent UI crash
         safe_data = {
@@ -69,36 +177,120 @@ def get_price(ticker: str):
         }
         return safe_data
 
+def _check_history_symbol(symbol: str):
+    # Each symbol gets its own snapshot entries and rollup file, so only known ones are served
+    if symbol not in HISTORY_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"symbol must be one of {', '.join(HISTORY_SYMBOLS)}")
+
+@app.get("/history")
+async def get_history(
+    request: Request,
+    symbol: str = "GC=F",
+    range_: str = Query("1y", alias="range"),
+    interval: str = "1d",
+    points: Optional[int] = Query(None, ge=3, le=5000),
+):
+    from backend.services.history import RANGES, INTERVALS, get_history as build_history
+
+    _check_history_symbol(symbol)
+    if range_ not in RANGES:
+        raise HTTPException(status_code=400, detail=f"range must be one of {', '.join(RANGES)}")
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(INTERVALS)}")
+    # Yahoo only serves hourly bars for the last 730 days
+    if interval == "1h" and range_ not in ("1mo", "3mo", "6mo", "1y"):
+        raise HTTPException(status_code=400, detail="interval 1h supports ranges up to 1y")
+
+    try:
+        snapshot = await snapshots.aget_or_build(
+            f"history:{symbol}:{range_}:{interval}:{points}",
+            lambda: build_history(symbol, range_, interval, points),
+            cacheable=lambda data: data["points"] > 0,
+            ttl_seconds=history_config.get("intraday_ttl_seconds" if interval == "1h" else "ttl_seconds", 900),
+            label="history",
+        )
+    except Exception as e:
+        print(f"History Error: {e}")
+        record_fallback("history_unavailable")
+        raise HTTPException(status_code=502, detail="History provider unavailable")
+    return snapshot.to_response(request)
+
+@app.get("/stats")
+async def get_stats(request: Request, symbol: str = "GC=F", range_: str = Query("1y", alias="range")):
+    """Return, realized volatility, high/low and volume over a range, from the rollups."""
+    from backend.services.rollups import RANGE_SECONDS, get_rollups
+
+    _check_history_symbol(symbol)
+    if range_ not in RANGE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"range must be one of {', '.join(RANGE_SECONDS)}")
+
+    async def build():
+        import time
+        rollups = await get_rollups().ensure_daily(symbol)
+        span = RANGE_SECONDS[range_]
+        return {"range": range_, **rollups.stats(int(time.time()) - span if span else None)}
+
+    try:
+        snapshot = await snapshots.aget_or_build(
+            f"stats:{symbol}:{range_}", build,
+            cacheable=lambda data: data["buckets"] > 0,
+            ttl_seconds=history_config.get("ttl_seconds", 900),
+            label="stats",
+        )
+    except Exception as e:
+        print(f"Stats Error: {e}")
+        record_fallback("stats_unavailable")
+        raise HTTPException(status_code=502, detail="History provider unavailable")
+    return snapshot.to_response(request)
+
+def _validated_news() -> List[Dict[str, Any]]:
+    from backend.services.news import fetch_market_news
+    # Validate once when the snapshot is built instead of on every response
+    return [NewsItem.model_validate(item).model_dump() for item in fetch_market_news()]
+
 @app.get("/news", response_model=List[NewsItem])
-def get_news():
+def get_news(request: Request):
     try:
-        from backend.services import fetch_market_news
-        return fetch_market_news()
+        snapshot = snapshots.get_or_build(
+            "news", _validated_news,
+            # The "News Unavailable" placeholder comes from source "System"; don't pin it
+            cacheable=lambda items: bool(items) and items[0].get("source") != "System"
+        )
+        return snapshot.to_response(request)
     except Exception as e:
         print(f"News Error: {e}")
+        record_fallback("news_empty")
         return []
 
 # Persistent Sentiment Engine for caching
 sentiment_engine = None
 
 @app.get("/market-mood")
-async def get_market_mood():
+async def get_market_mood(request: Request):
     global sentiment_engine
     try:
+        snapshot = snapshots.get("market-mood")
+        if snapshot is not None:
+            return snapshot.to_response(request)
+
         if sentiment_engine is None:
             from backend.services.sentiment import SentimentEngine
             sentiment_engine = SentimentEngine()
         
-        return await sentiment_engine.get_market_mood()
+        mood = await sentiment_engine.get_market_mood()
+        if mood.get("error"):
+            return mood
+        return snapshots.put("market-mood", mood).to_response(request)
     except Exception as e:
         print(f"Market Mood Endpoint Error: {e}")
+        record_fallback("market_mood_unavailable")
         return {"sentiment_score": 50, "mood_label": "Neutral", "key_factors": ["Service temporarily unavailable"]}
 
 @app.post("/analyze", response_model=AnalysisResponse)
 def analyze_market(request: AnalysisRequest):
     try:
-        from backend.services import GoldAnalystEngine
-        ai_engine = GoldAnalystEngine()
+        from backend.services.llm import get_engine
+        ai_engine = get_engine()
         
         result = ai_engine.analyze(request.gld_data, request.xau_data)
         
@@ -109,6 +301,80 @@ def analyze_market(request: AnalysisRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze/stream")
+def analyze_market_stream(request: AnalysisRequest):
+    """
+    /analyze as server-sent events: "token" chunks of model text, "fields"
+    (recommendation, confidence) as soon as they can be parsed, then
+    "result" with the same body /analyze returns.
+    """
+    from fastapi.responses import StreamingResponse
+    from backend.responses import sse_event
+    from backend.services.llm import get_engine
+
+    events = get_engine().analyze_stream(request.gld_data, request.xau_data)
+    # Sync generator: the blocking Gemini stream is read in the threadpool
+    return StreamingResponse(
+        (sse_event(name, data) for name, data in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/predictions")
+def list_predictions(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    full: bool = False,
+):
+    """Newest-first predictions; pass `next_cursor` back as `cursor` for the next page."""
+    from backend.predictions import get_repository
+    try:
+        with timing_phase("db"):
+            items, next_cursor = get_repository().page(limit=limit, cursor=cursor, full=full)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/predictions/export")
+def export_predictions(
+    format: str = "ndjson",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    outcome: Optional[str] = None,
+    full: bool = True,
+):
+    """Streams every matching prediction (oldest first) as NDJSON, CSV or Parquet."""
+    from fastapi.responses import StreamingResponse
+    from backend.export import FORMATS, iter_export
+    from backend.predictions import OUTCOMES, get_repository
+
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    if outcome is not None and outcome not in OUTCOMES:
+        raise HTTPException(status_code=400, detail=f"outcome must be one of {', '.join(OUTCOMES)}")
+
+    chunks = get_repository().stream(
+        start=start, end=end, outcome=outcome, full=full,
+        chunk_size=predictions_config.get("export_chunk_size", 5000),
+    )
+    # Run the query and read the first chunk before the headers go out, so
+    # Server-Timing carries the db phase
+    with timing_phase("db"):
+        first = next(chunks, None)
+    if first is not None:
+        chunks = itertools.chain([first], chunks)
+    # Sync generator: Starlette drains it in the threadpool, off the event loop
+    return StreamingResponse(
+        iter_export(format, chunks, full=full),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="predictions.{format}"'},
+    )
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    from fastapi.responses import Response
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,205 @@
+"""
+In-process metrics exposed in the Prometheus text format at /metrics.
+
+Kept dependency-free and cheap: an observation is one lock, one bisect and a
+couple of additions, so it can stay on in production.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from backend.profiling import phase as timing_phase
+
+# Upstream calls range from ~50ms (yfinance) to 10s+ (Gemini under load)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [non-cumulative bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels[name]) for name in self.labelnames))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for key, (bucket_counts, total, count) in items:
+            cumulative = 0
+            labels = _format_labels(self.labelnames, key)
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "gold_http_request_duration_seconds", "Latency of API requests by route.", ("method", "route", "status")
+))
+UPSTREAM_DURATION = REGISTRY.register(Histogram(
+    "gold_upstream_request_duration_seconds", "Latency of calls to upstream dependencies.", ("upstream", "operation")
+))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "gold_upstream_errors_total", "Upstream calls that raised.", ("upstream", "operation")
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "gold_cache_requests_total", "Cache lookups; hit ratio = hit / (hit + miss).", ("cache", "result")
+))
+FALLBACKS = REGISTRY.register(Counter(
+    "gold_fallbacks_total", "Times a degraded fallback answer was served.", ("kind",)
+))
+PROVIDER_EVENTS = REGISTRY.register(Counter(
+    "gold_provider_events_total", "Quote provider circuit-breaker and hedging events.", ("provider", "event")
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "gold_llm_tokens_total", "LLM tokens by call site; kind is input, cached (part of input) or output.", ("operation", "kind")
+))
+
+
+@contextmanager
+def track_upstream(upstream: str, operation: str = "call", phase: Optional[str] = None) -> Iterator[None]:
+    """
+    Times an upstream call; exceptions are counted and re-raised. When `phase`
+    is given the duration also counts towards that Server-Timing phase.
+    """
+    start = time.perf_counter()
+    try:
+        with timing_phase(phase) if phase else nullcontext():
+            yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(upstream=upstream, operation=operation)
+        raise
+    finally:
+        UPSTREAM_DURATION.observe(time.perf_counter() - start, upstream=upstream, operation=operation)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_fallback(kind: str):
+    FALLBACKS.inc(kind=kind)
+
+
+def record_provider_event(provider: str, event: str):
+    PROVIDER_EVENTS.inc(provider=provider, event=event)
+
+
+def record_llm_tokens(operation: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0):
+    LLM_TOKENS.inc(input_tokens, operation=operation, kind="input")
+    LLM_TOKENS.inc(output_tokens, operation=operation, kind="output")
+    if cached_tokens:
+        LLM_TOKENS.inc(cached_tokens, operation=operation, kind="cached")
+
+
+class MetricsMiddleware:
+    """Records per-route latency; routes are labelled by template, not raw path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status["code"],
+            )
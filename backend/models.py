@@ -35,3 +35,4 @@ class AnalysisResponse(BaseModel):
     suggested_risk_tier: str
     final_action: str
     position_size: str
+    source: Optional[str] = None  # "llm", or "local_model" when Gemini missed the deadline or failed
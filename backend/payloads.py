@@ -0,0 +1,95 @@
+"""
+zstd compression for prediction payloads, with shared trained dictionaries.
+
+Each payload is a few KB of JSON with the same keys every time, which is the
+case a zstd dictionary is built for: trained once on recent payloads, it
+lets even a single small row compress several times better than zstd alone.
+Dictionaries are stored in the database next to the rows. Every frame
+carries its dictionary's ID, so rows written under an older dictionary
+still decode after a new one is trained.
+"""
+import threading
+from typing import Dict, List, Optional
+
+try:
+    import zstandard as zstd
+except ImportError:  # Payloads are stored as plain text without it
+    zstd = None
+
+MIN_TRAINING_SAMPLES = 100
+
+
+def available() -> bool:
+    return zstd is not None
+
+
+def train_dictionary(samples: List[bytes], size: int = 16 * 1024) -> bytes:
+    """Trains a dictionary on sample payloads; returns its serialized form."""
+    if len(samples) < MIN_TRAINING_SAMPLES:
+        raise ValueError(f"need at least {MIN_TRAINING_SAMPLES} samples, got {len(samples)}")
+    return zstd.train_dictionary(size, samples).as_bytes()
+
+
+def dictionary_id(data: bytes) -> int:
+    return zstd.ZstdCompressionDict(data).dict_id()
+
+
+class PayloadCodec:
+    """
+    Encodes with the newest dictionary (or none until one is trained) and
+    decodes with whichever dictionary a frame names. zstd contexts are not
+    thread-safe, so each thread keeps its own.
+    """
+
+    def __init__(self, level: int = 9):
+        self.level = level
+        self._dictionaries: Dict[int, "zstd.ZstdCompressionDict"] = {}
+        self.current_id = 0
+        self._local = threading.local()
+
+    def __contains__(self, dict_id: int) -> bool:
+        return dict_id == 0 or dict_id in self._dictionaries
+
+    def add_dictionary(self, data: bytes, current: bool = True) -> int:
+        dictionary = zstd.ZstdCompressionDict(data)
+        dictionary.precompute_compress(level=self.level)
+        dict_id = dictionary.dict_id()
+        self._dictionaries[dict_id] = dictionary
+        if current:
+            self.current_id = dict_id
+        return dict_id
+
+    def _contexts(self) -> Dict:
+        contexts = getattr(self._local, "contexts", None)
+        if contexts is None:
+            contexts = self._local.contexts = {}
+        return contexts
+
+    def _compressor(self) -> "zstd.ZstdCompressor":
+        key = ("c", self.current_id)
+        contexts = self._contexts()
+        if key not in contexts:
+            dictionary = self._dictionaries.get(self.current_id)
+            contexts[key] = zstd.ZstdCompressor(level=self.level, dict_data=dictionary)
+        return contexts[key]
+
+    def _decompressor(self, dict_id: int) -> "zstd.ZstdDecompressor":
+        key = ("d", dict_id)
+        contexts = self._contexts()
+        if key not in contexts:
+            if dict_id not in self:
+                raise KeyError(f"zstd dictionary {dict_id} is not loaded")
+            contexts[key] = zstd.ZstdDecompressor(dict_data=self._dictionaries.get(dict_id))
+        return contexts[key]
+
+    def encode(self, text: Optional[str]) -> Optional[bytes]:
+        if text is None:
+            return None
+        return self._compressor().compress(text.encode())
+
+    def decode(self, blob: Optional[bytes]) -> Optional[str]:
+        """Raises KeyError if the frame's dictionary has not been added."""
+        if blob is None:
+            return None
+        dict_id = zstd.get_frame_parameters(blob).dict_id
+        return self._decompressor(dict_id).decompress(blob).decode()
@@ -0,0 +1,454 @@
+"""
+Predictions repository on SQLAlchemy Core, for both SQLite and Postgres.
+
+List views page by keyset on (timestamp_utc, id), so page N costs the same as
+page 1, and select only the summary columns; the JSON payloads are read only
+when a caller asks for full rows.
+
+Payloads are stored zstd-compressed (see backend.payloads) in `input_zst` /
+`output_zst`; rows written before that keep their text columns. Callers only
+ever see `input_json` / `model_output_json` as text. The fields evaluation
+needs (final_action, confidence) are plain columns next to them.
+"""
+import base64
+import json
+import math
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Column, Float, Index, Integer, LargeBinary, String, Table, Text, and_, bindparam, create_engine,
+    delete, insert, inspect, or_, select, text, update,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from backend import payloads
+from backend.database import Base
+
+predictions = Table(
+    "predictions",
+    Base.metadata,
+    Column("id", String, primary_key=True),
+    Column("timestamp_utc", String),
+    Column("gld_price", Float),
+    Column("xau_price", Float),
+    Column("input_json", Text),
+    Column("model_output_json", Text),
+    Column("horizon_1d_outcome", String),
+    Column("horizon_7d_outcome", String),
+    Column("horizon_30d_outcome", String),
+    # Copied out of model_output_json so scoring never has to decode payloads
+    Column("final_action", String),
+    Column("confidence", Float),
+    Column("input_zst", LargeBinary),
+    Column("output_zst", LargeBinary),
+)
+Index("ix_predictions_timestamp_id", predictions.c.timestamp_utc, predictions.c.id)
+
+payload_dictionaries = Table(
+    "payload_dictionaries",
+    Base.metadata,
+    Column("dict_id", Integer, primary_key=True, autoincrement=False),
+    Column("created_utc", String),
+    Column("data", LargeBinary),
+)
+
+# Keyset position up to which a background job has processed predictions
+watermarks = Table(
+    "prediction_watermarks",
+    Base.metadata,
+    Column("name", String, primary_key=True),
+    Column("timestamp_utc", String),
+    Column("id", String),
+    Column("updated_utc", String),
+)
+
+PAYLOAD_COLUMNS = ("input_json", "model_output_json")
+# Text column -> compressed column holding the same payload
+COMPRESSED_COLUMNS = {"input_json": "input_zst", "model_output_json": "output_zst"}
+ROW_COLUMNS = tuple(c.name for c in predictions.columns if c.name not in COMPRESSED_COLUMNS.values())
+SUMMARY_COLUMNS = tuple(name for name in ROW_COLUMNS if name not in PAYLOAD_COLUMNS)
+
+INSERT_CHUNK = 1000
+OUTCOMES = ("SUCCESS", "FAILURE", "PENDING", "EVALUATED")
+
+
+def encode_cursor(timestamp_utc: str, prediction_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp_utc}|{prediction_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    timestamp_utc, _, prediction_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+    return timestamp_utc, prediction_id
+
+
+def output_fields(model_output: Dict[str, Any]) -> Dict[str, Any]:
+    # The LLM's confidence is not always a number; a bad one is stored as NULL
+    try:
+        confidence = float(model_output.get("confidence"))
+    except (TypeError, ValueError):
+        confidence = None
+    return {
+        "final_action": model_output.get("final_action"),
+        "confidence": confidence if confidence is None or math.isfinite(confidence) else None,
+    }
+
+
+def new_prediction(gld_price, xau_price, input_data, model_output) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "timestamp_utc": datetime.utcnow().isoformat() + "Z",
+        "gld_price": gld_price,
+        "xau_price": xau_price,
+        "input_json": json.dumps(input_data),
+        "model_output_json": json.dumps(model_output),
+        **output_fields(model_output),
+    }
+
+
+def _after(key: Tuple[str, str]):
+    ts, pid = predictions.c.timestamp_utc, predictions.c.id
+    # The redundant lower bound lets SQLite range-scan the index in order
+    # instead of merging the two OR branches and sorting
+    return and_(ts >= key[0], or_(ts > key[0], pid > key[1]))
+
+
+def filter_rows(query, start: Optional[str] = None, end: Optional[str] = None, outcome: Optional[str] = None,
+                after: Optional[Tuple[str, str]] = None):
+    """Applies the [start, end) timestamp bounds, the 1d outcome filter and a keyset start."""
+    ts, outcome_column = predictions.c.timestamp_utc, predictions.c.horizon_1d_outcome
+    if after:
+        query = query.where(_after(after))
+    if start:
+        query = query.where(ts >= start)
+    if end:
+        query = query.where(ts < end)
+    if outcome == "PENDING":
+        query = query.where(outcome_column.is_(None))
+    elif outcome == "EVALUATED":
+        query = query.where(outcome_column.is_not(None))
+    elif outcome:
+        query = query.where(outcome_column == outcome)
+    return query
+
+
+class PredictionRepository:
+    def __init__(self, engine: Engine, compression_level: int = 9, dictionary_size: int = 16 * 1024):
+        self.engine = engine
+        self.compress = payloads.available()
+        self.dictionary_size = dictionary_size
+        self.codec = payloads.PayloadCodec(compression_level) if self.compress else None
+        self._dictionaries_loaded = False
+
+    def create_schema(self):
+        """Creates tables, the keyset index and any newer columns (safe on existing DBs)."""
+        Base.metadata.create_all(self.engine, tables=[predictions, payload_dictionaries, watermarks], checkfirst=True)
+        existing = {column["name"] for column in inspect(self.engine).get_columns("predictions")}
+        with self.engine.begin() as conn:
+            for column in predictions.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.execute(text(f"ALTER TABLE predictions ADD COLUMN {column.name} {column_type}"))
+        for index in predictions.indexes:
+            index.create(self.engine, checkfirst=True)
+        self._backfill_output_fields()
+
+    def _backfill_output_fields(self, chunk_size: int = 5000):
+        """Fills final_action/confidence on rows written before those columns existed."""
+        missing = predictions.c.final_action.is_(None) & (
+            predictions.c.model_output_json.is_not(None) | predictions.c.output_zst.is_not(None)
+        )
+        statement = update(predictions).where(predictions.c.id == bindparam("row_id")).values(
+            final_action=bindparam("action"), confidence=bindparam("score"),
+        )
+        last_id = ""
+        while True:
+            query = self._select(("id", "model_output_json")).where(missing, predictions.c.id > last_id)
+            with self.engine.connect() as conn:
+                result = conn.execute(query.order_by(predictions.c.id).limit(chunk_size))
+                keys = list(result.keys())
+                rows = [self._unpack(dict(zip(keys, row))) for row in result]
+            if not rows:
+                return
+            updates = []
+            for row in rows:
+                try:
+                    fields = output_fields(json.loads(row["model_output_json"]))
+                except (TypeError, ValueError, AttributeError):
+                    continue
+                updates.append({"row_id": row["id"], "action": fields["final_action"], "score": fields["confidence"]})
+            if updates:
+                with self.engine.begin() as conn:
+                    conn.execute(statement, updates)
+            last_id = rows[-1]["id"]
+
+    # --- Payload compression ---
+
+    def _load_dictionaries(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(payload_dictionaries).order_by(payload_dictionaries.c.created_utc)).all()
+        for row in rows:
+            if row.dict_id not in self.codec:
+                self.codec.add_dictionary(row.data)
+        self._dictionaries_loaded = True
+
+    def _pack(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        stored = dict(row)
+        if "final_action" not in stored and stored.get("model_output_json"):
+            stored.update(output_fields(json.loads(stored["model_output_json"])))
+        stored.setdefault("final_action", None)
+        stored.setdefault("confidence", None)
+        for name, compressed in COMPRESSED_COLUMNS.items():
+            stored.setdefault(compressed, None)
+            if self.compress and stored.get(name) is not None:
+                stored[compressed] = self.codec.encode(stored[name])
+                stored[name] = None
+            stored.setdefault(name, None)
+        return stored
+
+    def _unpack(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        for name, compressed in COMPRESSED_COLUMNS.items():
+            blob = row.pop(compressed, None)
+            if blob is not None:
+                row[name] = self._decode(blob)
+        return row
+
+    def _decode(self, blob: bytes) -> str:
+        if self.codec is None:
+            raise RuntimeError("zstandard is required to read compressed prediction payloads")
+        try:
+            return self.codec.decode(blob)
+        except KeyError:
+            # Written under a dictionary this process has not loaded yet
+            self._load_dictionaries()
+            return self.codec.decode(blob)
+
+    def train_dictionary(self, sample_rows: int = 2000) -> Optional[int]:
+        """
+        Trains a dictionary on the most recent payloads and makes it current
+        for new writes. Returns its ID, or None if there are too few rows yet.
+        """
+        if not self.compress:
+            return None
+        if not self._dictionaries_loaded:
+            self._load_dictionaries()
+        rows, _ = self.page(limit=sample_rows, full=True)
+        samples = [row[name].encode() for row in rows for name in PAYLOAD_COLUMNS if row.get(name)]
+        if len(samples) < payloads.MIN_TRAINING_SAMPLES:
+            return None
+        data = payloads.train_dictionary(samples, self.dictionary_size)
+        dict_id = payloads.dictionary_id(data)
+        if dict_id not in self.codec:
+            with self.engine.begin() as conn:
+                conn.execute(insert(payload_dictionaries), {
+                    "dict_id": dict_id, "created_utc": datetime.utcnow().isoformat() + "Z", "data": data,
+                })
+        self.codec.add_dictionary(data)
+        return dict_id
+
+    # --- Writes ---
+
+    def add(self, gld_price, xau_price, input_data, model_output) -> str:
+        row = new_prediction(gld_price, xau_price, input_data, model_output)
+        self.bulk_insert([row])
+        return row["id"]
+
+    def bulk_insert(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Inserts rows in executemany batches inside one transaction."""
+        if self.compress and not self._dictionaries_loaded:
+            self._load_dictionaries()
+        count = 0
+        batch: List[Dict[str, Any]] = []
+        with self.engine.begin() as conn:
+            for row in rows:
+                batch.append(self._pack(row))
+                if len(batch) >= INSERT_CHUNK:
+                    conn.execute(insert(predictions), batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                conn.execute(insert(predictions), batch)
+                count += len(batch)
+        return count
+
+    def set_outcomes(self, outcomes: Iterable[Tuple[str, str]], horizon: str = "1d",
+                     watermark: Optional[Tuple[str, str, str]] = None) -> int:
+        """
+        Writes (id, outcome) pairs for one horizon, leaving outcomes that are
+        already set alone, and returns how many rows changed. There are only
+        a couple of distinct outcomes, so ids are grouped per outcome into
+        IN-list updates instead of one statement per row.
+
+        `watermark` (name, timestamp_utc, id) is advanced in the same
+        transaction, so a crash never records one without the other.
+        """
+        by_outcome: Dict[str, List[str]] = {}
+        for prediction_id, outcome in outcomes:
+            by_outcome.setdefault(outcome, []).append(prediction_id)
+        column = predictions.c[f"horizon_{horizon}_outcome"]
+        count = 0
+        with self.engine.begin() as conn:
+            for outcome, ids in by_outcome.items():
+                for i in range(0, len(ids), INSERT_CHUNK):
+                    statement = update(predictions).where(predictions.c.id.in_(ids[i:i + INSERT_CHUNK]), column.is_(None))
+                    count += conn.execute(statement.values({column: outcome})).rowcount
+            if watermark is not None:
+                self._advance_watermark(conn, *watermark)
+        return count
+
+    def get_watermark(self, name: str) -> Optional[Tuple[str, str]]:
+        """The (timestamp_utc, id) processed so far, creating an empty watermark if needed."""
+        with self.engine.connect() as conn:
+            row = conn.execute(select(watermarks.c.timestamp_utc, watermarks.c.id).where(watermarks.c.name == name)).first()
+        if row is None:
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(watermarks).values(name=name, timestamp_utc="", id="", updated_utc=None))
+            except IntegrityError:
+                # A concurrent run created it first
+                return self.get_watermark(name)
+            return None
+        return (row.timestamp_utc, row.id) if row.timestamp_utc else None
+
+    def reset_watermark(self, name: str):
+        with self.engine.begin() as conn:
+            conn.execute(update(watermarks).where(watermarks.c.name == name).values(timestamp_utc="", id=""))
+
+    def _advance_watermark(self, conn: Connection, name: str, timestamp_utc: str, prediction_id: str):
+        """Moves the watermark forward only; a slower concurrent run cannot move it back."""
+        behind = or_(
+            watermarks.c.timestamp_utc < timestamp_utc,
+            and_(watermarks.c.timestamp_utc == timestamp_utc, watermarks.c.id < prediction_id),
+        )
+        conn.execute(update(watermarks).where(watermarks.c.name == name, behind).values(
+            timestamp_utc=timestamp_utc, id=prediction_id, updated_utc=datetime.utcnow().isoformat() + "Z",
+        ))
+
+    def delete_before(self, cutoff: str) -> int:
+        with self.engine.begin() as conn:
+            return conn.execute(delete(predictions).where(predictions.c.timestamp_utc < cutoff)).rowcount
+
+    # --- Reads ---
+
+    def _select(self, columns: Sequence[str]):
+        selected = []
+        for name in columns:
+            selected.append(predictions.c[name])
+            if name in COMPRESSED_COLUMNS:
+                selected.append(predictions.c[COMPRESSED_COLUMNS[name]])
+        return select(*selected)
+
+    def page(self, limit: int = 50, cursor: Optional[str] = None, full: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Newest-first page of predictions after `cursor`. Returns the rows and
+        the cursor for the next page (None on the last page).
+        """
+        ts, pid = predictions.c.timestamp_utc, predictions.c.id
+        query = self._select(ROW_COLUMNS if full else SUMMARY_COLUMNS).order_by(ts.desc(), pid.desc()).limit(limit + 1)
+        if cursor:
+            after_ts, after_id = decode_cursor(cursor)
+            # Expanded row-value comparison; both SQLite and Postgres use the index
+            query = query.where(or_(ts < after_ts, and_(ts == after_ts, pid < after_id)))
+
+        with self.engine.connect() as conn:
+            result = conn.execute(query)
+            keys = list(result.keys())
+            rows = [self._unpack(dict(zip(keys, row))) for row in result]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["timestamp_utc"], rows[-1]["id"])
+        return rows, next_cursor
+
+    def stream(self, start: Optional[str] = None, end: Optional[str] = None, outcome: Optional[str] = None,
+               chunk_size: int = 5000, full: bool = True, columns: Optional[Sequence[str]] = None,
+               columnar: bool = False) -> Iterator[Any]:
+        """
+        Oldest-first predictions in lists of up to `chunk_size` rows, read
+        through a server-side cursor so memory stays flat however large the
+        table is. `start`/`end` bound timestamp_utc as ISO strings, [start, end);
+        `outcome` filters the 1d outcome: PENDING means not yet evaluated,
+        EVALUATED any outcome. `columns` narrows the rows further than `full`.
+
+        With `columnar`, each chunk is a dict of column -> list of values
+        instead, skipping per-row dicts (scalar columns only).
+        """
+        if columns is None:
+            columns = ROW_COLUMNS if full else SUMMARY_COLUMNS
+        if columnar and any(name in COMPRESSED_COLUMNS for name in columns):
+            raise ValueError("columnar reads cannot include payload columns")
+        ts, pid = predictions.c.timestamp_utc, predictions.c.id
+        query = filter_rows(self._select(columns).order_by(ts, pid), start, end, outcome)
+
+        with self.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+            keys = list(result.keys())
+            for partition in result.partitions():
+                if columnar:
+                    yield {key: list(values) for key, values in zip(keys, zip(*partition))}
+                else:
+                    yield [self._unpack(dict(zip(keys, row))) for row in partition]
+
+    def batch_after(self, after: Optional[Tuple[str, str]], end: Optional[str], columns: Sequence[str],
+                    limit: int = 5000, pending: Optional[str] = None) -> Dict[str, List]:
+        """
+        The next `limit` rows past a keyset position, as columns, optionally
+        only those with no outcome yet for the `pending` horizon. Unlike
+        stream() the cursor is closed on return, so the caller can write
+        between batches (SQLite will not commit under an open reader).
+        """
+        ts, pid = predictions.c.timestamp_utc, predictions.c.id
+        query = filter_rows(select(*(predictions.c[name] for name in columns)), end=end, after=after)
+        if pending:
+            query = query.where(predictions.c[f"horizon_{pending}_outcome"].is_(None))
+        with self.engine.connect() as conn:
+            rows = conn.execute(query.order_by(ts, pid).limit(limit)).all()
+        return {name: list(values) for name, values in zip(columns, zip(*rows))} if rows else {name: [] for name in columns}
+
+    def get(self, prediction_id: str) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            row = conn.execute(self._select(ROW_COLUMNS).where(predictions.c.id == prediction_id)).first()
+        return self._unpack(dict(row._mapping)) if row else None
+
+
+# Where predictions live when DATABASE_URL is not set (the Streamlit app's file)
+DEFAULT_DB_PATH = "gold_analyst.db"
+
+_repositories: Dict[Optional[str], PredictionRepository] = {}
+_lock = threading.Lock()
+
+
+def get_repository(db_path: Optional[str] = None) -> PredictionRepository:
+    """
+    Repository on a SQLite file when `db_path` is given. Otherwise on the
+    shared backend engine when DATABASE_URL is set, else on DEFAULT_DB_PATH,
+    so the app, API, CLIs and evaluator all read and write the same table.
+    """
+    repository = _repositories.get(db_path)
+    if repository is None:
+        with _lock:
+            repository = _repositories.get(db_path)
+            if repository is None:
+                from backend.config import get_section
+                predictions_config = get_section("predictions")
+                if db_path is None and os.getenv("DATABASE_URL"):
+                    from backend.database import engine
+                else:
+                    path = db_path or DEFAULT_DB_PATH
+                    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+                repository = PredictionRepository(
+                    engine,
+                    compression_level=predictions_config.get("compression_level", 9),
+                    dictionary_size=predictions_config.get("dictionary_size_kb", 16) * 1024,
+                )
+                # Older databases (e.g. a committed gold_analyst.db) get the current schema on first use
+                try:
+                    repository.create_schema()
+                except Exception as e:
+                    print(f"Prediction schema check failed: {e}")
+                _repositories[db_path] = repository
+    return repository
@@ -0,0 +1,158 @@
+"""
+Per-request Server-Timing phases and an opt-in sampling profiler.
+
+Phases (fetch, scrape, parse, llm, db) are accumulated in a ContextVar, which
+follows the request into Starlette's threadpool and into asyncio tasks.
+Concurrent work inside one phase should be wrapped once around the gather,
+otherwise its durations add up beyond wall time.
+"""
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+PHASES = ("fetch", "scrape", "parse", "llm", "db")
+
+_current_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("server_timing_phases", default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Adds the block's duration to the current request's Server-Timing phase."""
+    phases = _current_phases.get()
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + (time.perf_counter() - start)
+
+
+def format_server_timing(phases: Dict[str, float], total: float) -> str:
+    entries = [f"{name};dur={phases[name] * 1000:.1f}" for name in PHASES if name in phases]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class StackSampler:
+    """
+    Samples every thread's call stack on an interval while a request runs.
+
+    Walks sys._current_frames() from a background thread, so it also sees
+    sync endpoints running in the threadpool. Writes folded stacks
+    ("frame;frame;frame count"), ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: StackCounter = StackCounter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = traceback.extract_stack(frame)
+                key = ";".join(f"{entry.name} ({os.path.basename(entry.filename)}:{entry.lineno})" for entry in stack)
+                self.samples[key] += 1
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ServerTimingMiddleware:
+    """
+    Emits a Server-Timing header for every response and, for a sampled
+    fraction of requests (or when the debug header carries `debug_token`),
+    writes a call-stack profile to `output_dir`.
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = 0.0,
+        debug_header: str = "x-debug-profile",
+        debug_token: Optional[str] = None,
+        output_dir: str = "profiles",
+        interval_ms: float = 5,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.debug_header = debug_header.lower()
+        self.debug_token = debug_token
+        self.output_dir = output_dir
+        self.interval = interval_ms / 1000.0
+
+    def _should_profile(self, headers: Headers) -> bool:
+        # The debug header only works once a token is configured; otherwise any
+        # client could start a sampler and write a file on every request
+        requested = headers.get(self.debug_header)
+        if requested is not None and self.debug_token and requested == self.debug_token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases: Dict[str, float] = {}
+        token = _current_phases.set(phases)
+        start = time.perf_counter()
+
+        sampler = None
+        if self._should_profile(Headers(scope=scope)):
+            sampler = StackSampler(self.interval)
+            sampler.start()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", format_server_timing(phases, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_phases.reset(token)
+            if sampler is not None:
+                # Joining the sampler thread and writing the file both block
+                await run_in_threadpool(self._finish_profile, scope, sampler)
+
+    def _finish_profile(self, scope, sampler: StackSampler):
+        sampler.stop()
+        self._save_profile(scope, sampler)
+
+    def _save_profile(self, scope, sampler: StackSampler):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            route = scope["path"].strip("/").replace("/", "_") or "root"
+            name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{route}-{uuid.uuid4().hex[:8]}.folded"
+            sampler.write(os.path.join(self.output_dir, name))
+        except Exception as e:
+            print(f"Profiler Error: {e}")
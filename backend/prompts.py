@@ -0,0 +1,146 @@
+"""
+Compact prompt encoding and token accounting for the analyst LLM calls.
+
+A prompt is split into a constant prefix (instructions, output schema,
+risk-tier config, key legend) that is built once per process and sent as
+the system instruction, and a small per-call part: the market data as
+minified JSON with abbreviated keys.
+
+Every call's token usage is read from the response (or estimated when the
+SDK does not report it) and recorded in gold_llm_tokens_total.
+"""
+import json
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from backend.metrics import record_llm_tokens
+
+# Long keys that repeat in every payload -> short forms; the legend is in the prefix
+KEY_ABBREVIATIONS = {
+    "timestamp_utc": "ts",
+    "assets": "a",
+    "symbol": "sym",
+    "price": "px",
+    "pct_change_24h": "chg24h_pct",
+    "open": "o",
+    "high": "h",
+    "low": "l",
+    "close": "c",
+    "price_oz_24k": "px_oz",
+    "daily_change_oz": "chg_oz",
+    "percent_change": "chg_pct",
+}
+FLOAT_DIGITS = 4
+
+ANALYST_INSTRUCTIONS = """You are an expert Gold Analyst AI giving ultra-minimal Buy/Hold/Sell recommendations for Gold.
+Tone: ultra-minimal, direct, professional. Output STRICT JSON only, no markdown or preamble, with this schema:
+{{"recommendation":"BUY|HOLD|SELL","confidence":<float 0-100>,"rationale_brief":"<one line, max 20 words>","rationale_technical":"<one short paragraph, max 80 words>","suggested_risk_tier":"{tiers}"}}
+Rules: 1. If confidence < 50, include a calibration sentence in the rationale. 2. Never promise returns. 3. Be deterministic based on the provided data.
+Analyze based on price action and technicals. Mapping thresholds: {thresholds}"""
+
+WORKFLOW_INSTRUCTIONS = """You are a senior commodities analyst specializing in Gold.
+You get the latest regional gold price data (GLD ETF / spot) and market news headlines.
+Provide a concise, professional and actionable analysis:
+1. Current Trend (Bullish/Bearish/Neutral)
+2. Key Drivers (from news)
+3. Recommendation (Buy/Sell/Hold) with confidence level."""
+
+
+def _compact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {KEY_ABBREVIATIONS.get(key, key): _compact(item) for key, item in value.items() if item is not None and item != {}}
+    if isinstance(value, (list, tuple)):
+        return [_compact(item) for item in value]
+    if isinstance(value, float):
+        return round(value, FLOAT_DIGITS)
+    return value
+
+
+def encode_payload(payload: Any) -> str:
+    """Minified JSON with abbreviated keys; empty and null fields are dropped."""
+    return json.dumps(_compact(payload), separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def key_legend() -> str:
+    return "Data keys: " + ", ".join(f"{short}={key}" for key, short in KEY_ABBREVIATIONS.items())
+
+
+@lru_cache(maxsize=8)
+def analyst_prefix(risk_tiers: Tuple[str, ...], thresholds: Tuple[Tuple[str, Any], ...]) -> str:
+    """The constant part of every analysis prompt; cached per config."""
+    instructions = ANALYST_INSTRUCTIONS.format(
+        tiers="|".join(risk_tiers) or "Conservative|Moderate|Aggressive",
+        thresholds=json.dumps(dict(thresholds), separators=(",", ":")),
+    )
+    return f"{instructions}\n{key_legend()}"
+
+
+@lru_cache(maxsize=1)
+def workflow_prefix() -> str:
+    return f"{WORKFLOW_INSTRUCTIONS}\n{key_legend()}"
+
+
+@dataclass(frozen=True)
+class AnalystPrompt:
+    system: str
+    user: str
+    payload: Dict[str, Any]
+
+
+def analyst_prompt(gld_data: Dict[str, Any], xau_data: Dict[str, Any], config: Dict[str, Any]) -> AnalystPrompt:
+    """The prefix (built once per config) plus the per-call market data."""
+    payload = {"timestamp_utc": gld_data.get("timestamp_utc"), "assets": {"GLD": gld_data, "XAU": xau_data}}
+    system = analyst_prefix(
+        tuple(config.get("risk_tiers", {}).keys()),
+        tuple(sorted(config.get("mapping_thresholds", {}).items())),
+    )
+    return AnalystPrompt(system=system, user=f"Market data: {encode_payload(payload)}", payload=payload)
+
+
+def format_headlines(news: Any) -> str:
+    if isinstance(news, list):
+        return "\n".join(f"- {item.get('title')} ({item.get('source')})" for item in news)
+    return str(news)
+
+
+# --- Token accounting ---
+
+def estimate_tokens(text: str) -> int:
+    """Rough count (~4 characters per token) for SDKs that don't report usage."""
+    return math.ceil(len(text) / 4)
+
+
+@dataclass
+class TokenUsage:
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int = 0
+    estimated: bool = False
+
+
+def usage_from_response(response: Any, prompt_text: str, output_text: Optional[str] = None) -> TokenUsage:
+    """
+    Reads usage from a google.generativeai response (usage_metadata with
+    *_token_count fields) or a LangChain message (usage_metadata dict).
+    """
+    metadata = getattr(response, "usage_metadata", None)
+    if isinstance(metadata, dict) and "input_tokens" in metadata:
+        details = metadata.get("input_token_details") or {}
+        return TokenUsage(metadata["input_tokens"], metadata.get("output_tokens", 0), details.get("cache_read") or 0)
+    if metadata is not None and getattr(metadata, "prompt_token_count", None) is not None:
+        return TokenUsage(
+            metadata.prompt_token_count,
+            getattr(metadata, "candidates_token_count", 0) or 0,
+            getattr(metadata, "cached_content_token_count", 0) or 0,
+        )
+    return TokenUsage(estimate_tokens(prompt_text), estimate_tokens(output_text or ""), estimated=True)
+
+
+def record_usage(operation: str, response: Any, prompt_text: str, output_text: Optional[str] = None) -> TokenUsage:
+    usage = usage_from_response(response, prompt_text, output_text)
+    record_llm_tokens(operation, usage.input_tokens, usage.output_tokens, usage.cached_tokens)
+    suffix = " (estimated)" if usage.estimated else ""
+    print(f"LLM tokens [{operation}]: input={usage.input_tokens} cached={usage.cached_tokens} output={usage.output_tokens}{suffix}")
+    return usage
@@ -0,0 +1,305 @@
+"""
+Fast JSON responses, pre-serialized snapshot caching and negotiated compression.
+
+The frontend polls /price, /news and /market-mood from every open tab, so the
+same payload gets serialized and compressed over and over. Snapshots keep the
+serialized body (and each compressed variant, built on first use) so a cache
+hit only costs a dict lookup.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from backend.metrics import record_cache
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, stdlib json is the fallback
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip is always available
+    brotli = None
+
+
+def _default(obj: Any) -> Any:
+    # numpy / pandas scalars (yfinance hands these back) expose .item()
+    if hasattr(obj, "item"):
+        return obj.item()
+    return str(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Serializes to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """One server-sent event with a JSON payload."""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+class FastJSONResponse(JSONResponse):
+    """Drop-in JSONResponse that renders with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# --- Compression ---
+
+# Below this size the compression overhead outweighs the bytes saved
+MINIMUM_SIZE = 500
+
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/csv", "application/x-ndjson")
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Picks br or gzip from an Accept-Encoding header, honouring q=0."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    return body
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    return content_type.split(";")[0].strip().lower() in COMPRESSIBLE_TYPES
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that gzip/brotli-compresses single-chunk responses.
+
+    Responses that already carry a Content-Encoding (pre-compressed snapshots),
+    streaming responses and small bodies are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        pending_start = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal pending_start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                # Hold the headers back until we know whether the body gets compressed
+                pending_start = message
+                return
+
+            if message["type"] != "http.response.body" or pending_start is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=pending_start["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not is_compressible(headers.get("content-type"))
+            ):
+                passthrough = True
+                await send(pending_start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            passthrough = True
+            await send(pending_start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# --- Snapshots ---
+
+class Snapshot:
+    """An immutable serialized payload plus its lazily built compressed variants."""
+
+    __slots__ = ("content", "body", "digest", "created_at", "expires_at", "_encoded", "_lock")
+
+    def __init__(self, content: Any, ttl_seconds: float):
+        self.content = content
+        self.body = dumps(content)
+        self.digest = hashlib.blake2b(self.body, digest_size=8).hexdigest()
+        self.created_at = time.monotonic()
+        self.expires_at = self.created_at + ttl_seconds
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        cached = self._encoded.get(encoding)
+        if cached is None:
+            with self._lock:
+                cached = self._encoded.get(encoding)
+                if cached is None:
+                    cached = compress(self.body, encoding)
+                    self._encoded[encoding] = cached
+        return cached
+
+    def etag(self, encoding: Optional[str]) -> str:
+        """A strong validator per representation: each encoding gets its own suffix."""
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def to_response(self, request: Request) -> Response:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+        if len(self.body) < MINIMUM_SIZE:
+            encoding = None
+        etag = self.etag(encoding)
+        max_age = max(0, int(self.expires_at - time.monotonic()))
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={max_age}",
+            "Vary": "Accept-Encoding",
+        }
+        # If-None-Match compares weakly and may list several tags
+        candidates = request.headers.get("if-none-match", "")
+        if any(tag.strip().removeprefix("W/") in (etag, "*") for tag in candidates.split(",")):
+            return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.encoded(encoding), media_type="application/json", headers=headers)
+
+
+class SnapshotCache:
+    """Thread-safe TTL cache of Snapshots keyed by endpoint (and arguments)."""
+
+    def __init__(self, ttl_seconds: float = 30):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._async_build_locks: Dict[str, asyncio.Lock] = {}
+
+    def get(self, key: str, label: Optional[str] = None) -> Optional[Snapshot]:
+        """`label` names the hit/miss metric when the key carries request arguments."""
+        snapshot = self._entries.get(key)
+        hit = snapshot is not None and snapshot.fresh
+        record_cache(f"snapshot:{label or key}", hit)
+        return snapshot if hit else None
+
+    def put(self, key: str, content: Any, ttl_seconds: Optional[float] = None) -> Snapshot:
+        snapshot = Snapshot(content, self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._entries[key] = snapshot
+        return snapshot
+
+    def get_or_build(
+        self,
+        key: str,
+        builder: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = lambda content: True,
+        label: Optional[str] = None,
+    ) -> Snapshot:
+        """
+        Returns the cached snapshot or builds it once, even if many threadpool
+        workers miss at the same time. Content rejected by `cacheable` is
+        serialized for this request only.
+        """
+        snapshot = self.get(key, label)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            # Re-check without counting: another worker may have just built it
+            snapshot = self._entries.get(key)
+            if snapshot is not None and snapshot.fresh:
+                return snapshot
+            content = builder()
+            if not cacheable(content):
+                return Snapshot(content, 0)
+            return self.put(key, content)
+
+    async def aget_or_build(
+        self,
+        key: str,
+        builder: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda content: True,
+        ttl_seconds: Optional[float] = None,
+        label: Optional[str] = None,
+    ) -> Snapshot:
+        """get_or_build for coroutine builders; concurrent misses await one build."""
+        snapshot = self.get(key, label)
+        if snapshot is not None:
+            return snapshot
+
+        build_lock = self._async_build_locks.setdefault(key, asyncio.Lock())
+        async with build_lock:
+            snapshot = self._entries.get(key)
+            if snapshot is not None and snapshot.fresh:
+                return snapshot
+            content = await builder()
+            if not cacheable(content):
+                return Snapshot(content, 0)
+            return self.put(key, content, ttl_seconds)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
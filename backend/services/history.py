@@ -0,0 +1,205 @@
+"""
+Price history for charts: fetch, resample to OHLC bars, optionally downsample.
+
+Bars are kept as parallel NumPy arrays end to end (no DataFrame on the API
+path). Downsampling uses Largest-Triangle-Three-Buckets, which keeps the
+visual shape of a line (peaks, troughs) at a fraction of the points.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.metrics import track_upstream
+
+# Ranges Yahoo's chart API accepts, and the intervals we resample to
+RANGES = ("1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "max")
+INTERVALS = ("auto", "1h", "1d", "1wk", "1mo")
+
+# Raw bar size fetched upstream for each output interval
+_RAW_INTERVAL = {"1h": "60m", "1d": "1d", "1wk": "1d", "1mo": "1d"}
+_BUCKET_SECONDS = {"1h": 3600, "1d": 86400}
+
+
+@dataclass
+class Bars:
+    """OHLCV bars as parallel arrays; `t` is the bar open in epoch seconds (UTC)."""
+    t: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self):
+        return len(self.t)
+
+    def take(self, index: np.ndarray) -> "Bars":
+        return Bars(self.t[index], self.open[index], self.high[index], self.low[index], self.close[index], self.volume[index])
+
+    def to_dict(self) -> Dict[str, List]:
+        """Columnar JSON: about a third of the bytes of a list of bar objects."""
+        return {
+            "t": self.t.tolist(),
+            "open": np.round(self.open, 2).tolist(),
+            "high": np.round(self.high, 2).tolist(),
+            "low": np.round(self.low, 2).tolist(),
+            "close": np.round(self.close, 2).tolist(),
+            "volume": self.volume.tolist(),
+        }
+
+
+def bars_from_chart(payload: Dict) -> Bars:
+    """Parses a Yahoo v8 chart response, dropping bars with no close."""
+    result = payload["chart"]["result"][0]
+    quote = result["indicators"]["quote"][0]
+    t = np.asarray(result.get("timestamp") or [], dtype=np.int64)
+
+    def column(name):
+        return np.asarray([np.nan if v is None else v for v in quote.get(name) or []], dtype=np.float64)
+
+    close = column("close")
+    keep = ~np.isnan(close)
+    return Bars(
+        t=t[keep],
+        open=column("open")[keep],
+        high=column("high")[keep],
+        low=column("low")[keep],
+        close=close[keep],
+        volume=np.nan_to_num(column("volume")[keep]).astype(np.int64),
+    )
+
+
+def bars_from_frame(frame) -> Bars:
+    """Bars from a yfinance history DataFrame."""
+    index = frame.index.tz_convert("UTC") if frame.index.tz is not None else frame.index
+    return Bars(
+        t=(index.asi8 // 10**9).astype(np.int64),
+        open=frame["Open"].to_numpy(dtype=np.float64),
+        high=frame["High"].to_numpy(dtype=np.float64),
+        low=frame["Low"].to_numpy(dtype=np.float64),
+        close=frame["Close"].to_numpy(dtype=np.float64),
+        volume=frame["Volume"].to_numpy(dtype=np.int64) if "Volume" in frame else np.zeros(len(frame), dtype=np.int64),
+    )
+
+
+def bucket_ids(t: np.ndarray, interval: str) -> np.ndarray:
+    if interval in _BUCKET_SECONDS:
+        return t // _BUCKET_SECONDS[interval]
+    days = t // 86400
+    if interval == "1wk":
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        return (days + 3) // 7
+    # 1mo: calendar months
+    months = days.astype("datetime64[D]").astype("datetime64[M]")
+    return months.astype(np.int64)
+
+
+def resample(bars: Bars, interval: str) -> Bars:
+    """Aggregates bars into `interval` buckets: first open, max high, min low, last close, summed volume."""
+    if len(bars) == 0:
+        return bars
+    ids = bucket_ids(bars.t, interval)
+    # Bars are time-ordered, so bucket boundaries are where the id changes
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)] - 1
+    return Bars(
+        t=bars.t[starts],
+        open=bars.open[starts],
+        high=np.maximum.reduceat(bars.high, starts),
+        low=np.minimum.reduceat(bars.low, starts),
+        close=bars.close[ends],
+        volume=np.add.reduceat(bars.volume, starts),
+    )
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that best
+    preserve the line's shape. First and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Interior points split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(bars: Bars, points: Optional[int]) -> Bars:
+    if not points or points >= len(bars):
+        return bars
+    return bars.take(lttb_indices(bars.t, bars.close, points))
+
+
+async def fetch_bars(symbol: str, range_: str, interval: str) -> Bars:
+    """Raw bars for a range, over the API's pooled client when it is running."""
+    from backend.services.market_data import get_market_data, parse_json
+
+    raw_interval = _RAW_INTERVAL[interval]
+    market_data = get_market_data()
+    provider = market_data.registry.get("yahoo")
+    if market_data.http_client is not None:
+        with track_upstream("yahoo_chart", "history"):
+            response = await market_data.http_client.get(
+                f"{provider.chart_base_url}/v8/finance/chart/{symbol}",
+                params={"range": range_, "interval": raw_interval},
+                headers={"User-Agent": "Mozilla/5.0"},
+            )
+            response.raise_for_status()
+        return bars_from_chart(parse_json(response.content))
+
+    def from_yfinance():
+        import yfinance as yf
+        with track_upstream("yfinance", "history"):
+            frame = yf.Ticker(symbol).history(period=range_, interval=raw_interval)
+        return bars_from_frame(frame)
+
+    return await asyncio.to_thread(from_yfinance)
+
+
+async def get_history(symbol: str, range_: str = "1y", interval: str = "1d", points: Optional[int] = None) -> Dict:
+    """
+    Daily and coarser intervals are read straight from the materialized
+    rollups; interval "auto" picks the coarsest one that still yields
+    `points` bars. Hourly bars are fetched and resampled on demand.
+    """
+    if interval == "1h":
+        bars = resample(await fetch_bars(symbol, range_, interval), interval)
+    else:
+        import time
+        from backend.services.rollups import RANGE_SECONDS, get_rollups
+
+        rollups = await get_rollups().ensure_daily(symbol)
+        span = RANGE_SECONDS[range_]
+        start = int(time.time()) - span if span else None
+        if interval == "auto":
+            interval = rollups.pick_level(start, None, points or 200)
+        bars = rollups.bars(interval, start)
+    raw_count = len(bars)
+    bars = downsample(bars, points)
+    return {
+        "symbol": symbol,
+        "range": range_,
+        "interval": interval,
+        "bars": raw_count,
+        "points": len(bars),
+        **bars.to_dict(),
+    }
@@ -0,0 +1,192 @@
+import os
+import json
+import re
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, Iterator, Tuple
+
+import google.generativeai as genai
+
+from backend.config import config, get_section
+from backend.local_model import get_local_model
+from backend.metrics import UPSTREAM_DURATION, track_upstream, record_fallback
+from backend.profiling import phase
+from backend.prompts import analyst_prompt, record_usage
+
+# Fields worth showing before the model finishes. A number only counts once
+# a delimiter follows it, so "8" is never reported on the way to "85".
+PARTIAL_FIELDS = {
+    "recommendation": (re.compile(r'"recommendation"\s*:\s*"(BUY|HOLD|SELL)"', re.IGNORECASE), str.upper),
+    "confidence": (re.compile(r'"confidence"\s*:\s*(-?\d+(?:\.\d+)?)\s*[,}\n]'), float),
+}
+
+
+def partial_fields(text: str) -> Dict[str, Any]:
+    """Fields from PARTIAL_FIELDS that can already be read from an incomplete JSON reply."""
+    found = {}
+    for name, (pattern, convert) in PARTIAL_FIELDS.items():
+        match = pattern.search(text)
+        if match:
+            found[name] = convert(match.group(1))
+    return found
+
+
+def _strip_fences(content: str) -> str:
+    content = content.strip()
+    if content.startswith("```json"): content = content[7:]
+    if content.endswith("```"): content = content[:-3]
+    return content.strip()
+
+
+# Gemini calls run here so /analyze can stop waiting at the deadline; a call
+# that overruns finishes in the background and its result is dropped
+_llm_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gemini")
+
+class GoldAnalystEngine:
+    def __init__(self):
+        self.api_key = os.getenv("GOOGLE_API_KEY")
+        self.model_name = "gemini-flash-latest"
+        # Constant instructions, schema and config; sent as the system instruction
+        self.prefix = analyst_prompt({}, {}, config).system
+        # Seconds /analyze waits for Gemini before answering from the local model
+        self.deadline_seconds = float(get_section("analysis").get("deadline_seconds", 4.0))
+        # Whole-stream limit for /analyze/stream; a stalled stream ends with the local model's result
+        self.stream_timeout_seconds = float(get_section("analysis").get("stream_timeout_seconds", 30.0))
+        
+        if self.api_key:
+            genai.configure(api_key=self.api_key)
+            self.model = genai.GenerativeModel(
+                model_name=self.model_name,
+                generation_config={"temperature": 0.0, "response_mime_type": "application/json"},
+                system_instruction=self.prefix,
+            )
+        else:
+            self.model = None
+        
+    def analyze(self, gld_data: Dict[str, Any], xau_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Gemini's analysis if it arrives within deadline_seconds, otherwise
+        (or on any error) the local model's, labelled by "source".
+        """
+        if not self.model:
+            return self._local_response(gld_data, xau_data, "Missing GOOGLE_API_KEY")
+
+        # Copy the context so the call's llm/parse time still lands in Server-Timing
+        future = _llm_pool.submit(contextvars.copy_context().run, self._analyze_llm, gld_data, xau_data)
+        try:
+            return future.result(timeout=self.deadline_seconds)
+        except FutureTimeout:
+            record_fallback("analysis_deadline")
+            return self._local_response(gld_data, xau_data, f"AI analyst exceeded {self.deadline_seconds:g}s")
+        except Exception as e:
+            return self._local_response(gld_data, xau_data, f"AI Error: {str(e)}")
+
+    def _analyze_llm(self, gld_data: Dict[str, Any], xau_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Only the market data changes per call
+        prompt = analyst_prompt(gld_data, xau_data, config)
+
+        with track_upstream("gemini", "analysis", phase="llm"):
+            # Bounded by the deadline, so a call we stopped waiting for frees its worker
+            response = self.model.generate_content(prompt.user, request_options={"timeout": self.deadline_seconds})
+        content = response.text.strip()
+        record_usage("analysis", response, self.prefix + prompt.user, content)
+
+        with phase("parse"):
+            output_json = json.loads(_strip_fences(content))
+
+        output_json["source"] = "llm"
+        return self._finalize(output_json)
+
+    def analyze_stream(self, gld_data: Dict[str, Any], xau_data: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streams the analysis as (event, data) pairs: "token" for each chunk of
+        model text, "fields" as soon as recommendation/confidence can be read
+        from the partial JSON, and finally "result" with the mapped output
+        (the local model's on any error, or once stream_timeout_seconds pass).
+        """
+        if not self.model:
+            yield "result", self._local_response(gld_data, xau_data, "Missing GOOGLE_API_KEY")
+            return
+
+        prompt = analyst_prompt(gld_data, xau_data, config)
+        text, sent = "", {}
+        start = time.perf_counter()
+        try:
+            with track_upstream("gemini", "analysis_stream"):
+                response = self.model.generate_content(
+                    prompt.user, stream=True, request_options={"timeout": self.stream_timeout_seconds},
+                )
+                for chunk in response:
+                    piece = chunk.text
+                    if not piece:
+                        continue
+                    if not text:
+                        UPSTREAM_DURATION.observe(time.perf_counter() - start, upstream="gemini", operation="analysis_first_token")
+                    text += piece
+                    yield "token", {"text": piece}
+                    fields = {name: value for name, value in partial_fields(text).items() if name not in sent}
+                    if fields:
+                        sent.update(fields)
+                        yield "fields", fields
+            record_usage("analysis", response, self.prefix + prompt.user, text)
+            output_json = self._finalize({**json.loads(_strip_fences(text)), "source": "llm"})
+        except Exception as e:
+            if time.perf_counter() - start >= self.stream_timeout_seconds:
+                record_fallback("analysis_deadline")
+                reason = f"AI analyst stream exceeded {self.stream_timeout_seconds:g}s"
+            else:
+                reason = f"AI Error: {str(e)}"
+            output_json = self._local_response(gld_data, xau_data, reason)
+        yield "result", output_json
+
+    def _finalize(self, output_json: Dict[str, Any]) -> Dict[str, Any]:
+        """Applies the deterministic action mapping and position size."""
+        output_json["final_action"] = self._map_recommendation(output_json)
+        output_json["position_size"] = self._get_position_size(output_json.get("suggested_risk_tier"))
+        return output_json
+
+    def _map_recommendation(self, output_json):
+        rec = output_json.get("recommendation", "HOLD").upper()
+        conf = float(output_json.get("confidence", 0))
+        thresholds = config.get("mapping_thresholds", {"confidence_buy": 60, "confidence_sell": 60})
+        if rec == "BUY" and conf >= thresholds["confidence_buy"]: return "BUY"
+        elif rec == "SELL" and conf >= thresholds["confidence_sell"]: return "SELL"
+        else: return "HOLD"
+
+    def _get_position_size(self, tier):
+        return config.get("risk_tiers", {}).get(tier, "0.0%")
+
+    def _local_response(self, gld_data, xau_data, reason):
+        """The local model's analysis, mapped like the LLM's; the mock only if that fails too."""
+        print(f"Analysis from local model: {reason}")
+        try:
+            output_json = self._finalize(get_local_model().analyze(gld_data, xau_data))
+        except Exception as e:
+            return self._mock_response(f"{reason}; local model error: {e}")
+        record_fallback("analysis_local_model")
+        return output_json
+
+    def _mock_response(self, error_msg):
+        record_fallback("analysis_mock")
+        return {
+            "recommendation": "HOLD",
+            "confidence": 0,
+            "rationale_brief": error_msg,
+            "rationale_technical": "System error.",
+            "suggested_risk_tier": "Conservative",
+            "final_action": "HOLD",
+            "position_size": "0.0%",
+            "source": "mock"
+        }
+
+
+_engine = None
+
+
+def get_engine() -> GoldAnalystEngine:
+    """One engine per process, so the model and its prompt prefix are set up once."""
+    global _engine
+    if _engine is None:
+        _engine = GoldAnalystEngine()
+    return _engine
@@ -0,0 +1,663 @@
+"""
+One market-data layer for the API, the Streamlit dashboard and the CLI graph.
+
+Providers implement a common `get_quote(symbol) -> Quote` interface and are
+registered by name. Ordered fallback chains (config.yaml `providers.chains`)
+decide which providers answer for a logical instrument. MarketDataService
+caches chain results for `providers.cache_ttl_seconds` and assembles the
+normalized MarketSnapshot that every entry point renders from.
+
+Each provider sits behind a circuit breaker: after `failure_threshold`
+consecutive errors it is skipped for `cooldown_seconds`, then a single trial
+call decides whether it closes again. With hedging enabled, if a provider
+has not answered within its own recent p95 latency, the next provider in the
+chain is started as well and the first quote to arrive wins. Last-resort
+providers (web_search, static; or any entry with `hedge: false`) are never
+started as a hedge, only once everything before them has failed. A provider
+that answers with no quote counts as failed.
+
+The API resolves chains on its event loop (`aget_snapshot`): providers with
+an `aget_quote` coroutine share the app's pooled httpx.AsyncClient, and the
+Yahoo one reads the v8 chart JSON directly instead of building a yfinance
+DataFrame. Synchronous callers (dashboard, CLI graph) keep the threaded path.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, stdlib json is the fallback
+    orjson = None
+
+from backend.config import get_section
+from backend.metrics import track_upstream, record_fallback, record_cache, record_provider_event
+from backend.profiling import phase as timing_phase
+from backend.services.providers import DEFAULT_RATE_AED, DEFAULT_RATE_EGP, build_price_payload
+
+# Used when a chain has no config entry
+DEFAULT_CHAINS = {
+    # Futures first: the price payload needs OHLC for the daily change
+    "gold_spot": [
+        {"provider": "yahoo", "symbol": "GC=F", "label": "Live Futures (GC=F)"},
+        {"provider": "web_search"},
+    ],
+    # XAU spot for the dashboard's AI input; Metals-API has no OHLC
+    "xau": [
+        {"provider": "metals_api", "symbol": "XAU"},
+        {"provider": "yahoo", "symbol": "GC=F", "label": "Live Futures (GC=F)"},
+    ],
+    "gld": [{"provider": "yahoo", "symbol": "GLD"}],
+    "usd_egp": [{"provider": "yahoo", "symbol": "EGP=X"}, {"provider": "static", "price": DEFAULT_RATE_EGP}],
+    "usd_aed": [{"provider": "yahoo", "symbol": "AED=X"}, {"provider": "static", "price": DEFAULT_RATE_AED}],
+}
+
+# One pooled, keep-alive session for every plain-HTTP provider.
+# yfinance keeps its own process-wide session internally.
+_session_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+
+
+def shared_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=32)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+
+def parse_json(body: bytes) -> Any:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+@dataclass(slots=True)
+class Quote:
+    """A normalized quote, whichever provider produced it."""
+    symbol: str
+    price: float
+    source: str
+    provider: str
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    prev_close: Optional[float] = None
+    timestamp_utc: str = field(default_factory=_utc_now_iso)
+
+    @property
+    def change_from_open(self) -> float:
+        return self.price - self.open if self.open else 0.0
+
+    @property
+    def pct_change_from_open(self) -> float:
+        return (self.change_from_open / self.open) * 100 if self.open else 0.0
+
+    @property
+    def pct_change_24h(self) -> float:
+        return ((self.price - self.prev_close) / self.prev_close) * 100 if self.prev_close else 0.0
+
+    def to_dict(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """The dict shape src.data_provider has always returned."""
+        ohlc = {}
+        if self.open is not None:
+            ohlc = {"open": self.open, "high": self.high, "low": self.low, "close": self.price}
+        return {
+            "symbol": symbol or self.symbol,
+            "price": self.price,
+            "timestamp_utc": self.timestamp_utc,
+            "pct_change_24h": round(self.pct_change_24h, 2),
+            "ohlc": ohlc,
+        }
+
+
+# --- Providers ---
+
+class QuoteProvider:
+    name = "base"
+    # False for last resorts: they only run once earlier entries have failed
+    hedge = True
+
+    def get_quote(self, symbol: str, label: Optional[str] = None) -> Optional[Quote]:
+        """Returns a Quote, or None if this provider cannot answer right now."""
+        raise NotImplementedError
+
+
+def quote_from_chart(payload: bytes, symbol: str, label: Optional[str] = None) -> Optional[Quote]:
+    """
+    Reads the last two daily bars out of a Yahoo v8 chart response. Only the
+    OHLC arrays are touched; no DataFrame is built.
+    """
+    result = (parse_json(payload).get("chart") or {}).get("result")
+    if not result:
+        return None
+    bars = result[0]["indicators"]["quote"][0]
+    closes = bars.get("close") or []
+    # The current session's bar can be all nulls right after the open
+    rows = [i for i, close in enumerate(closes) if close is not None]
+    if not rows:
+        return None
+    last = rows[-1]
+    prev = rows[-2] if len(rows) > 1 else last
+    return Quote(
+        symbol=symbol,
+        price=float(closes[last]),
+        open=float(bars["open"][last]),
+        high=float(bars["high"][last]),
+        low=float(bars["low"][last]),
+        prev_close=float(closes[prev]),
+        source=label or f"Yahoo Finance ({symbol})",
+        provider=YahooQuoteProvider.name,
+    )
+
+
+class YahooQuoteProvider(QuoteProvider):
+    """Daily bars; 5d covers weekends and gives the previous close."""
+    name = "yahoo"
+
+    def __init__(self, period: str = "5d", timeout: float = 5.0, chart_base_url: str = "https://query1.finance.yahoo.com", yf_module=None):
+        self.period = period
+        self.timeout = timeout
+        self.chart_base_url = chart_base_url.rstrip("/")
+        self.yf = yf_module
+
+    async def aget_quote(self, client, symbol, label=None):
+        with track_upstream("yahoo_chart", "chart"):
+            response = await client.get(
+                f"{self.chart_base_url}/v8/finance/chart/{symbol}",
+                params={"range": self.period, "interval": "1d"},
+                headers={"User-Agent": "Mozilla/5.0"},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+        return quote_from_chart(response.content, symbol, label)
+
+    def get_quote(self, symbol, label=None):
+        yf = self.yf
+        if yf is None:
+            import yfinance as yf
+
+        with track_upstream("yfinance", "history"):
+            # raise_errors so outages reach the circuit breaker instead of
+            # looking like an empty (closed-market) frame
+            data = yf.Ticker(symbol).history(period=self.period, timeout=self.timeout, raise_errors=True)
+        if data.empty:
+            return None
+
+        latest = data.iloc[-1]
+        prev = data.iloc[-2] if len(data) > 1 else latest
+        return Quote(
+            symbol=symbol,
+            price=float(latest["Close"]),
+            open=float(latest["Open"]),
+            high=float(latest["High"]),
+            low=float(latest["Low"]),
+            prev_close=float(prev["Close"]),
+            source=label or f"Yahoo Finance ({symbol})",
+            provider=self.name,
+        )
+
+
+class MetalsApiQuoteProvider(QuoteProvider):
+    name = "metals_api"
+
+    def __init__(self, base_url: str = "https://metals-api.com/api", timeout: float = 5.0):
+        self.api_key = os.getenv("METALS_API_KEY")
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def get_quote(self, symbol, label=None):
+        if not self.api_key:
+            return None
+        with track_upstream("metals_api", "latest"):
+            response = shared_session().get(
+                f"{self.base_url}/latest",
+                params={"access_key": self.api_key, "base": symbol, "currencies": "USD"},
+                timeout=self.timeout,
+            )
+            data = response.json()
+        return self._to_quote(data, symbol, label)
+
+    async def aget_quote(self, client, symbol, label=None):
+        if not self.api_key:
+            return None
+        with track_upstream("metals_api", "latest"):
+            response = await client.get(
+                f"{self.base_url}/latest",
+                params={"access_key": self.api_key, "base": symbol, "currencies": "USD"},
+                timeout=self.timeout,
+            )
+        return self._to_quote(parse_json(response.content), symbol, label)
+
+    def _to_quote(self, data: Dict, symbol: str, label: Optional[str]) -> Optional[Quote]:
+        if not data.get("success"):
+            return None
+        # Metals-API's latest endpoint has no OHLC or change on the free plan
+        return Quote(symbol=f"{symbol}USD", price=float(data["rates"]["USD"]), source=label or "Metals-API", provider=self.name)
+
+
+class WebSearchQuoteProvider(QuoteProvider):
+    """Last resort: regex a $-price out of DuckDuckGo search snippets."""
+    name = "web_search"
+    hedge = False
+
+    def __init__(self, query: str = "live gold price per ounce usd today"):
+        self.query = query
+
+    def get_quote(self, symbol=None, label=None):
+        from duckduckgo_search import DDGS
+
+        with track_upstream("ddg", "price_search"), DDGS() as ddgs:
+            results = " ".join(r.get("body", "") for r in ddgs.text(self.query, max_results=5))
+        match = re.search(r'\$\s?([0-9,]+\.[0-9]{2})', results)
+        if not match:
+            return None
+        return Quote(symbol=symbol or "XAUUSD", price=float(match.group(1).replace(",", "")), source=label or "Web Search", provider=self.name)
+
+
+class StaticQuoteProvider(QuoteProvider):
+    """A configured constant, e.g. a pegged or last-known FX rate."""
+    name = "static"
+    hedge = False
+
+    def get_quote(self, symbol=None, label=None, price: Optional[float] = None):
+        if price is None:
+            return None
+        return Quote(symbol=symbol or "", price=float(price), source=label or "Default", provider=self.name)
+
+
+class ProviderRegistry:
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], QuoteProvider]] = {}
+        self._instances: Dict[str, QuoteProvider] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], QuoteProvider]):
+        self._factories[name] = factory
+        self._instances.pop(name, None)
+
+    def get(self, name: str) -> QuoteProvider:
+        provider = self._instances.get(name)
+        if provider is None:
+            with self._lock:
+                provider = self._instances.get(name)
+                if provider is None:
+                    if name not in self._factories:
+                        raise KeyError(f"Unknown quote provider: {name}")
+                    provider = self._factories[name]()
+                    self._instances[name] = provider
+        return provider
+
+
+def default_registry(providers_config: Dict) -> ProviderRegistry:
+    timeout = providers_config.get("timeout_seconds", 5)
+    registry = ProviderRegistry()
+    registry.register("yahoo", lambda: YahooQuoteProvider(
+        timeout=timeout,
+        chart_base_url=providers_config.get("yahoo_chart_base_url", "https://query1.finance.yahoo.com"),
+    ))
+    registry.register("metals_api", lambda: MetalsApiQuoteProvider(
+        base_url=providers_config.get("metals_api_base_url", "https://metals-api.com/api"),
+        timeout=timeout,
+    ))
+    registry.register("web_search", WebSearchQuoteProvider)
+    registry.register("static", StaticQuoteProvider)
+    return registry
+
+
+# --- Resilience ---
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half_open after cooldown -> closed on success."""
+
+    def __init__(self, failure_threshold: int = 3, cooldown_seconds: float = 60):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Returns True if this failure opened the breaker."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                opened = self.state != "open"
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                return opened
+            return False
+
+
+class LatencyTracker:
+    """Rolling window of a provider's call latencies, for hedge delays."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < 20:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# --- Snapshot ---
+
+@dataclass
+class MarketSnapshot:
+    gold: Optional[Quote]
+    usd_egp: Quote
+    usd_aed: Quote
+
+    @property
+    def source(self) -> str:
+        return self.gold.source if self.gold else "Data Unavailable"
+
+    def to_price_payload(self) -> Dict[str, Any]:
+        """The regional price payload served by /price and the dashboard grids."""
+        price = self.gold.price if self.gold else 0
+        return build_price_payload(
+            self.source,
+            price,
+            self.gold.change_from_open if self.gold else 0,
+            self.gold.pct_change_from_open if self.gold else 0,
+            self.usd_egp.price,
+            self.usd_aed.price,
+        )
+
+
+class MarketDataService:
+    def __init__(
+        self,
+        registry: ProviderRegistry,
+        chains: Dict[str, List[Dict]],
+        cache_ttl_seconds: float = 30,
+        breaker_config: Optional[Dict] = None,
+        hedging_config: Optional[Dict] = None,
+    ):
+        self.registry = registry
+        self.chains = {**DEFAULT_CHAINS, **(chains or {})}
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.breaker_config = breaker_config or {}
+        self.hedging = hedging_config or {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+        self._cache: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="market-data")
+        # Separate pool for provider calls: chains resolve on _pool and wait on
+        # these, and a hedge may leave a slow call running after we return.
+        self._calls = ThreadPoolExecutor(max_workers=16, thread_name_prefix="quote-call")
+        # Set by the API lifespan; async providers reuse its connection pool
+        self.http_client = None
+        self._background = set()
+
+    def breaker(self, provider_name: str) -> CircuitBreaker:
+        with self._lock:
+            if provider_name not in self.breakers:
+                self.breakers[provider_name] = CircuitBreaker(
+                    failure_threshold=self.breaker_config.get("failure_threshold", 3),
+                    cooldown_seconds=self.breaker_config.get("cooldown_seconds", 60),
+                )
+                self.latencies[provider_name] = LatencyTracker()
+            return self.breakers[provider_name]
+
+    def _call(self, entry: Dict) -> Optional[Quote]:
+        provider = self.registry.get(entry["provider"])
+        if entry["provider"] == "static":
+            return provider.get_quote(entry.get("symbol"), entry.get("label"), price=entry.get("price"))
+        return provider.get_quote(entry.get("symbol"), entry.get("label"))
+
+    def _attempt(self, chain_name: str, entry: Dict) -> Optional[Quote]:
+        start = time.perf_counter()
+        try:
+            quote = self._call(entry)
+        except Exception as e:
+            return self._settle(chain_name, entry, start, error=e)
+        return self._settle(chain_name, entry, start, quote=quote)
+
+    async def _aattempt(self, chain_name: str, entry: Dict) -> Optional[Quote]:
+        provider = self.registry.get(entry["provider"])
+        start = time.perf_counter()
+        try:
+            if self.http_client is not None and hasattr(provider, "aget_quote"):
+                quote = await provider.aget_quote(self.http_client, entry.get("symbol"), entry.get("label"))
+            else:
+                quote = await asyncio.to_thread(self._call, entry)
+        except Exception as e:
+            return self._settle(chain_name, entry, start, error=e)
+        return self._settle(chain_name, entry, start, quote=quote)
+
+    def _settle(self, chain_name: str, entry: Dict, start: float, quote: Optional[Quote] = None, error: Optional[Exception] = None) -> Optional[Quote]:
+        name = entry["provider"]
+        breaker = self.breaker(name)
+        if error is not None or quote is None:
+            # An empty answer (e.g. an empty yfinance frame) is a failure too,
+            # and its latency would only pull the hedge delay down
+            if error is not None:
+                print(f"{name} quote error ({chain_name}): {error}")
+            if breaker.record_failure():
+                record_provider_event(name, "breaker_opened")
+            return None
+        self.latencies[name].observe(time.perf_counter() - start)
+        breaker.record_success()
+        return quote
+
+    def hedge_delay(self, provider_name: str) -> Optional[float]:
+        """Seconds to wait on a provider before also starting the next one."""
+        if not self.hedging.get("enabled"):
+            return None
+        self.breaker(provider_name)
+        observed = self.latencies[provider_name].quantile(self.hedging.get("quantile", 0.95))
+        delay = observed if observed is not None else self.hedging.get("default_delay_ms", 1000) / 1000.0
+        low = self.hedging.get("min_delay_ms", 50) / 1000.0
+        high = self.hedging.get("max_delay_ms", 2000) / 1000.0
+        return min(max(delay, low), high)
+
+    def hedgeable(self, entry: Dict) -> bool:
+        """Whether a chain entry may be started while an earlier one is still running."""
+        return entry.get("hedge", getattr(self.registry.get(entry["provider"]), "hedge", True))
+
+    def _resolve(self, chain_name: str) -> Optional[Quote]:
+        entries = self.chains[chain_name]
+        pending = {}
+        next_index = 0
+
+        def launch(hedge: bool = False) -> bool:
+            nonlocal next_index
+            while next_index < len(entries):
+                position, entry = next_index, entries[next_index]
+                if hedge and not self.hedgeable(entry):
+                    return False
+                next_index += 1
+                if not self.breaker(entry["provider"]).allow():
+                    record_provider_event(entry["provider"], "skipped_open")
+                    continue
+                pending[self._calls.submit(self._attempt, chain_name, entry)] = position
+                return True
+            return False
+
+        # Provider calls run on worker threads, which don't see the request's
+        # Server-Timing context, so the wait is timed here as one fetch phase
+        with timing_phase("fetch"):
+            launch()
+            while pending:
+                slowest = entries[max(pending.values())]["provider"]
+                can_hedge = next_index < len(entries) and self.hedgeable(entries[next_index])
+                timeout = self.hedge_delay(slowest) if can_hedge else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    if launch(hedge=True):
+                        record_provider_event(slowest, "hedged")
+                    continue
+                for future in done:
+                    position = pending.pop(future)
+                    quote = future.result()
+                    if quote is not None:
+                        if position > 0:
+                            record_fallback(f"{chain_name}:{entries[position]['provider']}")
+                        return quote
+                if not pending:
+                    launch()
+        return None
+
+    async def _aresolve(self, chain_name: str) -> Optional[Quote]:
+        """_resolve on the event loop: same breaker, hedging and fallback order."""
+        entries = self.chains[chain_name]
+        pending = {}
+        next_index = 0
+
+        def launch(hedge: bool = False) -> bool:
+            nonlocal next_index
+            while next_index < len(entries):
+                position, entry = next_index, entries[next_index]
+                if hedge and not self.hedgeable(entry):
+                    return False
+                next_index += 1
+                if not self.breaker(entry["provider"]).allow():
+                    record_provider_event(entry["provider"], "skipped_open")
+                    continue
+                pending[asyncio.ensure_future(self._aattempt(chain_name, entry))] = position
+                return True
+            return False
+
+        launch()
+        while pending:
+            slowest = entries[max(pending.values())]["provider"]
+            can_hedge = next_index < len(entries) and self.hedgeable(entries[next_index])
+            timeout = self.hedge_delay(slowest) if can_hedge else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if launch(hedge=True):
+                    record_provider_event(slowest, "hedged")
+                continue
+            for task in done:
+                position = pending.pop(task)
+                quote = task.result()
+                if quote is not None:
+                    if position > 0:
+                        record_fallback(f"{chain_name}:{entries[position]['provider']}")
+                    # Hedged losers finish in the background and still feed breakers/p95
+                    for loser in pending:
+                        self._background.add(loser)
+                        loser.add_done_callback(self._background.discard)
+                    return quote
+            if not pending:
+                launch()
+        return None
+
+    def _cached(self, chain_name: str) -> Optional[Quote]:
+        cached = self._cache.get(chain_name)
+        if cached is not None and time.monotonic() - cached[1] < self.cache_ttl_seconds:
+            record_cache("quotes", hit=True)
+            return cached[0]
+        record_cache("quotes", hit=False)
+        return None
+
+    def _store(self, chain_name: str, quote: Optional[Quote]) -> Optional[Quote]:
+        if quote is not None:
+            with self._lock:
+                self._cache[chain_name] = (quote, time.monotonic())
+        return quote
+
+    def get_quote(self, chain_name: str) -> Optional[Quote]:
+        """Best available quote for a chain, cached for cache_ttl_seconds."""
+        return self._cached(chain_name) or self._store(chain_name, self._resolve(chain_name))
+
+    async def aget_quote(self, chain_name: str) -> Optional[Quote]:
+        return self._cached(chain_name) or self._store(chain_name, await self._aresolve(chain_name))
+
+    def get_symbol_quote(self, provider_name: str, symbol: str) -> Optional[Quote]:
+        """A single provider/symbol lookup, sharing the same cache."""
+        key = f"{provider_name}:{symbol}"
+        if key not in self.chains:
+            self.chains[key] = [{"provider": provider_name, "symbol": symbol}]
+        return self.get_quote(key)
+
+    def get_snapshot(self) -> MarketSnapshot:
+        # The three chains are independent; fetch them concurrently
+        with timing_phase("fetch"):
+            futures = {name: self._pool.submit(self.get_quote, name) for name in ("gold_spot", "usd_egp", "usd_aed")}
+            quotes = {name: future.result() for name, future in futures.items()}
+        return self.build_snapshot(quotes)
+
+    async def aget_snapshot(self) -> MarketSnapshot:
+        with timing_phase("fetch"):
+            gold, egp, aed = await asyncio.gather(*(self.aget_quote(name) for name in ("gold_spot", "usd_egp", "usd_aed")))
+        return self.build_snapshot({"gold_spot": gold, "usd_egp": egp, "usd_aed": aed})
+
+    def build_snapshot(self, quotes: Dict[str, Optional[Quote]]) -> MarketSnapshot:
+        """A snapshot from separately fetched chain quotes, with default FX rates for gaps."""
+        if quotes["gold_spot"] is None:
+            record_fallback("price_unavailable")
+        return MarketSnapshot(
+            gold=quotes["gold_spot"],
+            usd_egp=quotes["usd_egp"] or Quote("EGP=X", DEFAULT_RATE_EGP, "Default", "static"),
+            usd_aed=quotes["usd_aed"] or Quote("AED=X", DEFAULT_RATE_AED, "Default", "static"),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_service: Optional[MarketDataService] = None
+_service_lock = threading.Lock()
+
+
+def get_market_data() -> MarketDataService:
+    """The process-wide MarketDataService, built from config.yaml on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                providers_config = get_section("providers")
+                _service = MarketDataService(
+                    default_registry(providers_config),
+                    providers_config.get("chains") or {},
+                    cache_ttl_seconds=providers_config.get("cache_ttl_seconds", 30),
+                    breaker_config=providers_config.get("circuit_breaker"),
+                    hedging_config=providers_config.get("hedging"),
+                )
+    return _service
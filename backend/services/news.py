@@ -0,0 +1,22 @@
+from typing import List, Dict, Any
+
+from duckduckgo_search import DDGS
+
+from backend.metrics import track_upstream, record_fallback
+
+def fetch_market_news(query="Gold price analysis market news today") -> List[Dict[str, Any]]:
+    try:
+        news_list = []
+        with track_upstream("ddg", "news", phase="fetch"), DDGS() as ddgs:
+            ddgs_news = list(ddgs.news(keywords=query, max_results=5))
+            for item in ddgs_news:
+                news_list.append({
+                    "title": item.get("title"),
+                    "link": item.get("url"),
+                    "source": item.get("source"),
+                    "date": item.get("date")
+                })
+        return news_list
+    except Exception as e:
+        record_fallback("news_unavailable")
+        return [{"title": "News Unavailable", "source": "System", "link": "#", "error": str(e)}]
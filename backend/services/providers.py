@@ -0,0 +1,47 @@
+from typing import Dict, Any
+
+DEFAULT_RATE_EGP = 50.5
+DEFAULT_RATE_AED = 3.67
+
+def build_price_payload(source: str, current_price_oz, change_oz, percent_change, rate_egp, rate_aed) -> Dict[str, Any]:
+    price_gram_24k_usd = current_price_oz / 31.1034768
+    price_gram_18k_usd = price_gram_24k_usd * 0.75
+
+    return {
+        "asset": f"Gold ({source})",
+        "price_oz_24k": round(current_price_oz, 2),
+        "daily_change_oz": round(change_oz, 2),
+        "percent_change": f"{round(percent_change, 2)}%",
+        "rates": {"USD/EGP": round(rate_egp, 2), "USD/AED": round(rate_aed, 2)},
+        "usd": {
+            "Troy Ounce": round(current_price_oz, 2),
+            "24k": round(price_gram_24k_usd, 2),
+            "21k": round(price_gram_24k_usd * (21/24), 2),
+            "18k": round(price_gram_18k_usd, 2)
+        },
+        "egypt": {
+            "Troy Ounce": round(current_price_oz * rate_egp, 2),
+            "Gold Coin (8g 21k)": round(price_gram_24k_usd * rate_egp * (21/24) * 8, 2),
+            "24k": round(price_gram_24k_usd * rate_egp, 2),
+            "21k": round(price_gram_24k_usd * rate_egp * (21/24), 2),
+            "18k": round(price_gram_18k_usd * rate_egp, 2)
+        },
+        "uae": {
+            "Troy Ounce": round(current_price_oz * rate_aed, 2),
+            "24k": round(price_gram_24k_usd * rate_aed, 2),
+            "21k": round(price_gram_24k_usd * rate_aed * (21/24), 2),
+            "18k": round(price_gram_18k_usd * rate_aed, 2)
+        }
+    }
+
+def fetch_gold_price() -> Dict[str, Any]:
+    """Regional price payload from the configured gold_spot / FX fallback chains."""
+    from backend.services.market_data import get_market_data
+
+    return get_market_data().get_snapshot().to_price_payload()
+
+async def fetch_gold_price_async() -> Dict[str, Any]:
+    """fetch_gold_price for the event loop; no threadpool worker is held."""
+    from backend.services.market_data import get_market_data
+
+    return (await get_market_data().aget_snapshot()).to_price_payload()
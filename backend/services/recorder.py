@@ -0,0 +1,258 @@
+"""
+Intraday bar recorder backed by fixed-size, memory-mapped ring buffers.
+
+Each symbol gets one file: a small int64 header followed by `capacity` bar
+records. The writer appends minute bars in place and bumps the header count
+only after the record is written, so readers (other workers, the dashboard,
+notebooks) can map the same file read-only and get zero-copy NumPy views.
+Retention is just the capacity: the oldest minute is overwritten.
+
+Completed UTC days are compacted into a second, daily ring per symbol.
+"""
+import asyncio
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.metrics import track_upstream
+from backend.services.history import Bars, bars_from_chart, resample
+
+BAR_DTYPE = np.dtype([
+    ("t", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<i8"),
+])
+
+_MAGIC = 0x52414247  # "GBAR"
+_VERSION = 1
+# magic, version, capacity, count (total bars ever written)
+_HEADER = np.dtype("<i8")
+_HEADER_FIELDS = 4
+_HEADER_BYTES = 64
+
+
+class RingBuffer:
+    """A memory-mapped ring of BAR_DTYPE records, oldest overwritten first."""
+
+    def __init__(self, path: str, capacity: int, readonly: bool = False):
+        self.path = path
+        exists = os.path.exists(path)
+        if not exists:
+            if readonly:
+                raise FileNotFoundError(path)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "wb") as f:
+                f.truncate(_HEADER_BYTES + capacity * BAR_DTYPE.itemsize)
+
+        mode = "r" if readonly else "r+"
+        self._header = np.memmap(path, dtype=_HEADER, mode=mode, shape=(_HEADER_FIELDS,))
+        if exists:
+            if self._header[0] != _MAGIC:
+                raise ValueError(f"{path} is not a bar ring buffer")
+            capacity = int(self._header[2])
+        else:
+            self._header[:3] = (_MAGIC, _VERSION, capacity)
+            self._header.flush()
+        self.capacity = capacity
+        self._records = np.memmap(path, dtype=BAR_DTYPE, mode=mode, offset=_HEADER_BYTES, shape=(capacity,))
+
+    @property
+    def count(self) -> int:
+        """Bars ever written; min(count, capacity) are retained."""
+        return int(self._header[3])
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def last_t(self) -> Optional[int]:
+        if self.count == 0:
+            return None
+        return int(self._records[(self.count - 1) % self.capacity]["t"])
+
+    def extend(self, records: np.ndarray):
+        """Appends records (BAR_DTYPE, time-ordered). Single writer only."""
+        records = records[-self.capacity:]
+        start = self.count % self.capacity
+        first = min(len(records), self.capacity - start)
+        self._records[start:start + first] = records[:first]
+        self._records[:len(records) - first] = records[first:]
+        # Publish after the data is in place
+        self._header[3] = self.count + len(records)
+
+    def segments(self) -> List[np.ndarray]:
+        """Retained bars, oldest first, as one or two zero-copy views."""
+        count = self.count
+        if count <= self.capacity:
+            return [self._records[:count]]
+        split = count % self.capacity
+        return [self._records[split:], self._records[:split]]
+
+    def tail(self, n: int) -> np.ndarray:
+        """The newest n bars; a view unless they straddle the wrap point."""
+        segments = self.segments()
+        if len(segments[-1]) >= n or len(segments) == 1:
+            return segments[-1][-n:]
+        return np.concatenate([segments[0][-(n - len(segments[-1])):], segments[-1]])
+
+    def to_bars(self, since: Optional[int] = None) -> Bars:
+        data = np.concatenate(self.segments())
+        if since is not None:
+            data = data[data["t"] >= since]
+        return Bars(data["t"], data["open"], data["high"], data["low"], data["close"], data["volume"])
+
+    def flush(self):
+        self._records.flush()
+        self._header.flush()
+
+
+def to_records(bars: Bars) -> np.ndarray:
+    records = np.empty(len(bars), dtype=BAR_DTYPE)
+    for name in BAR_DTYPE.names:
+        records[name] = getattr(bars, name)
+    return records
+
+
+def _filename(symbol: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]", "_", symbol) + ".bars"
+
+
+class BarStore:
+    """Minute and daily rings for a set of symbols under one directory."""
+
+    def __init__(self, store_dir: str, retention_days: float = 7, daily_retention_days: int = 3650, readonly: bool = False):
+        self.store_dir = store_dir
+        self.minute_capacity = int(retention_days * 1440)
+        self.daily_capacity = int(daily_retention_days)
+        self.readonly = readonly
+        self._rings: Dict[str, RingBuffer] = {}
+
+    def _ring(self, kind: str, symbol: str, capacity: int) -> RingBuffer:
+        key = f"{kind}/{symbol}"
+        if key not in self._rings:
+            path = os.path.join(self.store_dir, kind, _filename(symbol))
+            self._rings[key] = RingBuffer(path, capacity, readonly=self.readonly)
+        return self._rings[key]
+
+    def minutes(self, symbol: str) -> RingBuffer:
+        return self._ring("minute", symbol, self.minute_capacity)
+
+    def daily(self, symbol: str) -> RingBuffer:
+        return self._ring("daily", symbol, self.daily_capacity)
+
+    def append_minutes(self, symbol: str, bars: Bars) -> Bars:
+        """Appends bars newer than the last recorded one; returns those bars."""
+        ring = self.minutes(symbol)
+        last_t = ring.last_t
+        if last_t is not None:
+            bars = bars.take(bars.t > last_t)
+        if len(bars):
+            ring.extend(to_records(bars))
+        return bars
+
+    def compact(self, symbol: str, now: Optional[float] = None) -> int:
+        """Rolls completed UTC days of minute bars into the daily ring."""
+        today = int((now if now is not None else time.time()) // 86400) * 86400
+        daily = self.daily(symbol)
+        since = daily.last_t + 86400 if daily.last_t is not None else None
+        minutes = self.minutes(symbol).to_bars(since=since)
+        minutes = minutes.take(minutes.t < today)
+        days = resample(minutes, "1d")
+        if len(days):
+            # Daily bars are stamped at UTC midnight
+            days.t = days.t // 86400 * 86400
+            daily.extend(to_records(days))
+        return len(days)
+
+    def flush(self):
+        for ring in self._rings.values():
+            ring.flush()
+
+
+class BarRecorder:
+    """Polls Yahoo's 1m chart for each symbol and appends completed bars."""
+
+    def __init__(self, store: BarStore, symbols: List[str], client, chart_base_url: str,
+                 interval_seconds: float = 60, compact_every_seconds: float = 3600, rollups=None):
+        self.store = store
+        self.rollups = rollups
+        self.symbols = symbols
+        self.client = client
+        self.chart_base_url = chart_base_url.rstrip("/")
+        self.interval_seconds = interval_seconds
+        self.compact_every_seconds = compact_every_seconds
+        self.last_compaction = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _fetch(self, symbol: str) -> Bars:
+        with track_upstream("yahoo_chart", "minute_bars"):
+            response = await self.client.get(
+                f"{self.chart_base_url}/v8/finance/chart/{symbol}",
+                params={"range": "1d", "interval": "1m"},
+                headers={"User-Agent": "Mozilla/5.0"},
+            )
+            response.raise_for_status()
+        from backend.services.market_data import parse_json
+        return bars_from_chart(parse_json(response.content))
+
+    async def record_once(self, now: Optional[float] = None) -> Dict[str, int]:
+        now = now if now is not None else time.time()
+        results = await asyncio.gather(*(self._fetch(symbol) for symbol in self.symbols), return_exceptions=True)
+        appended = {}
+        for symbol, bars in zip(self.symbols, results):
+            if isinstance(bars, Exception):
+                print(f"Recorder Error ({symbol}): {bars}")
+                continue
+            # The newest bar is still forming; take it on a later poll
+            new_bars = self.store.append_minutes(symbol, bars.take(bars.t + 60 <= now))
+            appended[symbol] = len(new_bars)
+            if self.rollups is not None and len(new_bars):
+                self.rollups.get(symbol).add(new_bars, base="1m")
+        if now - self.last_compaction >= self.compact_every_seconds:
+            for symbol in self.symbols:
+                self.store.compact(symbol, now)
+                if self.rollups is not None:
+                    self.rollups.save(symbol)
+            self.store.flush()
+            self.last_compaction = now
+        return appended
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.record_once()
+            except Exception as e:
+                print(f"Recorder Error: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.store.flush()
+
+
+def build_recorder(recorder_config: Dict, client, chart_base_url: str, rollups=None) -> BarRecorder:
+    store = BarStore(
+        recorder_config.get("store_dir", "data/bars"),
+        retention_days=recorder_config.get("retention_days", 7),
+        daily_retention_days=recorder_config.get("daily_retention_days", 3650),
+    )
+    return BarRecorder(
+        store,
+        recorder_config.get("symbols", ["GC=F", "GLD", "EGP=X", "AED=X"]),
+        client,
+        chart_base_url,
+        interval_seconds=recorder_config.get("interval_seconds", 60),
+        compact_every_seconds=recorder_config.get("compact_every_minutes", 60) * 60,
+        rollups=rollups,
+    )
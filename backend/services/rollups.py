@@ -0,0 +1,311 @@
+"""
+Materialized price rollups at hourly, daily, weekly and monthly resolution.
+
+Each level stores one row per bucket: OHLC, volume, the log return against
+the previous bucket's close, and `var_sum` / `n`, the sum of squared returns
+and how many went into it, so realized volatility over any range is a sum
+over buckets. Daily returns feed the weekly and monthly var_sum; hourly
+returns feed the hourly one.
+
+Updates are incremental and only the touched tail is recomputed. Minute
+bars (the recorder) are bucketed per level and the first new bucket is
+merged into the last stored one; minutes at or before the newest ingested
+one are ignored. Daily bars (Yahoo) are authoritative for daily and
+coarser levels: they replace the stored daily rows from their first day
+on, including today's still-forming bar, which Yahoo revises under the
+same timestamp, and the weekly and monthly buckets they touch are rebuilt
+from the daily rows. Each feed keeps its own position, so minute ingestion
+never hides a missing daily backfill.
+
+Queries pick the coarsest level that still has enough buckets in the range,
+so a 5y question reads ~60 monthly rows instead of ~1,250 daily bars.
+"""
+import asyncio
+import math
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from backend.services.history import Bars, bucket_ids, resample
+
+LEVELS = ("1h", "1d", "1wk", "1mo")
+LEVEL_SECONDS = {"1h": 3600, "1d": 86400, "1wk": 7 * 86400, "1mo": 30 * 86400}
+COLUMNS = ("t", "open", "high", "low", "close", "volume", "ret", "var_sum", "n")
+
+# Annualization: ~23 trading hours a day for gold futures, 252 trading days
+PERIODS_PER_YEAR = {"1h": 252 * 23, "1d": 252, "1wk": 252, "1mo": 252}
+
+RANGE_SECONDS = {
+    "1mo": 31 * 86400, "3mo": 92 * 86400, "6mo": 183 * 86400, "1y": 366 * 86400,
+    "2y": 731 * 86400, "5y": 1827 * 86400, "10y": 3653 * 86400, "max": None,
+}
+
+
+def _top_up_range(last_t: Optional[int], now: float) -> str:
+    """
+    The smallest Yahoo range that reaches back past the newest stored daily
+    bar, so a top-up after downtime leaves no gap; "max" for a first backfill.
+    """
+    if last_t is None:
+        return "max"
+    # A few days' slack: Yahoo's 1mo is a calendar month, as short as 28 days
+    age = now - last_t + 4 * 86400
+    for name, seconds in RANGE_SECONDS.items():
+        if seconds is not None and seconds >= age:
+            return name
+    return "max"
+
+
+def _empty_level() -> Dict[str, np.ndarray]:
+    level = {name: np.empty(0, dtype=np.float64) for name in COLUMNS}
+    level["t"] = np.empty(0, dtype=np.int64)
+    level["volume"] = np.empty(0, dtype=np.int64)
+    level["n"] = np.empty(0, dtype=np.int64)
+    return level
+
+
+class SymbolRollups:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.levels: Dict[str, Dict[str, np.ndarray]] = {name: _empty_level() for name in LEVELS}
+        # Newest ingested bar per feed ("1m", "1d")
+        self.last_input_t: Dict[str, int] = {}
+        self.daily_updated_at = 0.0
+
+    def __len__(self):
+        return len(self.levels["1d"]["t"])
+
+    # --- Maintenance ---
+
+    def add(self, bars: Bars, base: str = "1m"):
+        """Folds new bars (time-ordered, resolution `base`) into every level at or above it."""
+        last = self.last_input_t.get(base)
+        if last is not None:
+            # The newest daily bar keeps its timestamp while it forms; take its revision
+            bars = bars.take(bars.t >= last if base == "1d" else bars.t > last)
+        if len(bars) == 0:
+            return
+        if base == "1d":
+            first_changed = self._replace_daily(bars)
+        else:
+            base_seconds = 60 if base == "1m" else LEVEL_SECONDS[base]
+            first_changed = {}
+            for name in LEVELS:
+                if LEVEL_SECONDS[name] >= base_seconds:
+                    first_changed[name] = self._merge(name, resample(bars, name))
+        # Coarse levels take their variance from daily returns
+        if "1d" in first_changed:
+            for name in ("1wk", "1mo"):
+                self._refresh_variance(name, first_changed[name])
+        self.last_input_t[base] = int(bars.t[-1])
+
+    def _replace_daily(self, bars: Bars) -> Dict[str, int]:
+        """Replaces daily rows from the first new day on, then rebuilds the coarse buckets they touch."""
+        first_changed = {"1d": self._replace("1d", resample(bars, "1d"))}
+        daily = self.levels["1d"]
+        for name in ("1wk", "1mo"):
+            day_ids = bucket_ids(daily["t"], name)
+            lo = np.searchsorted(day_ids, day_ids[first_changed["1d"]])
+            first_changed[name] = self._replace(name, resample(self.bars("1d", int(daily["t"][lo])), name))
+        return first_changed
+
+    def _replace(self, name: str, new: Bars) -> int:
+        """Drops stored buckets from the first new one on and appends `new`."""
+        ids = bucket_ids(self.levels[name]["t"], name)
+        start = int(np.searchsorted(ids, bucket_ids(new.t[:1], name)[0]))
+        return self._write(name, start, {
+            "t": new.t, "open": new.open, "high": new.high, "low": new.low,
+            "close": new.close, "volume": new.volume,
+        })
+
+    def _merge(self, name: str, new: Bars) -> int:
+        """Upserts aggregated buckets; returns the index of the first changed row."""
+        level = self.levels[name]
+        stored = len(level["t"])
+        rows = {
+            "t": new.t, "open": new.open, "high": new.high, "low": new.low,
+            "close": new.close, "volume": new.volume,
+        }
+        start = stored
+        if stored and bucket_ids(level["t"][-1:], name)[0] == bucket_ids(new.t[:1], name)[0]:
+            # The first new bucket continues the last stored one
+            start = stored - 1
+            rows["t"] = np.r_[level["t"][-1], new.t[1:]]
+            rows["open"] = np.r_[level["open"][-1], new.open[1:]]
+            rows["high"] = np.r_[max(level["high"][-1], new.high[0]), new.high[1:]]
+            rows["low"] = np.r_[min(level["low"][-1], new.low[0]), new.low[1:]]
+            rows["volume"] = np.r_[level["volume"][-1] + new.volume[0], new.volume[1:]]
+        return self._write(name, start, rows)
+
+    def _write(self, name: str, start: int, rows: Dict[str, np.ndarray]) -> int:
+        """Replaces rows from `start` on, computing returns against the row before."""
+        level = self.levels[name]
+        prev_close = level["close"][start - 1] if start > 0 else np.nan
+        closes = np.r_[prev_close, rows["close"]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret = np.log(closes[1:] / closes[:-1])
+        known = ~np.isnan(ret)
+        rows["ret"] = np.where(known, ret, 0.0)
+        rows["var_sum"] = np.where(known, ret, 0.0) ** 2
+        rows["n"] = known.astype(np.int64)
+
+        for column in COLUMNS:
+            level[column] = np.concatenate([level[column][:start], np.asarray(rows[column], dtype=level[column].dtype)])
+        return start
+
+    def _refresh_variance(self, name: str, first_changed: int):
+        """Recomputes var_sum/n for the touched coarse buckets from daily returns."""
+        level, daily = self.levels[name], self.levels["1d"]
+        if len(level["t"]) == 0 or len(daily["t"]) == 0:
+            return
+        ids = bucket_ids(level["t"][first_changed:], name)
+        day_ids = bucket_ids(daily["t"], name)
+        lo = np.searchsorted(day_ids, ids[0])
+        day_ids, var, n = day_ids[lo:], daily["var_sum"][lo:], daily["n"][lo:]
+        positions = np.searchsorted(ids, day_ids)
+        level["var_sum"][first_changed:] = np.bincount(positions, weights=var, minlength=len(ids))
+        level["n"][first_changed:] = np.bincount(positions, weights=n, minlength=len(ids)).astype(np.int64)
+
+    # --- Queries ---
+
+    def window(self, name: str, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        level = self.levels[name]
+        lo = 0 if start is None else np.searchsorted(level["t"], start, side="left")
+        hi = len(level["t"]) if end is None else np.searchsorted(level["t"], end, side="right")
+        return {column: values[lo:hi] for column, values in level.items()}
+
+    def pick_level(self, start: Optional[int], end: Optional[int], min_buckets: int) -> str:
+        """Coarsest level with at least `min_buckets` rows in range (else the finest with data)."""
+        fallback = None
+        for name in reversed(LEVELS):
+            count = len(self.window(name, start, end)["t"])
+            if count >= min_buckets:
+                return name
+            if count and fallback is None:
+                fallback = name
+        return fallback or "1d"
+
+    def bars(self, name: str, start: Optional[int] = None, end: Optional[int] = None) -> Bars:
+        rows = self.window(name, start, end)
+        return Bars(rows["t"], rows["open"], rows["high"], rows["low"], rows["close"], rows["volume"])
+
+    def stats(self, start: Optional[int] = None, end: Optional[int] = None, min_buckets: int = 12) -> Dict:
+        """Return, realized vol, range and volume over [start, end]; cost is O(buckets)."""
+        name = self.pick_level(start, end, min_buckets)
+        rows = self.window(name, start, end)
+        if len(rows["t"]) == 0:
+            return {"symbol": self.symbol, "resolution": name, "buckets": 0}
+        n = int(rows["n"].sum())
+        variance = rows["var_sum"].sum() / n if n else 0.0
+        return {
+            "symbol": self.symbol,
+            "resolution": name,
+            "buckets": len(rows["t"]),
+            "start": int(rows["t"][0]),
+            "end": int(rows["t"][-1]),
+            "open": round(float(rows["open"][0]), 2),
+            "close": round(float(rows["close"][-1]), 2),
+            "high": round(float(rows["high"].max()), 2),
+            "low": round(float(rows["low"].min()), 2),
+            "volume": int(rows["volume"].sum()),
+            "return_pct": round(float(rows["close"][-1] / rows["open"][0] - 1) * 100, 2),
+            "realized_vol_pct": round(math.sqrt(float(variance) * PERIODS_PER_YEAR[name]) * 100, 2),
+            "observations": n,
+        }
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        arrays = {f"{name}.{column}": values for name, level in self.levels.items() for column, values in level.items()}
+        for base, t in self.last_input_t.items():
+            arrays[f"last_input_t.{base}"] = np.asarray([t])
+        arrays["daily_updated_at"] = np.asarray([self.daily_updated_at])
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, symbol: str, path: str) -> "SymbolRollups":
+        rollups = cls(symbol)
+        with np.load(path) as data:
+            for name in LEVELS:
+                for column in COLUMNS:
+                    rollups.levels[name][column] = data[f"{name}.{column}"]
+            for key in data.files:
+                if key.startswith("last_input_t."):
+                    rollups.last_input_t[key.split(".", 1)[1]] = int(data[key][0])
+            if "daily_updated_at" in data.files:
+                rollups.daily_updated_at = float(data["daily_updated_at"][0])
+        return rollups
+
+
+class RollupStore:
+    def __init__(self, store_dir: str = "data/rollups", refresh_seconds: float = 3600):
+        self.store_dir = store_dir
+        self.refresh_seconds = refresh_seconds
+        self._symbols: Dict[str, SymbolRollups] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.store_dir, re.sub(r"[^A-Za-z0-9]", "_", symbol) + ".npz")
+
+    def get(self, symbol: str) -> SymbolRollups:
+        if symbol not in self._symbols:
+            path = self._path(symbol)
+            try:
+                self._symbols[symbol] = SymbolRollups.load(symbol, path) if os.path.exists(path) else SymbolRollups(symbol)
+            except Exception as e:
+                print(f"Rollup load error ({symbol}): {e}")
+                self._symbols[symbol] = SymbolRollups(symbol)
+        return self._symbols[symbol]
+
+    def save(self, symbol: str):
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            self.get(symbol).save(self._path(symbol))
+        except Exception as e:
+            print(f"Rollup save error ({symbol}): {e}")
+
+    async def ensure_daily(self, symbol: str) -> SymbolRollups:
+        """Backfills daily history on first use and tops it up once it is stale."""
+        from backend.services.history import fetch_bars
+
+        rollups = self.get(symbol)
+
+        def fresh():
+            # Minute bars from the recorder don't count: only a daily fetch backfills
+            return "1d" in rollups.last_input_t and time.time() - rollups.daily_updated_at < self.refresh_seconds
+
+        if fresh():
+            return rollups
+        lock = self._locks.setdefault(symbol, asyncio.Lock())
+        async with lock:
+            if fresh():
+                return rollups
+            bars = await fetch_bars(symbol, _top_up_range(rollups.last_input_t.get("1d"), time.time()), "1d")
+            rollups.add(bars, base="1d")
+            rollups.daily_updated_at = time.time()
+            await asyncio.to_thread(self.save, symbol)
+        return rollups
+
+
+_store: Optional[RollupStore] = None
+_store_lock = threading.Lock()
+
+
+def get_rollups() -> RollupStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from backend.config import get_section
+                rollups_config = get_section("rollups")
+                _store = RollupStore(
+                    rollups_config.get("store_dir", "data/rollups"),
+                    refresh_seconds=rollups_config.get("refresh_seconds", 3600),
+                )
+    return _store
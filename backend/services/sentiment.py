@@ -7,6 +7,9 @@ from datetime import datetime, timedelta
 import google.generativeai as genai
 from duckduckgo_search import DDGS
 
+from backend.metrics import track_upstream, record_cache, record_fallback
+from backend.profiling import phase
+
 class SentimentEngine:
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_API_KEY")
@@ -28,12 +31,14 @@ class SentimentEngine:
         # Caching logic
         if self._cache and self._cache_time and (datetime.now() - self._cache_time) < self._cache_ttl:
             print("DEBUG: Returning cached sentiment data")
+            record_cache("sentiment", hit=True)
             return self._cache
+        record_cache("sentiment", hit=False)
 
         try:
             # 1. Fetch top 5 news URLs
             urls = []
-            with DDGS() as ddgs:
+            with track_upstream("ddg", "sentiment_news", phase="fetch"), DDGS() as ddgs:
                 results = list(ddgs.news(keywords="Gold Price News", max_results=5))
                 urls = [r['url'] for r in results if 'url' in r]
 
@@ -41,7 +46,8 @@ class SentimentEngine:
                 return self._fallback_response("No recent news found for analysis")
 
             # 2. Scrape content asynchronously
-            contents = await self._scrape_urls(urls)
+            with phase("scrape"):
+                contents = await self._scrape_urls(urls)
             aggregated_text = "\n\n".join([c for c in contents if c.strip()])[:8000]
 
             if not aggregated_text.strip():
@@ -61,9 +67,11 @@ class SentimentEngine:
             {aggregated_text}
             """
 
-            response = self.model.generate_content(prompt)
+            with track_upstream("gemini", "sentiment", phase="llm"):
+                response = self.model.generate_content(prompt)
             import json
-            result = json.loads(response.text.strip())
+            with phase("parse"):
+                result = json.loads(response.text.strip())
             
             # Update cache
             self._cache = result
@@ -85,18 +93,21 @@ class SentimentEngine:
 
     async def _fetch_content(self, client: httpx.AsyncClient, url: str) -> str:
         try:
-            resp = await client.get(url)
+            with track_upstream("scrape", "article"):
+                resp = await client.get(url)
             if resp.status_code == 200:
-                soup = BeautifulSoup(resp.text, 'html.parser')
-                # Remove scripts and styles
-                for script in soup(["script", "style"]):
-                    script.extract()
-                return soup.get_text(separator=' ', strip=True)[:2000]
+                with phase("parse"):
+                    soup = BeautifulSoup(resp.text, 'html.parser')
+                    # Remove scripts and styles
+                    for script in soup(["script", "style"]):
+                        script.extract()
+                    return soup.get_text(separator=' ', strip=True)[:2000]
             return ""
         except:
             return ""
 
     def _fallback_response(self, message: str) -> Dict[str, Any]:
+        record_fallback("sentiment")
         return {
             "sentiment_score": 50,
             "mood_label": "Neutral",
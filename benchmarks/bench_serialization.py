@@ -0,0 +1,96 @@
+"""
+Microbenchmark: FastAPI's default response path vs. the snapshot path.
+
+Default path = pydantic validation + jsonable_encoder + JSONResponse render
+(+ GZip on the wire). Snapshot path = one-off serialization and compression,
+then a cached bytes lookup per request.
+
+Usage:
+    python benchmarks/bench_serialization.py [--iterations 20000]
+"""
+import argparse
+import gzip
+import os
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from backend.models import NewsItem
+from backend.responses import FastJSONResponse, Snapshot, choose_encoding
+
+PRICE_PAYLOAD = {
+    "asset": "Gold (Live Futures (GC=F))",
+    "price_oz_24k": 2651.4,
+    "daily_change_oz": 12.3,
+    "percent_change": "0.47%",
+    "rates": {"USD/EGP": 49.62, "USD/AED": 3.67},
+    "usd": {"Troy Ounce": 2651.4, "24k": 85.25, "21k": 74.59, "18k": 63.94},
+    "egypt": {"Troy Ounce": 131562.47, "Gold Coin (8g 21k)": 29610.4, "24k": 4229.83, "21k": 3701.1, "18k": 3172.37},
+    "uae": {"Troy Ounce": 9730.64, "24k": 312.85, "21k": 273.74, "18k": 234.64},
+}
+
+NEWS_PAYLOAD = [
+    {
+        "title": f"Gold steadies as traders weigh Fed path and central bank buying #{i}",
+        "link": f"https://example.com/markets/commodities/gold-{i}",
+        "source": "Example Wire",
+        "date": "2026-10-19T08:30:00+00:00",
+    }
+    for i in range(5)
+]
+
+NEWS_ADAPTER = TypeAdapter(List[NewsItem])
+
+
+def default_price():
+    return gzip.compress(JSONResponse(content=jsonable_encoder(PRICE_PAYLOAD)).body)
+
+
+def default_news():
+    validated = NEWS_ADAPTER.validate_python(NEWS_PAYLOAD)
+    return gzip.compress(JSONResponse(content=jsonable_encoder(validated)).body)
+
+
+def fast_render_news():
+    validated = NEWS_ADAPTER.validate_python(NEWS_PAYLOAD)
+    return FastJSONResponse(content=NEWS_ADAPTER.dump_python(validated)).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    encoding = choose_encoding("gzip, deflate, br")
+    price_snapshot = Snapshot(PRICE_PAYLOAD, ttl_seconds=30)
+    news_snapshot = Snapshot(NEWS_PAYLOAD, ttl_seconds=30)
+
+    cases = [
+        ("price: default + gzip", default_price),
+        ("price: snapshot hit", lambda: price_snapshot.encoded(encoding)),
+        ("news: default + gzip", default_news),
+        ("news: fast render (no cache)", fast_render_news),
+        ("news: snapshot hit", lambda: news_snapshot.encoded(encoding)),
+    ]
+
+    print(f"Iterations: {args.iterations}  (snapshot encoding: {encoding})")
+    print(f"{'case':<32}{'us/op':>10}")
+    for name, fn in cases:
+        seconds = min(timeit.repeat(fn, number=args.iterations, repeat=3))
+        print(f"{name:<32}{seconds / args.iterations * 1e6:>10.2f}")
+
+    print()
+    print(f"{'payload':<10}{'raw':>8}{'gzip':>8}{'br':>8}")
+    for name, snapshot in (("price", price_snapshot), ("news", news_snapshot)):
+        br = len(snapshot.encoded("br")) if encoding == "br" else "-"
+        print(f"{name:<10}{len(snapshot.body):>8}{len(snapshot.encoded('gzip')):>8}{br:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Loaders for the recorded fixtures in tests/fixtures, shared by benchmarks and tests."""
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures")
+
+
+def fixture_path(name):
+    return os.path.join(FIXTURES_DIR, name)
+
+
+def load_history(name="gc_f_history.csv"):
+    """A canned yfinance `Ticker.history()` frame."""
+    return pd.read_csv(fixture_path(name), index_col=0, parse_dates=[0])
+
+
+def load_forex_history():
+    """A canned yfinance `Tickers("EGP=X AED=X").history()` frame (two-level columns)."""
+    return pd.read_csv(fixture_path("forex_history.csv"), header=[0, 1], index_col=0)
+
+
+def load_article_html():
+    with open(fixture_path("article.html"), "r") as f:
+        return f.read()
+
+
+def load_model_responses():
+    with open(fixture_path("model_responses.json"), "r") as f:
+        return json.load(f)
+
+
+class CannedProvider:
+    """Stands in for YahooProvider, answering from the GLD fixture."""
+
+    def __init__(self):
+        self.history = load_history("gld_history.csv")
+
+    def get_latest(self, symbol="GLD"):
+        latest = self.history.iloc[-1]
+        prev = self.history.iloc[-2]
+        return {
+            "symbol": symbol,
+            "price": float(latest["Close"]),
+            "timestamp_utc": datetime.utcnow().isoformat() + "Z",
+            "pct_change_24h": round(float((latest["Close"] - prev["Close"]) / prev["Close"] * 100), 2),
+            "ohlc": {},
+        }
+
+
+def populate_predictions(db_path, rows, evaluated_fraction=0.5, seed=7):
+    """
+    Fills a predictions table with `rows` synthetic predictions, all older than
+    the 24h horizon. `evaluated_fraction` of them already carry an outcome.
+    """
+    from backend.predictions import get_repository
+    from migrate import migrate
+
+    migrate(db_path)
+    rng = random.Random(seed)
+    actions = ("BUY", "SELL", "HOLD")
+    now = datetime.utcnow()
+    input_json = json.dumps({"assets": {"GLD": {"price": 245.0}}})
+
+    def generate():
+        for i in range(rows):
+            action = actions[i % 3]
+            output = json.dumps({
+                "recommendation": action,
+                "confidence": rng.randint(30, 95),
+                "final_action": action,
+                "suggested_risk_tier": "Moderate",
+            })
+            outcome = None
+            if rng.random() < evaluated_fraction:
+                outcome = "SUCCESS" if rng.random() < 0.55 else "FAILURE"
+            yield {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "timestamp_utc": (now - timedelta(days=2, minutes=i)).isoformat() + "Z",
+                "gld_price": 240.0 + rng.random() * 10,
+                "xau_price": 2640.0 + rng.random() * 40,
+                "input_json": input_json,
+                "model_output_json": output,
+                "horizon_1d_outcome": outcome,
+            }
+
+    get_repository(db_path).bulk_insert(generate())
@@ -0,0 +1,77 @@
+"""
+Cold-start import budget for the backend and the service modules.
+
+Each entry point is imported in a fresh interpreter. The check fails if the
+import takes longer than its budget or drags in a heavy SDK it should not
+need (e.g. /news pulling in pandas or the Gemini client).
+
+Usage:
+    python benchmarks/import_budget.py          # report, exit 1 on violation
+    IMPORT_BUDGET_SCALE=2 python benchmarks/import_budget.py   # slower machines / CI
+"""
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_SDKS = ("pandas", "yfinance", "google.generativeai", "langchain_core", "duckduckgo_search", "sqlalchemy")
+
+# module -> (budget in ms, heavy SDKs it must not import)
+BUDGETS: Dict[str, tuple] = {
+    "backend.main": (1500, HEAVY_SDKS),
+    "backend.services.news": (1000, ("pandas", "yfinance", "google.generativeai", "langchain_core", "sqlalchemy")),
+    "backend.services.providers": (2500, ("google.generativeai", "langchain_core", "duckduckgo_search", "sqlalchemy")),
+    "backend.services.llm": (3000, ("pandas", "yfinance", "langchain_core", "duckduckgo_search", "sqlalchemy")),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """Imports `module` in a clean interpreter; returns elapsed ms and loaded modules."""
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="1")
+    env.setdefault("GOOGLE_API_KEY", "import-budget-dummy")
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", _PROBE.format(module=module)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def check(module: str, scale: float = 1.0) -> List[str]:
+    budget_ms, forbidden = BUDGETS[module]
+    measured = measure(module)
+    problems = []
+    if measured["ms"] > budget_ms * scale:
+        problems.append(f"{module} took {measured['ms']:.0f}ms (budget {budget_ms * scale:.0f}ms)")
+    loaded = set(measured["modules"])
+    for sdk in forbidden:
+        if sdk in loaded:
+            problems.append(f"{module} imported {sdk}")
+    return problems
+
+
+def main():
+    scale = float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+    violations = []
+    print(f"{'module':<32}{'import ms':>12}{'budget ms':>12}")
+    for module, (budget_ms, _) in BUDGETS.items():
+        measured = measure(module)
+        print(f"{module:<32}{measured['ms']:>12.0f}{budget_ms * scale:>12.0f}")
+        violations.extend(check(module, scale))
+    for violation in violations:
+        print(f"VIOLATION: {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,487 @@
+"""
+End-to-end load test of the FastAPI backend against local fake upstreams.
+
+Starts stand-in servers for the quote (Yahoo chart API), news (DuckDuckGo),
+article and LLM (Gemini) upstreams, each with configurable latency, jitter
+and error injection. It then points the backend's providers at them, runs
+the app under uvicorn in-process and drives /price, /news, /market-mood and
+/analyze at a target request rate.
+
+The report covers throughput, latency percentiles per endpoint and upstream
+call amplification (upstream calls per API request).
+
+Usage:
+    python benchmarks/loadtest.py --rps 50 --duration 20
+    python benchmarks/loadtest.py --latency llm=3000 --errors quote=0.2 --snapshot-ttl 0
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ.setdefault("GOOGLE_API_KEY", "loadtest-dummy-key")
+
+import httpx
+import pandas as pd
+
+import fixtures
+
+DEFAULT_LATENCY_MS = {"quote": 80, "news": 150, "article": 200, "llm": 1200}
+DEFAULT_MIX = {"price": 4, "news": 2, "market-mood": 2, "analyze": 1}
+
+
+# --- Fake upstream servers ---
+
+class FakeUpstream:
+    """
+    A threaded HTTP server that answers via `handler(path, query, body)` after
+    an injected delay, failing `error_rate` of requests with a 503.
+    """
+
+    def __init__(self, name: str, handler: Callable, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0):
+        self.name = name
+        self.handler = handler
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"fake-{name}", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                with upstream._lock:
+                    upstream.calls += 1
+                delay = upstream.latency_ms + random.uniform(0, upstream.jitter_ms)
+                time.sleep(delay / 1000.0)
+
+                if random.random() < upstream.error_rate:
+                    with upstream._lock:
+                        upstream.errors += 1
+                    status, content_type, payload = 503, "text/plain", b"injected failure"
+                else:
+                    parsed = urlparse(self.path)
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = self.rfile.read(length) if length else b""
+                    status, content_type, payload = upstream.handler(parsed.path, parse_qs(parsed.query), body)
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _chart_payload(frame: pd.DataFrame, symbol: str) -> dict:
+    """Renders a history frame as a Yahoo v8 chart API response."""
+    index = pd.to_datetime(frame.index, utc=True)
+    return {"chart": {"result": [{
+        "meta": {
+            "symbol": symbol,
+            "currency": "USD",
+            "regularMarketPrice": float(frame["Close"].iloc[-1]),
+            "chartPreviousClose": float(frame["Close"].iloc[-2]) if len(frame) > 1 else float(frame["Close"].iloc[-1]),
+        },
+        "timestamp": [int(ts.timestamp()) for ts in index],
+        "indicators": {"quote": [{
+            "open": frame["Open"].tolist(),
+            "high": frame["High"].tolist(),
+            "low": frame["Low"].tolist(),
+            "close": frame["Close"].tolist(),
+            "volume": frame["Volume"].tolist(),
+        }]},
+    }], "error": None}}
+
+
+def quote_handler():
+    spot = fixtures.load_history()
+    gld = fixtures.load_history("gld_history.csv")
+    forex = fixtures.load_forex_history()
+    frames = {"GC=F": spot, "GLD": gld}
+    for symbol in ("EGP=X", "AED=X"):
+        frames[symbol] = pd.DataFrame(
+            {field: forex[field][symbol] for field in ("Open", "High", "Low", "Close", "Volume")},
+            index=forex.index,
+        )
+
+    def handle(path, query, body):
+        symbol = path.rsplit("/", 1)[-1]
+        frame = frames.get(symbol)
+        if frame is None:
+            return 404, "application/json", b'{"chart": {"result": null, "error": {"code": "Not Found"}}}'
+        return 200, "application/json", json.dumps(_chart_payload(frame, symbol)).encode()
+
+    return handle
+
+
+def news_handler(article_base_url: str):
+    def handle(path, query, body):
+        keywords = query.get("q", ["gold"])[0]
+        items = [
+            {
+                "title": f"{keywords.title()} update {i}: bullion steadies as traders weigh Fed path",
+                "url": f"{article_base_url}/article/{i}",
+                "source": "Fake Wire",
+                "date": "2026-10-19T08:30:00+00:00",
+            }
+            for i in range(5)
+        ]
+        return 200, "application/json", json.dumps(items).encode()
+
+    return handle
+
+
+def article_handler():
+    html = fixtures.load_article_html().encode()
+
+    def handle(path, query, body):
+        return 200, "text/html; charset=utf-8", html
+
+    return handle
+
+
+def llm_handler():
+    responses = fixtures.load_model_responses()
+
+    def handle(path, query, body):
+        prompt = json.loads(body or b"{}").get("prompt", "")
+        if "sentiment_score" in prompt:
+            text = responses["sentiment_response"]
+        else:
+            text = random.choice(responses["analysis_responses"])
+        return 200, "application/json", json.dumps({"text": text}).encode()
+
+    return handle
+
+
+# --- Provider shims pointing the backend at the fakes ---
+
+class _UpstreamClient:
+    def __init__(self):
+        self.http = httpx.Client(timeout=30.0, limits=httpx.Limits(max_connections=200, max_keepalive_connections=50))
+
+    def get_json(self, url, **params):
+        response = self.http.get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+
+def _frame_from_chart(payload: dict) -> pd.DataFrame:
+    result = payload["chart"]["result"][0]
+    quote = result["indicators"]["quote"][0]
+    index = pd.to_datetime(result["timestamp"], unit="s", utc=True)
+    return pd.DataFrame({
+        "Open": quote["open"], "High": quote["high"], "Low": quote["low"],
+        "Close": quote["close"], "Volume": quote["volume"],
+    }, index=index)
+
+
+def make_yfinance_shim(client: _UpstreamClient, quote_url: str):
+    """A stand-in for the `yf` module: Ticker/Tickers backed by the fake chart API."""
+
+    class Ticker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def history(self, period="1d", **kwargs):
+            return _frame_from_chart(client.get_json(f"{quote_url}/v8/finance/chart/{self.symbol}", range=period, interval="1d"))
+
+    class Tickers:
+        def __init__(self, symbols):
+            self.symbols = symbols.split()
+
+        def history(self, period="1d", **kwargs):
+            frames = {symbol: Ticker(symbol).history(period=period) for symbol in self.symbols}
+            return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+    class Module:
+        pass
+
+    module = Module()
+    module.Ticker = Ticker
+    module.Tickers = Tickers
+    return module
+
+
+def make_ddgs_shim(client: _UpstreamClient, news_url: str):
+    class DDGS:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def news(self, keywords, max_results=5, **kwargs):
+            return client.get_json(f"{news_url}/news", q=keywords)[:max_results]
+
+    return DDGS
+
+
+def make_genai_shim(client: _UpstreamClient, llm_url: str):
+    class Response:
+        def __init__(self, text):
+            self.text = text
+
+    class GenerativeModel:
+        def __init__(self, model_name=None, generation_config=None, **kwargs):
+            self.model_name = model_name
+
+        def generate_content(self, prompt, **kwargs):
+            response = client.http.post(f"{llm_url}/v1/models/{self.model_name}:generateContent", json={"prompt": prompt})
+            response.raise_for_status()
+            return Response(response.json()["text"])
+
+    class Module:
+        @staticmethod
+        def configure(**kwargs):
+            pass
+
+    module = Module()
+    module.GenerativeModel = GenerativeModel
+    return module
+
+
+def install_shims(upstreams: Dict[str, FakeUpstream]):
+    import backend.services.news as news
+    import backend.services.llm as llm
+    import backend.services.sentiment as sentiment
+    from backend.config import config
+    from backend.services.market_data import YahooQuoteProvider, get_market_data
+
+    # Health probes would otherwise reach the real internet and skew call counts
+    config.setdefault("health", {})["upstreams"] = {}
+
+    client = _UpstreamClient()
+    yf_shim = make_yfinance_shim(client, upstreams["quote"].url)
+    market_data = get_market_data()
+    # The API reads the fake chart endpoint directly; the shim covers sync callers
+    market_data.registry.register("yahoo", lambda: YahooQuoteProvider(chart_base_url=upstreams["quote"].url, yf_module=yf_shim))
+    market_data.clear()
+    ddgs = make_ddgs_shim(client, upstreams["news"].url)
+    news.DDGS = ddgs
+    sentiment.DDGS = ddgs
+    genai = make_genai_shim(client, upstreams["llm"].url)
+    llm.genai = genai
+    sentiment.genai = genai
+
+
+# --- Load driver ---
+
+ANALYZE_BODY = {
+    "price": 245.92,
+    "change_percent": 0.64,
+    "gld_data": {"symbol": "GLD", "price": 245.92, "pct_change_24h": 0.64},
+    "xau_data": {"symbol": "XAUUSD", "price": 2668.2, "pct_change_24h": 0.47},
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(snapshot_ttl):
+    import uvicorn
+    from backend.main import app, snapshots
+    from backend.services.market_data import get_market_data
+
+    if snapshot_ttl is not None:
+        snapshots.ttl_seconds = snapshot_ttl
+        get_market_data().cache_ttl_seconds = snapshot_ttl
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, name="api", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def drive(base_url: str, rps: float, duration: float, mix: Dict[str, int], max_in_flight: int):
+    endpoints = [name for name, weight in mix.items() for _ in range(weight)]
+    latencies = defaultdict(list)
+    failures = defaultdict(int)
+    semaphore = asyncio.Semaphore(max_in_flight)
+    dropped = 0
+
+    async def one(client, endpoint):
+        start = time.perf_counter()
+        try:
+            if endpoint == "analyze":
+                response = await client.post("/analyze", json=ANALYZE_BODY)
+            elif endpoint == "price":
+                response = await client.get("/price/GC=F")
+            else:
+                response = await client.get(f"/{endpoint}")
+            if response.status_code >= 400:
+                failures[endpoint] += 1
+        except Exception:
+            failures[endpoint] += 1
+        finally:
+            latencies[endpoint].append(time.perf_counter() - start)
+            semaphore.release()
+
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        tasks = []
+        interval = 1.0 / rps
+        started = time.perf_counter()
+        next_at = started
+        # Open loop: requests go out on schedule regardless of how slow earlier ones are
+        while next_at - started < duration:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            next_at += interval
+            if semaphore.locked():
+                dropped += 1
+                continue
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(one(client, random.choice(endpoints))))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return latencies, failures, dropped, elapsed
+
+
+def report(latencies, failures, dropped, elapsed, upstreams: Dict[str, FakeUpstream]):
+    total = sum(len(values) for values in latencies.values())
+    print(f"\nRequests: {total} in {elapsed:.1f}s  ->  {total / elapsed:.1f} req/s  (dropped at max in-flight: {dropped})")
+    print(f"\n{'endpoint':<14}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for endpoint in sorted(latencies):
+        values = sorted(latencies[endpoint])
+        print(
+            f"{endpoint:<14}{len(values):>7}{failures[endpoint]:>8}"
+            f"{percentile(values, 50) * 1e3:>10.1f}{percentile(values, 90) * 1e3:>10.1f}"
+            f"{percentile(values, 99) * 1e3:>10.1f}{values[-1] * 1e3:>10.1f}"
+        )
+
+    print(f"\n{'upstream':<14}{'calls':>7}{'errors':>8}{'calls/request':>15}")
+    for name, upstream in upstreams.items():
+        amplification = upstream.calls / total if total else 0.0
+        print(f"{name:<14}{upstream.calls:>7}{upstream.errors:>8}{amplification:>15.3f}")
+
+    return {
+        "requests": total,
+        "elapsed_s": elapsed,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "dropped": dropped,
+        "endpoints": {
+            endpoint: {
+                "count": len(values),
+                "errors": failures[endpoint],
+                "p50_ms": percentile(sorted(values), 50) * 1e3,
+                "p90_ms": percentile(sorted(values), 90) * 1e3,
+                "p99_ms": percentile(sorted(values), 99) * 1e3,
+            }
+            for endpoint, values in latencies.items()
+        },
+        "upstreams": {
+            name: {"calls": u.calls, "errors": u.errors, "calls_per_request": u.calls / total if total else 0.0}
+            for name, u in upstreams.items()
+        },
+    }
+
+
+def _parse_pairs(values, cast=float) -> Dict[str, float]:
+    pairs = {}
+    for item in values or []:
+        key, _, value = item.partition("=")
+        pairs[key.strip()] = cast(value)
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=20.0, help="Target API request rate")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds to generate load")
+    parser.add_argument("--mix", nargs="+", metavar="ENDPOINT=WEIGHT", help="e.g. price=4 news=2 market-mood=2 analyze=1")
+    parser.add_argument("--latency", nargs="+", metavar="UPSTREAM=MS", help="Base latency per upstream (quote, news, article, llm)")
+    parser.add_argument("--jitter", nargs="+", metavar="UPSTREAM=MS", help="Uniform extra latency per upstream")
+    parser.add_argument("--errors", nargs="+", metavar="UPSTREAM=RATE", help="Fraction of upstream calls answered with 503")
+    parser.add_argument("--snapshot-ttl", type=float, help="Override api.snapshot_ttl_seconds (0 disables snapshot reuse)")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args()
+
+    latency = {**DEFAULT_LATENCY_MS, **_parse_pairs(args.latency)}
+    jitter = _parse_pairs(args.jitter)
+    errors = _parse_pairs(args.errors)
+    mix = {**DEFAULT_MIX, **_parse_pairs(args.mix, int)} if args.mix else DEFAULT_MIX
+
+    article = FakeUpstream("article", article_handler(), latency["article"], jitter.get("article", 0), errors.get("article", 0)).start()
+    upstreams = {
+        "quote": FakeUpstream("quote", quote_handler(), latency["quote"], jitter.get("quote", 0), errors.get("quote", 0)).start(),
+        "news": FakeUpstream("news", news_handler(article.url), latency["news"], jitter.get("news", 0), errors.get("news", 0)).start(),
+        "article": article,
+        "llm": FakeUpstream("llm", llm_handler(), latency["llm"], jitter.get("llm", 0), errors.get("llm", 0)).start(),
+    }
+
+    install_shims(upstreams)
+    server, thread, base_url = start_api(args.snapshot_ttl)
+    print(f"API at {base_url}; driving {args.rps:g} req/s for {args.duration:g}s with mix {mix}")
+
+    try:
+        latencies, failures, dropped, elapsed = asyncio.run(
+            drive(base_url, args.rps, args.duration, {k: v for k, v in mix.items() if v > 0}, args.max_in_flight)
+        )
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        for upstream in upstreams.values():
+            upstream.stop()
+
+    result = report(latencies, failures, dropped, elapsed, upstreams)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Offline benchmark suite for the hot paths, driven by recorded fixtures.
+
+Nothing here touches the network: yfinance frames, article HTML and model
+JSON all come from tests/fixtures. Results are stored as seconds per
+operation and compared against benchmarks/baseline.json.
+
+Usage:
+    python benchmarks/run_benchmarks.py                    # compare against baseline
+    python benchmarks/run_benchmarks.py --save-baseline    # record a new baseline
+    python benchmarks/run_benchmarks.py --sizes 10000 --only evaluator
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-dummy-key")
+
+import httpx
+
+import fixtures
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def per_op(fn, number, repeat=3):
+    """Best-of-`repeat` seconds per call."""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+# --- Cases ---
+
+def bench_price_postprocess():
+    """Chart responses for gold and both FX pairs -> the /price payload, as MarketDataService does it."""
+    from backend.services.market_data import MarketSnapshot, quote_from_chart
+    from loadtest import quote_handler
+
+    handle = quote_handler()
+    bodies = {symbol: handle(f"/v8/finance/chart/{symbol}", {}, b"")[2] for symbol in ("GC=F", "EGP=X", "AED=X")}
+
+    def run():
+        snapshot = MarketSnapshot(
+            gold=quote_from_chart(bodies["GC=F"], "GC=F", "Live Futures (GC=F)"),
+            usd_egp=quote_from_chart(bodies["EGP=X"], "EGP=X"),
+            usd_aed=quote_from_chart(bodies["AED=X"], "AED=X"),
+        )
+        return snapshot.to_price_payload()
+
+    return {"price.postprocess": per_op(run, 2000)}
+
+
+def bench_quote_parse():
+    """Per-quote cost of the async chart path vs. going through a DataFrame as yfinance does."""
+    from backend.services.market_data import quote_from_chart
+    from loadtest import _chart_payload, _frame_from_chart
+
+    body = json.dumps(_chart_payload(fixtures.load_history(), "GC=F")).encode()
+
+    def via_frame():
+        data = _frame_from_chart(json.loads(body))
+        latest, prev = data.iloc[-1], data.iloc[-2]
+        return float(latest["Close"]), float(latest["Open"]), float(prev["Close"])
+
+    def via_chart():
+        return quote_from_chart(body, "GC=F")
+
+    return {"quote.parse_frame": per_op(via_frame, 500), "quote.parse_chart": per_op(via_chart, 500)}
+
+
+def bench_evaluator(sizes, workdir):
+    from src.evaluator import Evaluator
+
+    results = {}
+    for size in sizes:
+        template = os.path.join(workdir, f"predictions_{size}.db")
+        fixtures.populate_predictions(template, size)
+
+        # run_evaluation mutates the table, so each timing gets a fresh copy
+        db_path = os.path.join(workdir, f"eval_{size}.db")
+        shutil.copyfile(template, db_path)
+        evaluator = Evaluator(provider=fixtures.CannedProvider(), db_path=db_path)
+        start = time.perf_counter()
+        evaluator.run_evaluation()
+        results[f"evaluator.run_evaluation[{size}]"] = time.perf_counter() - start
+
+        evaluator = Evaluator(provider=fixtures.CannedProvider(), db_path=template)
+        results[f"evaluator.get_metrics[{size}]"] = per_op(evaluator.get_metrics, 1, repeat=2)
+    return results
+
+
+def bench_sentiment_parse():
+    from backend.services.sentiment import SentimentEngine
+
+    html = fixtures.load_article_html()
+    engine = SentimentEngine()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=html))
+    iterations = 200
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                await engine._fetch_content(client, "https://example.com/gold")
+            return (time.perf_counter() - start) / iterations
+
+    return {"sentiment._fetch_content": min(asyncio.run(run()) for _ in range(3))}
+
+
+def bench_map_recommendation():
+    from backend.services.llm import GoldAnalystEngine
+
+    engine = GoldAnalystEngine()
+    outputs = []
+    for raw in fixtures.load_model_responses()["analysis_responses"]:
+        raw = raw.strip()
+        if raw.startswith("```json"):
+            raw = raw[7:]
+        if raw.endswith("```"):
+            raw = raw[:-3]
+        outputs.append(json.loads(raw))
+
+    def run():
+        for output in outputs:
+            engine._map_recommendation(output)
+
+    return {"engine._map_recommendation": per_op(run, 20000) / len(outputs)}
+
+
+def bench_log_prediction(workdir):
+    from migrate import migrate
+    from src.logger import log_prediction
+
+    db_path = os.path.join(workdir, "log.db")
+    migrate(db_path)
+    output = json.loads(fixtures.load_model_responses()["sentiment_response"])
+
+    def run():
+        log_prediction(245.92, 2668.2, {"assets": {"GLD": {"price": 245.92}}}, output, db_path=db_path)
+
+    return {"logger.log_prediction": per_op(run, 200)}
+
+
+def bench_graph():
+    """
+    End-to-end wall time of the LangGraph workflow against fake upstreams
+    with fixed latencies, vs. the old one-node fetch (price, then news).
+    """
+    import graph
+    from backend.services.market_data import MarketDataService, ProviderRegistry, Quote, QuoteProvider
+
+    quote_latency, news_latency, llm_latency = 0.03, 0.08, 0.05
+
+    class SlowQuotes(QuoteProvider):
+        name = "slow"
+
+        def get_quote(self, symbol, label=None):
+            time.sleep(quote_latency)
+            return Quote(symbol=symbol, price=2660.0, source="Benchmark", provider=self.name)
+
+    class SlowLLM:
+        class Response:
+            content = "Neutral. HOLD with 50% confidence."
+
+        def invoke(self, messages):
+            time.sleep(llm_latency)
+            return self.Response()
+
+        async def ainvoke(self, messages):
+            await asyncio.sleep(llm_latency)
+            return self.Response()
+
+    def slow_news(query=None):
+        time.sleep(news_latency)
+        return [{"title": "Gold steadies", "source": "Benchmark", "link": "#"}]
+
+    registry = ProviderRegistry()
+    registry.register("slow", SlowQuotes)
+    chains = {name: [{"provider": "slow", "symbol": name}] for name in ("gold_spot", "usd_egp", "usd_aed")}
+    # No quote cache, so every run pays the upstream latency
+    service = MarketDataService(registry, chains, cache_ttl_seconds=0)
+    graph.get_market_data = lambda: service
+    graph.fetch_market_news = slow_news
+    graph.build_llm = SlowLLM
+
+    def sequential():
+        state = {"gold_data": service.get_snapshot().to_price_payload(), "market_news": slow_news()}
+        state.update(graph.analyze_node(state))
+        return state
+
+    # Without the node cache, so every run does the full work
+    app = graph.workflow.compile()
+    return {
+        "graph.sequential_fetch": per_op(sequential, 3),
+        "graph.invoke": per_op(lambda: app.invoke({}), 3),
+        "graph.ainvoke": per_op(lambda: asyncio.run(app.ainvoke({})), 3),
+    }
+
+
+# --- Runner ---
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"{'benchmark':<40}{'current (us)':>16}{'baseline (us)':>16}{'change':>10}")
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base:
+            change = (seconds - base) / base
+            flag = "  REGRESSION" if change > threshold else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<40}{seconds * 1e6:>16.2f}{base * 1e6:>16.2f}{change:>+10.1%}{flag}")
+        else:
+            print(f"{name:<40}{seconds * 1e6:>16.2f}{'-':>16}{'new':>10}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Evaluator table sizes")
+    parser.add_argument("--only", nargs="+", choices=["price", "evaluator", "sentiment", "mapping", "logger", "graph"])
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging, e.g. 0.25 = 25%%")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    selected = set(args.only or ["price", "evaluator", "sentiment", "mapping", "logger", "graph"])
+    results = {}
+    # migrate() and friends print; keep the report readable
+    with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(io.StringIO()):
+        if "price" in selected:
+            results.update(bench_price_postprocess())
+            results.update(bench_quote_parse())
+        if "evaluator" in selected:
+            results.update(bench_evaluator(args.sizes, workdir))
+        if "sentiment" in selected:
+            results.update(bench_sentiment_parse())
+        if "mapping" in selected:
+            results.update(bench_map_recommendation())
+        if "logger" in selected:
+            results.update(bench_log_prediction(workdir))
+        if "graph" in selected:
+            results.update(bench_graph())
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+    print()
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Scores predictions that have matured since the last run, outside the app.
+
+    python evaluate_predictions.py
+    python evaluate_predictions.py --loop --interval 300
+    python evaluate_predictions.py --rescan
+
+Safe to run from cron alongside the app's and API's background workers:
+each run continues from the shared watermark and never overwrites an
+outcome that is already set.
+"""
+import argparse
+import time
+
+from src.evaluator import DB_NAME, Evaluator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate matured predictions.")
+    parser.add_argument("--loop", action="store_true", help="Keep running every --interval seconds")
+    parser.add_argument("--interval", type=float, help="Seconds between runs (default: evaluation.interval_seconds)")
+    parser.add_argument("--rescan", action="store_true",
+                        help="Reset the watermarks first, so still-unscored older predictions are picked up")
+    parser.add_argument("--db", help=f"SQLite file (default: DATABASE_URL if set, else {DB_NAME})")
+    args = parser.parse_args(argv)
+
+    worker = Evaluator(db_path=args.db).worker()
+    if args.interval is not None:
+        worker.interval_seconds = args.interval
+    if args.rescan:
+        for horizon in worker.horizons:
+            worker.repository.reset_watermark(f"evaluation:{horizon}")
+
+    while True:
+        result = worker.run_once()
+        if result is None:
+            print("Could not fetch current price for evaluation.")
+        else:
+            for horizon, count in result.items():
+                print(f"{horizon}: evaluated {count} predictions")
+        if not args.loop:
+            break
+        time.sleep(worker.interval_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Dumps the predictions table for offline analysis.
+
+    python export_predictions.py --format parquet --output predictions.parquet
+    python export_predictions.py --since 2026-01-01 --outcome FAILURE > failures.ndjson
+
+Rows are read through a server-side cursor in fixed-size chunks and written
+as they arrive, so memory stays flat regardless of table size.
+"""
+import argparse
+import os
+import sys
+
+from backend.export import FORMATS, iter_export
+from backend.predictions import OUTCOMES
+from src.logger import stream_predictions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export prediction history.")
+    parser.add_argument("--format", choices=list(FORMATS), default="ndjson")
+    parser.add_argument("--output", "-o", help="File to write (default: stdout; required for parquet)")
+    parser.add_argument("--since", help="Earliest timestamp_utc, inclusive (ISO 8601)")
+    parser.add_argument("--until", help="End of the range, exclusive (ISO 8601)")
+    parser.add_argument("--outcome", choices=list(OUTCOMES), help="Filter on the 1d outcome")
+    parser.add_argument("--summary", action="store_true", help="Skip the input/output JSON payloads")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--db", help="SQLite file (default: gold_analyst.db, or DATABASE_URL if set)")
+    args = parser.parse_args(argv)
+
+    if args.format == "parquet" and not args.output:
+        parser.error("--output is required for parquet")
+
+    full = not args.summary
+    chunks = stream_predictions(
+        args.db, start=args.since, end=args.until, outcome=args.outcome, chunk_size=args.chunk_size, full=full,
+    )
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for data in iter_export(args.format, chunks, full=full):
+            out.write(data)
+    finally:
+        if args.output:
+            out.close()
+    if args.output:
+        print(f"Exported predictions to {os.path.abspath(args.output)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
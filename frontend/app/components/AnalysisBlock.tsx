@@ -11,12 +11,35 @@ interface AnalysisResponse {
     final_action: string;
 }
 
+// Reads the /analyze/stream server-sent events, calling onEvent for each complete frame
+async function readEvents(res: Response, onEvent: (event: string, data: any) => void) {
+    if (!res.ok || !res.body) throw new Error(`Analysis request failed: ${res.status}`);
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const event = frame.match(/^event: (.*)$/m)?.[1];
+            const data = frame.match(/^data: (.*)$/m)?.[1];
+            if (event && data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
 export default function AnalysisBlock() {
-    const [analysis, setAnalysis] = useState<AnalysisResponse | null>(null);
+    // Filled in progressively: recommendation/confidence first, the rest with the final result
+    const [analysis, setAnalysis] = useState<Partial<AnalysisResponse> | null>(null);
     const [loading, setLoading] = useState(false);
 
     const fetchAnalysis = async () => {
         setLoading(true);
+        setAnalysis(null);
         try {
             // Hardcoded dummy payload for now as requested for MVP connectivity
             const payload = {
@@ -27,13 +50,15 @@ export default function AnalysisBlock() {
             };
 
             const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
-            const res = await fetch(`${baseUrl}/analyze`, {
+            const res = await fetch(`${baseUrl}/analyze/stream`, {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
                 body: JSON.stringify(payload),
             });
-            const json = await res.json();
-            setAnalysis(json);
+            await readEvents(res, (event, data) => {
+                if (event === "fields") setAnalysis(prev => ({ ...(prev ?? {}), ...data }));
+                if (event === "result") setAnalysis(data);
+            });
         } catch (err) {
             console.error(err);
         } finally {
@@ -41,7 +66,10 @@ export default function AnalysisBlock() {
         }
     };
 
-    const getActionColor = (action: string) => {
+    // The model's raw recommendation stands in until the mapped action arrives
+    const action = analysis?.final_action ?? analysis?.recommendation;
+
+    const getActionColor = (action?: string) => {
         if (action === "BUY") return "text-emerald-600 border-emerald-200 bg-emerald-50";
         if (action === "SELL") return "text-rose-600 border-rose-200 bg-rose-50";
         return "text-amber-600 border-amber-200 bg-amber-50";
@@ -62,23 +90,23 @@ export default function AnalysisBlock() {
 
             {analysis ? (
                 <div className="flex-1 flex flex-col gap-6 animate-in fade-in slide-in-from-bottom-4 duration-500">
-                    <div className={`p-6 rounded-2xl border flex flex-col items-center justify-center text-center ${getActionColor(analysis.final_action)}`}>
-                        <div className="text-5xl font-bold tracking-tighter">{analysis.final_action}</div>
-                        <div className={`mt-2 font-medium opacity-90`}>Confidence: {analysis.confidence}%</div>
+                    <div className={`p-6 rounded-2xl border flex flex-col items-center justify-center text-center ${getActionColor(action)} ${analysis.final_action ? "" : "opacity-70"}`}>
+                        <div className="text-5xl font-bold tracking-tighter">{action ?? "…"}</div>
+                        <div className={`mt-2 font-medium opacity-90`}>Confidence: {analysis.confidence ?? "…"}%</div>
                     </div>
 
                     <div className="space-y-4">
                         <div>
                             <div className="text-slate-500 text-xs uppercase tracking-wider font-semibold mb-1">Brief Rationale</div>
-                            <div className="text-slate-800 text-lg leading-snug">{analysis.rationale_brief}</div>
+                            <div className="text-slate-800 text-lg leading-snug">{analysis.rationale_brief ?? "…"}</div>
                         </div>
                         <div>
                             <div className="text-slate-500 text-xs uppercase tracking-wider font-semibold mb-1">Technical Deep Dive</div>
-                            <div className="text-slate-600 text-sm leading-relaxed">{analysis.rationale_technical}</div>
+                            <div className="text-slate-600 text-sm leading-relaxed">{analysis.rationale_technical ?? "…"}</div>
                         </div>
                         <div className="pt-4 border-t border-slate-100 flex justify-between items-center">
                             <span className="text-slate-500 text-sm">Risk Tier</span>
-                            <span className="text-slate-700 font-medium bg-slate-100 px-3 py-1 rounded-lg border border-slate-200">{analysis.suggested_risk_tier}</span>
+                            <span className="text-slate-700 font-medium bg-slate-100 px-3 py-1 rounded-lg border border-slate-200">{analysis.suggested_risk_tier ?? "…"}</span>
                         </div>
                     </div>
                 </div>
@@ -1,87 +1,190 @@
-from typing import TypedDict, Optional
-from langgraph.graph import StateGraph, END
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import SystemMessage, HumanMessage
+import asyncio
+from typing import TypedDict, Optional, Any, Dict
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import CachePolicy
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from tools import fetch_gold_price, fetch_market_news
+from backend.config import get_section
+from backend.graph_cache import SqliteNodeCache, state_key
+from backend.prompts import encode_payload, format_headlines, record_usage, workflow_prefix
+from backend.services.market_data import get_market_data
+from tools import fetch_market_news
+
+NEWS_QUERY = "Gold price analysis market news today"
+FX_CHAINS = ("usd_egp", "usd_aed")
+WORKFLOW_CONFIG = get_section("workflow")
 
 # Define the state of our workflow
 class AgentState(TypedDict):
+    # Optional inputs: the news query and a timeframe for the analysis
+    query: Optional[str]
+    timeframe: Optional[str]
+    gold_quote: Optional[Any]
+    fx_quotes: Optional[Dict[str, Any]]
     gold_data: Optional[dict]
-    market_news: Optional[str]
+    market_news: Optional[Any]
     analysis: Optional[str]
 
-# Node 1: Fetch Data
-def fetch_data_node(state: AgentState):
-    print("--- Fetching Data ---")
-    price_data = fetch_gold_price()
-    news_data = fetch_market_news(query="Gold price analysis market news today")
-    
-    return {
-        "gold_data": price_data,
-        "market_news": news_data
-    }
-
-# Node 2: Analyze Data (LLM)
+# Fetch branches: price, FX and news run in parallel from START and join
+# before the analyst, so the fetch phase takes as long as the slowest one.
+# Each node has a sync body for invoke() and an async one for ainvoke().
+# Quotes passed in the input state (batch runs share one snapshot) are kept.
+
+def fetch_price_node(state: AgentState):
+    if state.get("gold_quote") is not None:
+        return {}
+    print("--- Fetching Price ---")
+    return {"gold_quote": get_market_data().get_quote("gold_spot")}
+
+async def afetch_price_node(state: AgentState):
+    if state.get("gold_quote") is not None:
+        return {}
+    print("--- Fetching Price ---")
+    return {"gold_quote": await get_market_data().aget_quote("gold_spot")}
+
+def fetch_fx_node(state: AgentState):
+    if state.get("fx_quotes") is not None:
+        return {}
+    print("--- Fetching FX ---")
+    market_data = get_market_data()
+    return {"fx_quotes": {name: market_data.get_quote(name) for name in FX_CHAINS}}
+
+async def afetch_fx_node(state: AgentState):
+    if state.get("fx_quotes") is not None:
+        return {}
+    print("--- Fetching FX ---")
+    market_data = get_market_data()
+    quotes = await asyncio.gather(*(market_data.aget_quote(name) for name in FX_CHAINS))
+    return {"fx_quotes": dict(zip(FX_CHAINS, quotes))}
+
+def fetch_news_node(state: AgentState):
+    print("--- Fetching News ---")
+    return {"market_news": fetch_market_news(query=state.get("query") or NEWS_QUERY)}
+
+async def afetch_news_node(state: AgentState):
+    print("--- Fetching News ---")
+    # DuckDuckGo search has no async client
+    return {"market_news": await asyncio.to_thread(fetch_market_news, query=state.get("query") or NEWS_QUERY)}
+
+# Join: the regional price payload from the gold and FX quotes
+def market_node(state: AgentState):
+    quotes = {"gold_spot": state["gold_quote"], **(state["fx_quotes"] or {})}
+    return {"gold_data": get_market_data().build_snapshot(quotes).to_price_payload()}
+
+# Analyze Data (LLM)
+def build_llm():
+    # LLM SDKs are imported on first use, not when the graph is built
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash-preview-09-2025")
+
+def _analysis_messages(state: AgentState):
+    from langchain_core.messages import SystemMessage, HumanMessage
+
+    timeframe = state.get("timeframe") or "the next few days"
+    # Instructions are a constant prefix; the data is minified with short keys
+    prompt = (
+        f"Timeframe: {timeframe}\n"
+        f"Gold data: {encode_payload(state['gold_data'])}\n"
+        f"News headlines:\n{format_headlines(state['market_news'])}"
+    )
+    return [
+        SystemMessage(content=workflow_prefix()),
+        HumanMessage(content=prompt)
+    ]
+
+def _record_usage(response, messages):
+    record_usage("workflow", response, "".join(message.content for message in messages), response.content)
+
+MISSING_KEY = {"analysis": "Error: GOOGLE_API_KEY not found in environment variables."}
+
 def analyze_node(state: AgentState):
     print("--- Analyzing Data ---")
-    
+
     # Check for API key
     if not os.getenv("GOOGLE_API_KEY"):
-        return {"analysis": "Error: GOOGLE_API_KEY not found in environment variables."}
-        
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-preview-09-2025")
-    
-    gold_data = state["gold_data"]
-    news = state["market_news"]
-    
-    # Format news for LLM
-    news_text = ""
-    if isinstance(news, list):
-        for item in news:
-            news_text += f"- {item.get('title')} ({item.get('source')})\n"
-    else:
-        news_text = str(news)
-    
-    prompt = f"""
-    You are an expert financial analyst specializing in commodities.
-    
-    Here is the latest data for Gold (GLD ETF):
-    {gold_data}
-    
-    Here is the latest market news headlines:
-    {news_text}
-    
-    Based on this, provide a concise analysis:
-    1. Current Trend (Bullish/Bearish/Neutral)
-    2. Key Drivers (from news)
-    3. Recommendation (Buy/Sell/Hold) with confidence level.
-    
-    Keep it professional and actionable.
-    """
-    
-    messages = [
-        SystemMessage(content="You are a senior commodities analyst."),
-        HumanMessage(content=prompt)
-    ]
-    
-    response = llm.invoke(messages)
+        return MISSING_KEY
+
+    messages = _analysis_messages(state)
+    response = build_llm().invoke(messages)
+    _record_usage(response, messages)
     # Return both analysis AND the original news list for the UI
-    return {"analysis": response.content, "market_news": news}
+    return {"analysis": response.content, "market_news": state["market_news"]}
+
+async def aanalyze_node(state: AgentState):
+    print("--- Analyzing Data ---")
+    if not os.getenv("GOOGLE_API_KEY"):
+        return MISSING_KEY
+    messages = _analysis_messages(state)
+    response = await build_llm().ainvoke(messages)
+    _record_usage(response, messages)
+    return {"analysis": response.content, "market_news": state["market_news"]}
+
+def _node(func, afunc=None):
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+_analysis_inputs = state_key("gold_data", "market_news", "timeframe")
+
+def analyst_key(state):
+    # A cached "missing API key" answer must not outlive the missing key
+    return _analysis_inputs(state) + (b"1" if os.getenv("GOOGLE_API_KEY") else b"0")
+
+# Cache keys hash only the state each node reads, so within their TTL all
+# runs share the price and FX entries, and runs with the same query the news.
+NODE_KEYS = {
+    "price": state_key("gold_quote"),
+    "fx": state_key("fx_quotes"),
+    "news": state_key("query"),
+    "market": state_key("gold_quote", "fx_quotes"),
+    "analyst": analyst_key,
+}
+
+def cache_policy(name):
+    ttl = WORKFLOW_CONFIG.get("node_ttl_seconds", {}).get(name)
+    return CachePolicy(key_func=NODE_KEYS[name], ttl=ttl) if ttl else None
+
+def _failed(channel, value):
+    if value is None:
+        return True
+    if channel == "fx_quotes":
+        return any(quote is None for quote in value.values())
+    if channel == "market_news":
+        # fetch_market_news returns a placeholder item carrying "error" when the search fails
+        return not isinstance(value, list) or any("error" in item for item in value)
+    if channel == "gold_data":
+        return not value.get("price_oz_24k")
+    return False
+
+def cacheable_writes(writes):
+    """Failed fetches are not cached, so the next run retries them instead of replaying the failure."""
+    return not any(_failed(channel, value) for channel, value in writes)
+
+def build_cache():
+    """The on-disk node cache from config (None when disabled); main.py compiles the graph with it."""
+    if not WORKFLOW_CONFIG.get("cache_enabled", True):
+        return None
+    return SqliteNodeCache(WORKFLOW_CONFIG.get("cache_path", "data/cache/graph_nodes.db"), cacheable=cacheable_writes)
 
 # Build the Graph
 workflow = StateGraph(AgentState)
 
-workflow.add_node("fetcher", fetch_data_node)
-workflow.add_node("analyst", analyze_node)
+workflow.add_node("price", _node(fetch_price_node, afetch_price_node), cache_policy=cache_policy("price"))
+workflow.add_node("fx", _node(fetch_fx_node, afetch_fx_node), cache_policy=cache_policy("fx"))
+workflow.add_node("news", _node(fetch_news_node, afetch_news_node), cache_policy=cache_policy("news"))
+workflow.add_node("market", market_node, cache_policy=cache_policy("market"))
+workflow.add_node("analyst", _node(analyze_node, aanalyze_node), cache_policy=cache_policy("analyst"))
 
-workflow.set_entry_point("fetcher")
-workflow.add_edge("fetcher", "analyst")
+for branch in ("price", "fx", "news"):
+    workflow.add_edge(START, branch)
+# A list of sources waits for all of them before running the target
+workflow.add_edge(["price", "fx"], "market")
+workflow.add_edge(["market", "news"], "analyst")
 workflow.add_edge("analyst", END)
 
+# Policies only apply when the graph is compiled with a cache, so importing
+# this module has no side effects; main.py compiles with build_cache()
 app = workflow.compile()
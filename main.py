@@ -1,21 +1,115 @@
-from graph import app
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+import time
+
+from graph import FX_CHAINS, app, build_cache, get_market_data, workflow
+
+def read_runs(path):
+    """
+    One run per line: a plain news query, or a JSON object with "query"
+    and optionally "timeframe". Blank lines and # comments are skipped.
+    """
+    runs = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                params = json.loads(line)
+                runs.append({"query": params.get("query"), "timeframe": params.get("timeframe")})
+            else:
+                runs.append({"query": line, "timeframe": None})
+    return runs
+
+async def shared_quotes():
+    """One price/FX snapshot for the whole batch instead of a fetch per run."""
+    market_data = get_market_data()
+    gold, *fx = await asyncio.gather(
+        market_data.aget_quote("gold_spot"), *(market_data.aget_quote(name) for name in FX_CHAINS)
+    )
+    return {"gold_quote": gold, "fx_quotes": dict(zip(FX_CHAINS, fx))}
+
+async def run_batch(runs, concurrency, out, graph_app=None):
+    """
+    Runs the graph once per query, at most `concurrency` at a time, and
+    writes one NDJSON line per run as soon as it finishes.
+    """
+    graph_app = graph_app or app
+    shared = await shared_quotes()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index, params):
+        async with semaphore:
+            start = time.perf_counter()
+            record = {"index": index, **params}
+            try:
+                result = await graph_app.ainvoke({**params, **shared})
+                record["analysis"] = result.get("analysis")
+                record["gold_price"] = (result.get("gold_data") or {}).get("price_oz_24k")
+                news = result.get("market_news")
+                record["headlines"] = [item.get("title") for item in news] if isinstance(news, list) else []
+            except Exception as e:
+                record["error"] = str(e)
+            record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            return record
+
+    for finished in asyncio.as_completed([run(index, params) for index, params in enumerate(runs)]):
+        out.write(json.dumps(await finished) + "\n")
+        out.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the gold analysis workflow once, or over a batch of queries.")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Run the graph with ainvoke on an event loop")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Clear cached node outputs first, so every node reruns")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Run every query in FILE (text or JSON lines) and print NDJSON results")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batch runs in flight at once")
+    parser.add_argument("--output", help="Write batch results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    node_cache = build_cache()
+    if args.refresh and node_cache is not None:
+        node_cache.clear()
+    graph_app = workflow.compile(cache=node_cache) if node_cache is not None else app
+
+    if args.batch:
+        runs = read_runs(args.batch)
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            out = stack.enter_context(open(args.output, "w")) if args.output else sys.stdout
+            # Node progress lines go to stderr so stdout stays valid NDJSON
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+            asyncio.run(run_batch(runs, max(1, args.concurrency), out, graph_app))
+        print(f"Completed {len(runs)} runs in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        return
 
-def main():
     print("Starting Gold Analysis Workflow...")
     print("-----------------------------------")
-    
+
     # Initialize with empty state
     initial_state = {}
-    
-    # Run the graph
-    result = app.invoke(initial_state)
-    
+
+    # Run the graph; price, FX and news are fetched in parallel either way
+    start = time.perf_counter()
+    if args.use_async:
+        result = asyncio.run(graph_app.ainvoke(initial_state))
+    else:
+        result = graph_app.invoke(initial_state)
+    elapsed = time.perf_counter() - start
+
     print("\n--- FINAL ANALYSIS ---")
     print(result.get("analysis", "No analysis generated."))
-    
+
     print("\n--- RAW DATA ---")
     print(f"Gold Data: {result.get('gold_data')}")
     # print(f"News: {result.get('market_news')}") # Uncomment to see full news
+    print(f"\nCompleted in {elapsed:.2f}s")
 
 if __name__ == "__main__":
     main()
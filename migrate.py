@@ -1,31 +1,10 @@
-import sqlite3
-import os
+from backend.predictions import get_repository
 
-DB_NAME = "gold_analyst.db"
-
-def migrate():
+def migrate(db_path=None):
     """Creates the necessary tables for the Gold Analyst app."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # Create predictions table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS predictions (
-        id TEXT PRIMARY KEY,
-        timestamp_utc TEXT,
-        gld_price REAL,
-        xau_price REAL,
-        input_json TEXT,
-        model_output_json TEXT,
-        horizon_1d_outcome TEXT,
-        horizon_7d_outcome TEXT,
-        horizon_30d_outcome TEXT
-    )
-    """)
-    
-    conn.commit()
-    conn.close()
-    print(f"Database '{DB_NAME}' migrated successfully.")
+    get_repository(db_path).create_schema()
+    print(f"Database '{db_path or 'default'}' migrated successfully.")
 
 if __name__ == "__main__":
+    # DATABASE_URL if set, else gold_analyst.db
     migrate()
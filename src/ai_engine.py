@@ -1,8 +1,7 @@
 import os
 import json
 import yaml
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import SystemMessage, HumanMessage
+from backend.prompts import analyst_prompt, record_usage
 
 # Load config
 try:
@@ -15,67 +14,28 @@ class GoldAnalystEngine:
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_API_KEY")
         self.model_name = "gemini-2.5-flash-preview-09-2025" # Using Flash for speed/cost
+        # Imported here so importing this module stays cheap on cold start
+        from langchain_google_genai import ChatGoogleGenerativeAI
         self.llm = ChatGoogleGenerativeAI(model=self.model_name, temperature=0.0) # Deterministic
         
     def analyze(self, gld_data, xau_data):
         if not self.api_key:
             return self._mock_response("Error: Missing GOOGLE_API_KEY")
             
-        # Construct Input JSON
-        input_payload = {
-            "timestamp_utc": gld_data.get("timestamp_utc"),
-            "assets": {
-                "GLD": gld_data,
-                "XAU": xau_data
-            },
-            "derived": {
-                "recent_trend_slope": 0.0, # Placeholder for advanced logic
-                "short_volatility": 0.0,   # Placeholder
-                "notes": "Analyze based on price action and technicals."
-            },
-            "config": {
-                "risk_tiers": list(config.get("risk_tiers", {}).keys()),
-                "mapping_thresholds": config.get("mapping_thresholds", {})
-            }
-        }
-        
-        # System Prompt
-        system_prompt = """
-        You are an expert Gold Analyst AI.
-        Your task is to provide ultra-minimal Buy/Hold/Sell recommendations for Gold.
-        
-        Tone: Ultra-minimal, direct, professional.
-        Output: STRICT JSON only. No markdown, no preamble.
-        
-        Required Output Schema:
-        {
-          "recommendation": "BUY|HOLD|SELL",
-          "confidence": <float 0-100>,
-          "rationale_brief": "One-line ultra-minimal explanation (max 20 words)",
-          "rationale_technical": "One short paragraph technical rationale (max 80 words)",
-          "suggested_risk_tier": "Conservative|Moderate|Aggressive"
-        }
-        
-        Rules:
-        1. If confidence < 50%, include a calibration sentence in rationale.
-        2. Never promise returns.
-        3. Be deterministic based on the provided data.
-        """
-        
-        # User Prompt
-        user_prompt = f"""
-        Analyze this market data:
-        {json.dumps(input_payload, indent=2)}
-        """
+        # Constant instructions/schema/config go in a system prefix built once;
+        # only the market data is encoded per call (minified, short keys)
+        prompt = analyst_prompt(gld_data, xau_data, config)
         
         try:
+            from langchain_core.messages import SystemMessage, HumanMessage
             messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=user_prompt)
+                SystemMessage(content=prompt.system),
+                HumanMessage(content=prompt.user)
             ]
             
             response = self.llm.invoke(messages)
             content = response.content.strip()
+            record_usage("analysis", response, prompt.system + prompt.user, content)
             
             # Clean up if model adds markdown code blocks
             if content.startswith("```json"):
@@ -91,7 +51,7 @@ class GoldAnalystEngine:
             output_json["position_size"] = self._get_position_size(output_json.get("suggested_risk_tier"))
             
             return {
-                "input": input_payload,
+                "input": prompt.payload,
                 "output": output_json
             }
             
@@ -1,46 +1,22 @@
-import sqlite3
-import uuid
-from datetime import datetime
-import json
+from backend.predictions import DEFAULT_DB_PATH as DB_NAME, get_repository
 
-DB_NAME = "gold_analyst.db"
+def repository_for(db_path=None):
+    # DATABASE_URL (Postgres in production) selects the shared backend engine;
+    # locally predictions stay in the existing SQLite file (see get_repository)
+    return get_repository(db_path)
 
-def log_prediction(gld_price, xau_price, input_data, model_output):
+def log_prediction(gld_price, xau_price, input_data, model_output, db_path=None):
     """
     Logs a new prediction to the database.
     Returns the prediction ID.
     """
-    prediction_id = str(uuid.uuid4())
-    timestamp = datetime.utcnow().isoformat() + "Z"
-    
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-    INSERT INTO predictions (
-        id, timestamp_utc, gld_price, xau_price, input_json, model_output_json
-    ) VALUES (?, ?, ?, ?, ?, ?)
-    """, (
-        prediction_id,
-        timestamp,
-        gld_price,
-        xau_price,
-        json.dumps(input_data),
-        json.dumps(model_output)
-    ))
-    
-    conn.commit()
-    conn.close()
-    return prediction_id
+    return repository_for(db_path).add(gld_price, xau_price, input_data, model_output)
 
-def get_recent_predictions(limit=10):
-    """Fetches recent predictions for display or evaluation."""
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM predictions ORDER BY timestamp_utc DESC LIMIT ?", (limit,))
-    rows = [dict(row) for row in cursor.fetchall()]
-    
-    conn.close()
+def get_recent_predictions(limit=10, db_path=None, full=True):
+    """Fetches recent predictions for display or evaluation (newest first)."""
+    rows, _ = repository_for(db_path).page(limit=limit, full=full)
     return rows
+
+def stream_predictions(db_path=None, **filters):
+    """Chunks of predictions, oldest first (see PredictionRepository.stream)."""
+    return repository_for(db_path).stream(**filters)
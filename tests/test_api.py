@@ -0,0 +1,637 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.services.news as news
+from backend.main import app, snapshots
+from backend.responses import choose_encoding
+from backend.profiling import phase
+
+client = TestClient(app)
+
+NEWS = [
+    {"title": f"Gold headline {i} " + "x" * 100, "link": f"https://example.com/{i}", "source": "Wire", "date": "2026-10-19"}
+    for i in range(5)
+]
+
+@pytest.fixture(autouse=True)
+def clear_snapshots():
+    snapshots.clear()
+    yield
+    snapshots.clear()
+
+# --- Response Encoding Tests ---
+def test_choose_encoding():
+    assert choose_encoding(None) is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip") == "gzip"
+    assert choose_encoding("gzip, br;q=0") == "gzip"
+    assert choose_encoding("*;q=0") is None
+
+def test_news_snapshot_is_cached_and_compressed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(news, "fetch_market_news", lambda: calls.append(1) or NEWS)
+
+    first = client.get("/news", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/news", headers={"Accept-Encoding": "gzip"})
+
+    assert len(calls) == 1
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.json() == second.json() == NEWS
+    assert client.get("/news", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]}).status_code == 304
+    # Each encoding is its own representation with its own validator
+    plain = client.get("/news", headers={"Accept-Encoding": "identity", "If-None-Match": first.headers["etag"]})
+    assert plain.status_code == 200 and plain.headers["etag"] != first.headers["etag"]
+    assert "Accept-Encoding" in plain.headers["vary"]
+
+def test_news_placeholder_is_not_cached(monkeypatch):
+    calls = []
+    placeholder = [{"title": "News Unavailable", "source": "System", "link": "#", "error": "boom"}]
+    monkeypatch.setattr(news, "fetch_market_news", lambda: calls.append(1) or placeholder)
+
+    client.get("/news")
+    body = client.get("/news").json()
+
+    assert len(calls) == 2
+    assert "error" not in body[0]
+
+# --- Metrics Tests ---
+def test_metrics_endpoint_reports_routes_and_cache(monkeypatch):
+    monkeypatch.setattr(news, "fetch_market_news", lambda: NEWS)
+    client.get("/news")
+    client.get("/news")
+
+    response = client.get("/metrics")
+    body = response.text
+
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'gold_http_request_duration_seconds_count{method="GET",route="/news",status="200"}' in body
+    assert 'gold_cache_requests_total{cache="snapshot:news",result="hit"}' in body
+    assert 'le="+Inf"' in body
+
+# --- Server-Timing / Profiling Tests ---
+def test_server_timing_header_lists_phases(monkeypatch):
+    def fake_news():
+        with phase("fetch"):
+            return NEWS
+    monkeypatch.setattr(news, "fetch_market_news", fake_news)
+
+    header = client.get("/news").headers["server-timing"]
+
+    assert header.startswith("fetch;dur=")
+    assert "total;dur=" in header
+
+def test_debug_header_writes_profile(tmp_path):
+    from fastapi import FastAPI
+    from backend.profiling import ServerTimingMiddleware
+
+    profiled = FastAPI()
+    profiled.add_middleware(ServerTimingMiddleware, output_dir=str(tmp_path), interval_ms=1, debug_token="secret")
+
+    @profiled.get("/slow")
+    def slow():
+        import time
+        time.sleep(0.05)
+        return {"ok": True}
+
+    profiled_client = TestClient(profiled)
+    profiled_client.get("/slow")
+    assert list(tmp_path.iterdir()) == []
+
+    profiled_client.get("/slow", headers={"X-Debug-Profile": "wrong"})
+    assert list(tmp_path.iterdir()) == []
+
+    profiled_client.get("/slow", headers={"X-Debug-Profile": "secret"})
+    profiles = list(tmp_path.iterdir())
+    assert len(profiles) == 1
+    assert "slow" in profiles[0].read_text()
+
+    # Without a configured token the header is refused
+    from starlette.datastructures import Headers
+    assert not ServerTimingMiddleware(profiled)._should_profile(Headers({"X-Debug-Profile": "1"}))
+
+# --- Price Post-processing Tests ---
+def test_price_payload_from_recorded_history():
+    import os
+    import json
+    import pandas as pd
+    from backend.services.market_data import MarketSnapshot, quote_from_chart
+    fixtures_dir = os.path.join(os.path.dirname(__file__), "fixtures")
+    spot = pd.read_csv(os.path.join(fixtures_dir, "gc_f_history.csv"), index_col=0)
+    forex = pd.read_csv(os.path.join(fixtures_dir, "forex_history.csv"), header=[0, 1], index_col=0)
+
+    def chart(columns):
+        bars = {field.lower(): columns(field).tolist() for field in ("Open", "High", "Low", "Close")}
+        return json.dumps({"chart": {"result": [{"indicators": {"quote": [bars]}}]}}).encode()
+
+    snapshot = MarketSnapshot(
+        gold=quote_from_chart(chart(lambda field: spot[field]), "GC=F", "Live Futures (GC=F)"),
+        usd_egp=quote_from_chart(chart(lambda field: forex[field]["EGP=X"]), "EGP=X"),
+        usd_aed=quote_from_chart(chart(lambda field: forex[field]["AED=X"]), "AED=X"),
+    )
+    payload = snapshot.to_price_payload()
+
+    assert payload["asset"] == "Gold (Live Futures (GC=F))"
+    assert payload["price_oz_24k"] == 2668.2
+    assert payload["daily_change_oz"] == 12.4
+    assert payload["rates"] == {"USD/EGP": 48.61, "USD/AED": 3.67}
+    assert payload["egypt"]["Troy Ounce"] == round(2668.2 * 48.61, 2)
+
+def test_market_data_chain_falls_back_in_order():
+    from backend.metrics import FALLBACKS
+    from backend.services.market_data import MarketDataService, ProviderRegistry, QuoteProvider, Quote, StaticQuoteProvider
+
+    class Down(QuoteProvider):
+        name = "down"
+
+        def get_quote(self, symbol, label=None):
+            raise ConnectionError("upstream unreachable")
+
+    class Futures(QuoteProvider):
+        name = "futures"
+        calls = 0
+
+        def get_quote(self, symbol, label=None):
+            Futures.calls += 1
+            return Quote(symbol=symbol, price=2668.2, open=2655.8, prev_close=2655.8, source=label, provider=self.name)
+
+    registry = ProviderRegistry()
+    registry.register("down", Down)
+    registry.register("futures", Futures)
+    registry.register("static", StaticQuoteProvider)
+    service = MarketDataService(registry, {
+        "gold_spot": [{"provider": "down"}, {"provider": "futures", "symbol": "GC=F", "label": "Live Futures (GC=F)"}],
+        "usd_egp": [{"provider": "down"}, {"provider": "static", "price": 48.61}],
+        "usd_aed": [{"provider": "static", "price": 3.67}],
+    })
+    before = FALLBACKS.value(kind="gold_spot:futures")
+
+    payload = service.get_snapshot().to_price_payload()
+    service.get_snapshot()
+
+    assert payload["asset"] == "Gold (Live Futures (GC=F))"
+    assert payload["daily_change_oz"] == 12.4
+    assert payload["rates"] == {"USD/EGP": 48.61, "USD/AED": 3.67}
+    assert Futures.calls == 1
+    assert FALLBACKS.value(kind="gold_spot:futures") == before + 1
+
+def test_market_data_breaker_and_hedging():
+    import time
+    from backend.services.market_data import MarketDataService, ProviderRegistry, QuoteProvider, Quote
+
+    calls = {"flaky": 0, "slow": 0}
+
+    class Flaky(QuoteProvider):
+        def get_quote(self, symbol, label=None):
+            calls["flaky"] += 1
+            raise TimeoutError("read timed out")
+
+    class Slow(QuoteProvider):
+        def get_quote(self, symbol, label=None):
+            calls["slow"] += 1
+            time.sleep(0.5)
+            return Quote(symbol=symbol, price=1.0, source="slow", provider="slow")
+
+    class Fast(QuoteProvider):
+        def get_quote(self, symbol, label=None):
+            return Quote(symbol=symbol, price=2.0, source="fast", provider="fast")
+
+    registry = ProviderRegistry()
+    for name, provider in (("flaky", Flaky), ("slow", Slow), ("fast", Fast)):
+        registry.register(name, provider)
+    service = MarketDataService(
+        registry,
+        {"flaky_chain": [{"provider": "flaky"}, {"provider": "fast"}], "slow_chain": [{"provider": "slow"}, {"provider": "fast"}]},
+        cache_ttl_seconds=0,
+        breaker_config={"failure_threshold": 2, "cooldown_seconds": 60},
+        hedging_config={"enabled": True, "default_delay_ms": 50, "min_delay_ms": 10},
+    )
+
+    for _ in range(4):
+        assert service.get_quote("flaky_chain").source == "fast"
+    assert calls["flaky"] == 2
+    assert service.breakers["flaky"].state == "open"
+
+    start = time.perf_counter()
+    assert service.get_quote("slow_chain").source == "fast"
+    assert time.perf_counter() - start < 0.4
+    assert calls["slow"] == 1
+
+def test_last_resort_providers_are_not_hedged():
+    import asyncio
+    import time
+    from backend.services.market_data import MarketDataService, ProviderRegistry, QuoteProvider, Quote, StaticQuoteProvider
+
+    class SlowYahoo(QuoteProvider):
+        def get_quote(self, symbol, label=None):
+            time.sleep(0.3)
+            return Quote(symbol=symbol, price=48.61, source="Yahoo", provider="yahoo")
+
+    class Empty(QuoteProvider):
+        def get_quote(self, symbol, label=None):
+            return None
+
+    registry = ProviderRegistry()
+    registry.register("yahoo", SlowYahoo)
+    registry.register("empty", Empty)
+    registry.register("static", StaticQuoteProvider)
+    service = MarketDataService(
+        registry,
+        {
+            "usd_egp": [{"provider": "yahoo", "symbol": "EGP=X"}, {"provider": "static", "price": 50.5}],
+            "empty_chain": [{"provider": "empty"}, {"provider": "static", "price": 50.5}],
+        },
+        cache_ttl_seconds=0,
+        breaker_config={"failure_threshold": 2, "cooldown_seconds": 60},
+        hedging_config={"enabled": True, "default_delay_ms": 50, "min_delay_ms": 10},
+    )
+
+    assert service.get_quote("usd_egp").price == 48.61
+    assert asyncio.run(service.aget_quote("usd_egp")).price == 48.61
+
+    # Answering with nothing counts against the breaker, and isn't a latency sample
+    for _ in range(3):
+        assert service.get_quote("empty_chain").provider == "static"
+    assert service.breakers["empty"].state == "open"
+    assert not service.latencies["empty"].samples
+
+def test_async_snapshot_reads_yahoo_chart_json():
+    import asyncio
+    import httpx
+    from backend.services.market_data import MarketDataService, YahooQuoteProvider, ProviderRegistry, StaticQuoteProvider
+
+    def chart(request):
+        symbol = request.url.path.rsplit("/", 1)[-1]
+        closes = {"GC=F": [2655.8, None, 2668.2], "EGP=X": [48.5, 48.6, 48.61]}[symbol]
+        bars = {"open": [c and c - 1 for c in closes], "high": closes, "low": closes, "close": closes}
+        bars["open"][-1] = 2655.8 if symbol == "GC=F" else 48.6
+        return httpx.Response(200, json={"chart": {"result": [{"indicators": {"quote": [bars]}}], "error": None}})
+
+    registry = ProviderRegistry()
+    registry.register("yahoo", lambda: YahooQuoteProvider(chart_base_url="https://chart.test"))
+    registry.register("static", StaticQuoteProvider)
+    service = MarketDataService(registry, {
+        "gold_spot": [{"provider": "yahoo", "symbol": "GC=F", "label": "Live Futures (GC=F)"}],
+        "usd_egp": [{"provider": "yahoo", "symbol": "EGP=X"}],
+        "usd_aed": [{"provider": "static", "price": 3.67}],
+    })
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(chart)) as http_client:
+            service.http_client = http_client
+            return await service.aget_snapshot()
+
+    snapshot = asyncio.run(run())
+    assert snapshot.gold.price == 2668.2
+    assert snapshot.gold.prev_close == 2655.8  # the null bar is skipped
+    assert snapshot.to_price_payload()["daily_change_oz"] == 12.4
+    assert snapshot.usd_egp.price == 48.61
+
+# --- Health Monitor Tests ---
+def test_health_monitor_reports_per_dependency_status():
+    import asyncio
+    from backend.health import HealthMonitor
+
+    async def ok():
+        pass
+
+    async def down():
+        raise RuntimeError("connection refused")
+
+    async def hangs():
+        await asyncio.sleep(1)
+
+    monitor = HealthMonitor(timeout_seconds=0.05, critical=["database"])
+    monitor.register("database", ok)
+    monitor.register("yahoo", down)
+    monitor.register("gemini", hangs)
+
+    assert monitor.readiness()["status"] == "not_ready"
+    asyncio.run(monitor.run_once())
+    readiness = monitor.readiness()
+
+    assert readiness["status"] == "ready"
+    assert readiness["dependencies"]["database"]["ok"] is True
+    assert readiness["dependencies"]["yahoo"]["error"] == "connection refused"
+    assert "timed out" in readiness["dependencies"]["gemini"]["error"]
+    assert readiness["dependencies"]["gemini"]["latency_ms"] >= 50
+
+    monitor.register("database", down)
+    asyncio.run(monitor.run_once())
+    assert monitor.readiness()["status"] == "not_ready"
+
+def test_root_does_not_touch_database():
+    body = client.get("/").json()
+    assert body["message"] == "Gold Analyst AI API is running"
+    assert body["database"].startswith("Disconnected: health check pending")
+
+# --- History Tests ---
+def test_resample_and_lttb():
+    import numpy as np
+    from backend.services.history import Bars, resample, lttb_indices
+
+    # Two weeks of daily bars starting Monday 2026-10-05
+    t = np.arange(14, dtype=np.int64) * 86400 + np.datetime64("2026-10-05", "s").astype(np.int64)
+    close = np.arange(14, dtype=np.float64) + 100
+    bars = Bars(t, close - 0.5, close + 1, close - 1, close, np.ones(14, dtype=np.int64))
+    weekly = resample(bars, "1wk")
+    assert len(weekly) == 2
+    assert weekly.open.tolist() == [99.5, 106.5]
+    assert weekly.close.tolist() == [106.0, 113.0]
+    assert weekly.high.tolist() == [107.0, 114.0]
+    assert weekly.volume.tolist() == [7, 7]
+
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 50)
+    y[500] = 10  # a spike LTTB must keep
+    index = lttb_indices(x, y, 100)
+    assert len(index) == 100
+    assert index[0] == 0 and index[-1] == 999
+    assert 500 in index
+    assert np.all(np.diff(index) > 0)
+
+def test_history_endpoint_downsamples_and_caches(monkeypatch, tmp_path):
+    import time
+    import numpy as np
+    import backend.services.history as history
+    import backend.services.rollups as rollups
+
+    calls = []
+
+    async def fake_fetch(symbol, range_, interval):
+        calls.append((symbol, range_, interval))
+        n = 2000
+        t = int(time.time()) // 86400 * 86400 - np.arange(n, 0, -1, dtype=np.int64) * 86400
+        close = np.linspace(1800, 2600, n)
+        return history.Bars(t, close, close + 5, close - 5, close, np.zeros(n, dtype=np.int64))
+
+    monkeypatch.setattr(history, "fetch_bars", fake_fetch)
+    monkeypatch.setattr(rollups, "_store", rollups.RollupStore(str(tmp_path)))
+
+    body = client.get("/history", params={"range": "10y", "interval": "1d", "points": 200}).json()
+    assert body["bars"] == 2000
+    assert body["points"] == 200
+    assert len(body["close"]) == 200
+    client.get("/history", params={"range": "10y", "interval": "1d", "points": 200})
+    # Other ranges and intervals are served from the same materialized rollups
+    monthly = client.get("/history", params={"range": "5y", "interval": "auto", "points": 24}).json()
+    assert monthly["interval"] == "1mo"
+    assert client.get("/stats", params={"range": "5y"}).json()["resolution"] == "1mo"
+    assert len(calls) == 1
+
+    assert client.get("/history", params={"range": "7y"}).status_code == 400
+    assert client.get("/history", params={"symbol": "NOPE"}).status_code == 400
+    assert client.get("/stats", params={"symbol": "NOPE"}).status_code == 400
+    assert client.get("/history", params={"range": "5y", "interval": "1h"}).status_code == 400
+
+def test_rollups_update_incrementally():
+    import numpy as np
+    from backend.services.history import Bars
+    from backend.services.rollups import SymbolRollups
+
+    # 60 trading days of random-walk daily closes, starting Monday 2026-01-05
+    rng = np.random.default_rng(7)
+    start = int(np.datetime64("2026-01-05", "s").astype(np.int64))
+    t = start + np.arange(60, dtype=np.int64) * 86400
+    close = 2600 * np.exp(np.cumsum(rng.normal(0, 0.01, 60)))
+    bars = Bars(t, close, close * 1.01, close * 0.99, close, np.full(60, 100, dtype=np.int64))
+
+    whole = SymbolRollups("GC=F")
+    whole.add(bars, base="1d")
+    pieces = SymbolRollups("GC=F")
+    for lo in range(0, 60, 7):
+        pieces.add(bars.take(np.arange(lo, min(lo + 7, 60))), base="1d")
+    pieces.add(bars, base="1d")  # a replay only re-applies the newest bar
+
+    for name in ("1d", "1wk", "1mo"):
+        for column in ("t", "open", "high", "low", "close", "volume", "var_sum", "n"):
+            np.testing.assert_allclose(whole.levels[name][column], pieces.levels[name][column])
+
+    daily_returns = np.diff(np.log(close))
+    stats = pieces.stats(min_buckets=2)
+    assert stats["resolution"] == "1mo"
+    assert stats["buckets"] == 3
+    assert stats["observations"] == 59
+    assert stats["volume"] == 6000
+    expected_vol = np.sqrt(np.mean(daily_returns ** 2) * 252) * 100
+    assert abs(stats["realized_vol_pct"] - expected_vol) < 0.01
+
+    # Yahoo revises the forming daily bar under the same timestamp
+    revised = bars.take(np.array([59]))
+    revised.close, revised.high = revised.close * 1.02, revised.high * 1.02
+    pieces.add(revised, base="1d")
+    assert len(pieces.levels["1d"]["t"]) == 60
+    assert pieces.levels["1d"]["close"][-1] == pieces.levels["1mo"]["close"][-1] == revised.close[0]
+    assert pieces.levels["1mo"]["high"][-1] == max(revised.high[0], bars.high[bars.t >= pieces.levels["1mo"]["t"][-1]].max())
+    assert pieces.levels["1mo"]["volume"][-1] == whole.levels["1mo"]["volume"][-1]
+
+def test_daily_backfill_runs_after_minute_ingestion(monkeypatch, tmp_path):
+    import asyncio
+    import numpy as np
+    import backend.services.history as history
+    from backend.services.history import Bars
+    from backend.services.rollups import RollupStore
+
+    now = int(np.datetime64("2026-03-02T15:00", "s").astype(np.int64))
+    minutes = np.arange(now - 3600, now, 60, dtype=np.int64)
+    ones = np.ones(len(minutes))
+    days = np.arange(now - 29 * 86400, now, 86400, dtype=np.int64) // 86400 * 86400
+    closes = np.linspace(2600, 2650, len(days))
+    calls = []
+
+    async def fake_fetch(symbol, range_, interval):
+        calls.append(range_)
+        return Bars(days, closes, closes + 5, closes - 5, closes, np.full(len(days), 100, dtype=np.int64))
+
+    monkeypatch.setattr(history, "fetch_bars", fake_fetch)
+    store = RollupStore(str(tmp_path))
+    # The recorder has already pushed today's minutes
+    store.get("GC=F").add(Bars(minutes, 2650 * ones, 2651 * ones, 2649 * ones, 2650 * ones, np.ones(len(minutes), dtype=np.int64)))
+
+    rollups = asyncio.run(store.ensure_daily("GC=F"))
+    assert calls == ["max"]
+    assert len(rollups.levels["1d"]["t"]) == len(days)
+    asyncio.run(store.ensure_daily("GC=F"))
+    assert calls == ["max"]
+
+def test_stale_daily_rollups_are_topped_up_without_a_gap(monkeypatch, tmp_path):
+    import asyncio
+    import time
+    import numpy as np
+    import backend.services.history as history
+    from backend.services.history import Bars
+    from backend.services.rollups import RANGE_SECONDS, RollupStore
+
+    now = int(time.time())
+    days = np.arange(now - 200 * 86400, now, 86400, dtype=np.int64) // 86400 * 86400
+    closes = 2000 + np.arange(len(days)) * 3.0
+    calls = []
+
+    def daily(mask):
+        c = closes[mask]
+        return Bars(days[mask], c, c + 5, c - 5, c, np.full(len(c), 100, dtype=np.int64))
+
+    async def fake_fetch(symbol, range_, interval):
+        calls.append(range_)
+        span = RANGE_SECONDS[range_]
+        return daily(days >= now - span if span else days == days)
+
+    monkeypatch.setattr(history, "fetch_bars", fake_fetch)
+    store = RollupStore(str(tmp_path))
+    # Restored from an old npz: the newest daily bar is 91 days old
+    store.get("GC=F").add(daily(days < now - 91 * 86400), base="1d")
+
+    rollups = asyncio.run(store.ensure_daily("GC=F"))
+    assert calls == ["6mo"]
+    assert np.array_equal(rollups.levels["1d"]["t"], days)
+    assert np.nanmax(np.abs(rollups.levels["1d"]["ret"])) < 0.01
+
+# --- Prediction Export Tests ---
+def test_predictions_export_streams_each_format(monkeypatch, tmp_path):
+    import io
+    import json
+    import pyarrow.parquet as pq
+    import backend.predictions as predictions
+
+    repository = predictions.get_repository(str(tmp_path / "export.db"))
+    repository.create_schema()
+    repository.bulk_insert(
+        {"id": f"p{i:03d}", "timestamp_utc": f"2026-10-{1 + i // 10:02d}T00:00:{i % 10:02d}Z", "gld_price": 245.0 + i,
+         "xau_price": 2660.0, "input_json": "{}", "model_output_json": "{}",
+         "horizon_1d_outcome": "SUCCESS" if i % 3 == 0 else None}
+        for i in range(95)
+    )
+    monkeypatch.setitem(predictions._repositories, None, repository)
+    monkeypatch.setattr("backend.main.predictions_config", {"export_chunk_size": 10})
+
+    response = client.get("/predictions", params={"limit": 5})
+    assert len(response.json()["items"]) == 5
+    assert response.headers["server-timing"].startswith("db;dur=")
+
+    response = client.get("/predictions/export")
+    assert response.headers["server-timing"].startswith("db;dur=")
+    lines = response.text.splitlines()
+    assert len(lines) == 95
+    assert [json.loads(line)["id"] for line in lines[:2]] == ["p000", "p001"]
+
+    csv_body = client.get("/predictions/export", params={
+        "format": "csv", "start": "2026-10-02", "end": "2026-10-05", "outcome": "SUCCESS", "full": "false",
+    }).text
+    header, *rows = csv_body.splitlines()
+    assert "input_json" not in header
+    assert len(rows) == 10  # ids 10..39 divisible by 3
+
+    response = client.get("/predictions/export", params={"format": "parquet", "outcome": "PENDING"})
+    table = pq.read_table(io.BytesIO(response.content))
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    assert table.num_rows == 63
+    assert pq.ParquetFile(io.BytesIO(response.content)).num_row_groups == 7
+
+    assert client.get("/predictions/export", params={"format": "xml"}).status_code == 400
+
+# --- Streaming Analysis Tests ---
+def test_analyze_stream_sends_fields_before_result(monkeypatch):
+    import json
+    import backend.services.llm as llm
+
+    reply = ['{"recommendation": "bu', 'y", "confidence": 8', '5, "rationale_brief": "Breakout.", ',
+             '"rationale_technical": "Above the 20d high.", "suggested_risk_tier": "Moderate"}']
+
+    class Chunk:
+        def __init__(self, text):
+            self.text = text
+
+    class StreamingModel:
+        def generate_content(self, prompt, stream=False, request_options=None):
+            assert stream and '"px":245.92' in prompt
+            assert request_options == {"timeout": engine.stream_timeout_seconds}
+            return [Chunk(text) for text in reply]
+
+    engine = llm.GoldAnalystEngine()
+    engine.model = StreamingModel()
+    monkeypatch.setattr(llm, "_engine", engine)
+
+    response = client.post("/analyze/stream", json={
+        "price": 2668.2, "change_percent": 0.5,
+        "gld_data": {"symbol": "GLD", "price": 245.92}, "xau_data": {"symbol": "XAUUSD", "price": 2668.2},
+    })
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for frame in response.text.strip().split("\n\n"):
+        name, data = frame.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+
+    names = [name for name, _ in events]
+    assert names.count("token") == len(reply)
+    fields = [data for name, data in events if name == "fields"]
+    # The confidence is only reported once the number is complete
+    assert fields == [{"recommendation": "BUY"}, {"confidence": 85.0}]
+    assert names.index("fields") < names.index("result") == len(names) - 1
+    assert events[-1][1]["final_action"] == "BUY"
+    assert events[-1][1]["position_size"] == "1.5% - 3.5%"
+
+def test_stalled_analysis_stream_ends_with_local_model(monkeypatch):
+    import json
+    import time
+    import backend.services.llm as llm
+
+    class Chunk:
+        text = '{"recommendation": "BUY", '
+
+    class StalledModel:
+        def generate_content(self, prompt, stream=False, request_options=None):
+            # The SDK raises once the request timeout passes mid-stream
+            yield Chunk()
+            time.sleep(request_options["timeout"])
+            raise TimeoutError("Deadline Exceeded")
+
+    engine = llm.GoldAnalystEngine()
+    engine.model = StalledModel()
+    engine.stream_timeout_seconds = 0.2
+    monkeypatch.setattr(llm, "_engine", engine)
+
+    response = client.post("/analyze/stream", json={
+        "price": 2668.2, "change_percent": 0.5,
+        "gld_data": {"symbol": "GLD", "price": 245.92}, "xau_data": {"symbol": "XAUUSD", "price": 2668.2},
+    })
+    frames = response.text.strip().split("\n\n")
+    name, data = frames[-1].split("\n")
+    assert name == "event: result"
+    assert json.loads(data[len("data: "):])["source"] == "local_model"
+
+def test_analyze_falls_back_to_local_model_at_deadline(monkeypatch):
+    import threading
+    import time
+    import backend.services.llm as llm
+
+    release = threading.Event()
+    timeouts = []
+
+    class SlowModel:
+        def generate_content(self, prompt, request_options=None):
+            # The SDK gives up at the request timeout; here the test releases it
+            timeouts.append(request_options)
+            release.wait(5)
+            raise RuntimeError("upstream timeout")
+
+    engine = llm.GoldAnalystEngine()
+    engine.model = SlowModel()
+    engine.deadline_seconds = 0.2
+    monkeypatch.setattr(llm, "_engine", engine)
+
+    body = {
+        "price": 2668.2, "change_percent": 1.2,
+        "gld_data": {"symbol": "GLD", "price": 245.92, "pct_change_24h": 1.2},
+        "xau_data": {"symbol": "XAUUSD", "price": 2668.2, "pct_change_24h": 0.9},
+    }
+    start = time.perf_counter()
+    response = client.post("/analyze", json=body)
+    elapsed = time.perf_counter() - start
+    release.set()
+
+    assert response.status_code == 200
+    assert elapsed < 2.0
+    assert timeouts == [{"timeout": 0.2}]
+    result = response.json()
+    assert result["source"] == "local_model"
+    assert result["recommendation"] in ("BUY", "SELL", "HOLD")
+    assert result["position_size"] == "0.5% - 1.5%"
@@ -1,20 +1,36 @@
+import os
 import pytest
 import json
+import pandas as pd
+import yfinance
+from backend.services.market_data import get_market_data
 from src.data_provider import YahooProvider
 from src.ai_engine import GoldAnalystEngine
 from src.evaluator import Evaluator
 
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+class FixtureTicker:
+    """Replays a recorded yfinance history frame instead of hitting the network."""
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, **kwargs):
+        return pd.read_csv(os.path.join(FIXTURES_DIR, "gld_history.csv"), index_col=0)
+
 # --- Data Provider Tests ---
-def test_yahoo_provider_structure():
+def test_yahoo_provider_structure(monkeypatch):
+    monkeypatch.setattr(yfinance, "Ticker", FixtureTicker)
+    get_market_data().clear()
     provider = YahooProvider()
-    # We mock the actual call or just test structure if we can't hit network
-    # For this minimal test, we'll assume network is available or handle None
     data = provider.get_latest("GLD")
-    if data:
-        assert "symbol" in data
-        assert "price" in data
-        assert "timestamp_utc" in data
-        assert isinstance(data["price"], float)
+
+    assert "symbol" in data
+    assert "price" in data
+    assert "timestamp_utc" in data
+    assert isinstance(data["price"], float)
+    assert data["price"] == 245.92
+    assert data["pct_change_24h"] == 0.64
 
 # --- AI Engine Tests ---
 def test_ai_engine_mapping():
@@ -32,9 +48,40 @@ def test_ai_engine_mapping():
     weak_buy = {"recommendation": "BUY", "confidence": 40}
     assert engine._map_recommendation(weak_buy) == "HOLD"
 
+def test_analyst_prompt_is_compact():
+    from backend.metrics import LLM_TOKENS
+    from backend.prompts import analyst_prompt, record_usage
+    from src.ai_engine import config
+
+    gld = {"symbol": "GLD", "price": 245.92, "timestamp_utc": "2026-10-19T12:00:00Z", "pct_change_24h": 0.64,
+           "ohlc": {"open": 244.1, "high": 246.3, "low": 243.87, "close": 245.92}}
+    xau = {"symbol": "XAUUSD", "price": 2668.2, "timestamp_utc": "2026-10-19T12:00:00Z", "pct_change_24h": 0.47, "ohlc": {}}
+    prompt = analyst_prompt(gld, xau, config)
+    assert '"GLD":{"sym":"GLD","px":245.92' in prompt.user
+    assert "ohlc" not in prompt.user.split('"XAU"')[1]
+    # The constant part is built once and shared by every call
+    assert analyst_prompt(xau, gld, config).system is prompt.system
+    assert "mapping_thresholds" not in prompt.user and "confidence_buy" in prompt.system
+
+    # What the engines used to send as the user prompt on every call
+    legacy = json.dumps({
+        "timestamp_utc": gld["timestamp_utc"], "assets": {"GLD": gld, "XAU": xau},
+        "derived": {"recent_trend_slope": 0.0, "short_volatility": 0.0, "notes": "Analyze based on price action and technicals."},
+        "config": {"risk_tiers": list(config.get("risk_tiers", {})), "mapping_thresholds": config.get("mapping_thresholds", {})},
+    }, indent=2)
+    assert len(prompt.user) < len(legacy) / 2
+
+    class Reply:
+        usage_metadata = {"input_tokens": 180, "output_tokens": 60, "input_token_details": {"cache_read": 128}}
+
+    before = LLM_TOKENS.value(operation="test", kind="cached")
+    assert record_usage("test", Reply(), prompt.system + prompt.user).cached_tokens == 128
+    assert LLM_TOKENS.value(operation="test", kind="cached") == before + 128
+    assert record_usage("test", object(), "x" * 400, "y" * 40).input_tokens == 100
+
 # --- Evaluator Tests ---
-def test_evaluator_logic():
-    evaluator = Evaluator()
+def test_evaluator_logic(tmp_path):
+    evaluator = Evaluator(db_path=str(tmp_path / "evaluator.db"))
     evaluator.success_threshold = 0.002 # 0.2%
     
     # Test Buy Success
@@ -60,3 +107,306 @@ def test_evaluator_logic():
     }
     assert evaluator._evaluate_outcome(row_hold, 100.1) == "SUCCESS" # +0.1%
     assert evaluator._evaluate_outcome(row_hold, 100.3) == "FAILURE" # +0.3%
+
+# --- Predictions Repository Tests ---
+def test_app_api_and_evaluator_share_one_prediction_store(monkeypatch, tmp_path):
+    import backend.predictions as predictions
+    from src.logger import log_prediction, repository_for
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setattr(predictions, "DEFAULT_DB_PATH", str(tmp_path / "default.db"))
+    monkeypatch.setattr(predictions, "_repositories", {})
+    repositories = (predictions.get_repository(), repository_for(), Evaluator(provider=object()).repository)
+    assert {str(repo.engine.url) for repo in repositories} == {f"sqlite:///{tmp_path / 'default.db'}"}
+
+    # The schema is created on first use, and a non-numeric confidence is stored as NULL
+    prediction_id = log_prediction(245.0, 2660.0, {}, {"final_action": "HOLD", "confidence": "high"})
+    assert predictions.get_repository().get(prediction_id)["confidence"] is None
+
+def test_prediction_repository_keyset_pages(tmp_path):
+    from backend.predictions import get_repository
+    from migrate import migrate
+    from src.logger import log_prediction, get_recent_predictions
+
+    db_path = str(tmp_path / "predictions.db")
+    migrate(db_path)
+    repository = get_repository(db_path)
+    # 25 rows sharing 5 timestamps, so pages must break ties on id
+    repository.bulk_insert(
+        {"id": f"p{i:02d}", "timestamp_utc": f"2026-10-{10 + i // 5:02d}T00:00:00Z", "gld_price": 245.0,
+         "xau_price": 2660.0, "input_json": "{}", "model_output_json": '{"final_action": "BUY"}'}
+        for i in range(25)
+    )
+    latest_id = log_prediction(246.0, 2670.0, {"assets": {}}, {"final_action": "HOLD"}, db_path=db_path)
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = repository.page(limit=7, cursor=cursor)
+        seen.extend(rows)
+        if cursor is None:
+            break
+    assert len(seen) == 26
+    assert len({row["id"] for row in seen}) == 26
+    assert seen[0]["id"] == latest_id
+    assert [row["id"] for row in seen[1:6]] == ["p24", "p23", "p22", "p21", "p20"]
+    assert "model_output_json" not in seen[0]
+
+    recent = get_recent_predictions(limit=1, db_path=db_path)
+    assert json.loads(recent[0]["model_output_json"]) == {"final_action": "HOLD"}
+
+def test_prediction_payloads_compress_and_archive(tmp_path):
+    import sqlite3
+    from backend.archive import PredictionArchive
+    from backend.predictions import get_repository
+    from migrate import migrate
+
+    # A table from before compressed payloads existed
+    db_path = str(tmp_path / "archive.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE predictions (id TEXT PRIMARY KEY, timestamp_utc TEXT, gld_price REAL, xau_price REAL, "
+                 "input_json TEXT, model_output_json TEXT, horizon_1d_outcome TEXT, horizon_7d_outcome TEXT, horizon_30d_outcome TEXT)")
+    conn.execute("INSERT INTO predictions VALUES ('legacy', '2026-01-15T00:00:00Z', 240, 2600, '{}', "
+                 "'{\"final_action\": \"BUY\", \"confidence\": 80}', 'SUCCESS', NULL, NULL)")
+    conn.commit()
+    conn.close()
+    migrate(db_path)
+
+    repository = get_repository(db_path)
+    output = {"recommendation": "HOLD", "confidence": 60, "final_action": "HOLD", "rationale_brief": "Range-bound " * 20}
+    repository.bulk_insert(
+        {"id": f"p{i:03d}", "timestamp_utc": f"2026-{2 + i // 100:02d}-{1 + i % 28:02d}T00:00:00Z", "gld_price": 245.0,
+         "xau_price": 2660.0, "input_json": json.dumps({"assets": {"GLD": {"price": 245.0 + i}}}),
+         "model_output_json": json.dumps(output), "horizon_1d_outcome": "FAILURE" if i % 2 else None}
+        for i in range(300)
+    )
+    dict_id = repository.train_dictionary()
+    assert dict_id
+    new_id = repository.add(246.0, 2670.0, {"assets": {"GLD": {"price": 246.0}}}, output)
+
+    conn = sqlite3.connect(db_path)
+    input_text, blob = conn.execute("SELECT input_json, output_zst FROM predictions WHERE id = ?", (new_id,)).fetchone()
+    conn.close()
+    assert input_text is None and len(blob) < len(json.dumps(output)) / 3
+    assert json.loads(repository.get(new_id)["model_output_json"]) == output
+    assert json.loads(repository.get("legacy")["model_output_json"])["final_action"] == "BUY"
+
+    archive = PredictionArchive(str(tmp_path / "archive"))
+    counts = archive.archive(repository, cutoff="2026-03-01", chunk_size=64)
+    assert counts == {"2026-01": 1, "2026-02": 100}
+    assert archive.months() == ["2026-01", "2026-02"]
+    assert repository.get("legacy") is None
+    assert sum(len(rows) for rows in archive.stream(start="2026-02-01", outcome="EVALUATED")) == 50
+
+    evaluator = Evaluator(provider=object(), db_path=db_path, archive=archive)
+    assert evaluator.get_metrics()["count"] == 151
+
+# --- Calibration Tests ---
+def test_calibration_report_decomposes_brier():
+    from backend.calibration import ScoredPredictions, calibration_report
+
+    chunks = [
+        {"final_action": ["BUY"] * 4 + ["SELL"] * 4, "confidence": [90, 90, 90, 90, 30, 30, 30, None],
+         "horizon_1d_outcome": ["SUCCESS", "SUCCESS", "SUCCESS", "FAILURE", "SUCCESS", "FAILURE", "FAILURE", None],
+         "horizon_7d_outcome": [None] * 7 + ["SUCCESS"], "horizon_30d_outcome": [None] * 8},
+        {"final_action": [None, "HOLD"], "confidence": [50, 50],
+         "horizon_1d_outcome": ["SUCCESS", "FAILURE"], "horizon_7d_outcome": [None, None], "horizon_30d_outcome": [None, None]},
+    ]
+    report = calibration_report(ScoredPredictions.from_columns(chunks), bins=10)
+
+    assert report["count"] == 9
+    assert report["accuracy"] == round(5 / 9 * 100, 1)
+    parts = report["brier_decomposition"]
+    # Every bin holds a single confidence value, so the decomposition is exact
+    assert abs(parts["reliability"] - parts["resolution"] + parts["uncertainty"] - report["brier_score"]) < 2e-3
+    bins = {b["lower"]: b for b in report["reliability_bins"] if b["count"]}
+    assert bins[0.9]["count"] == 4 and bins[0.9]["observed_frequency"] == 0.75
+    assert bins[0.3]["count"] == 3 and bins[0.5]["count"] == 2
+    assert report["per_action"]["BUY"] == {"count": 4, "accuracy": 75.0}
+    assert report["per_action"]["HOLD"]["count"] == 2
+    assert report["per_horizon"]["7d"] == {"count": 1, "accuracy": 100.0}
+    assert report["per_horizon"]["30d"]["accuracy"] is None
+    assert report["log_loss"] > 0
+
+def test_evaluation_worker_resumes_from_watermark(tmp_path):
+    from datetime import datetime
+    from backend.evaluation import EvaluationWorker
+    from backend.predictions import get_repository
+    from migrate import migrate
+
+    db_path = str(tmp_path / "evaluation.db")
+    migrate(db_path)
+    repository = get_repository(db_path)
+    repository.bulk_insert(
+        {"id": f"p{i:02d}", "timestamp_utc": f"2026-10-{10 + i // 4:02d}T00:00:00Z", "gld_price": 100.0,
+         "xau_price": 2660.0, "input_json": "{}", "model_output_json": '{"final_action": "BUY"}',
+         "horizon_1d_outcome": "FAILURE" if i == 0 else None}
+        for i in range(12)
+    )
+    worker = EvaluationWorker(repository, price_source=lambda: 101.0, chunk_size=3)
+
+    # Oct 10-11 have matured by Oct 12 noon; p00 was already scored
+    assert worker.run_once(now=datetime(2026, 10, 12, 12)) == {"1d": 7}
+    assert repository.get_watermark("evaluation:1d") == ("2026-10-11T00:00:00Z", "p07")
+    assert repository.get("p00")["horizon_1d_outcome"] == "FAILURE"
+    assert repository.get("p01")["horizon_1d_outcome"] == "SUCCESS"
+    # Rerunning, or an overlapping run that started from an older watermark, writes nothing
+    assert worker.run_once(now=datetime(2026, 10, 12, 12)) == {"1d": 0}
+    repository.reset_watermark("evaluation:1d")
+    assert worker.run_once(now=datetime(2026, 10, 12, 12)) == {"1d": 0}
+
+    assert worker.run_once(now=datetime(2026, 10, 13, 12)) == {"1d": 4}
+    assert repository.get_watermark("evaluation:1d") == ("2026-10-12T00:00:00Z", "p11")
+    assert EvaluationWorker(repository, price_source=lambda: None).run_once() is None
+
+def test_local_model_learns_from_evaluated_predictions(tmp_path):
+    import time
+    from backend.archive import PredictionArchive
+    from backend.local_model import LocalAnalystModel, train, training_rows
+    from backend.predictions import get_repository
+    from migrate import migrate
+
+    db_path = str(tmp_path / "local_model.db")
+    migrate(db_path)
+    repository = get_repository(db_path)
+    changes = [(i % 41 - 20) / 10 for i in range(41 * 3)]  # -2.0% .. +2.0%
+    outcomes = {
+        "BUY": lambda c: c > 0.2,
+        "SELL": lambda c: c < -0.2,
+        "HOLD": lambda c: abs(c) < 0.3,
+    }
+    rows = []
+    for i, change in enumerate(changes):
+        action = ("BUY", "SELL", "HOLD")[i // 41]
+        assets = {"GLD": {"price": 245.0, "pct_change_24h": change}, "XAU": {"price": 2660.0, "pct_change_24h": change}}
+        rows.append({"id": f"p{i:03d}", "timestamp_utc": f"2026-10-01T00:{i // 60:02d}:{i % 60:02d}Z",
+                     "gld_price": 245.0, "xau_price": 2660.0, "input_json": json.dumps({"assets": assets}),
+                     "model_output_json": "{}", "final_action": action,
+                     "horizon_1d_outcome": "SUCCESS" if outcomes[action](change) else "FAILURE"})
+    repository.bulk_insert(rows + [{**rows[0], "id": "pending", "horizon_1d_outcome": None}])
+    # Archived predictions still count
+    archive = PredictionArchive(str(tmp_path / "archive"))
+    assert sum(archive.archive(repository, "2026-10-01T00:01:00Z").values()) == 61
+
+    model = train(training_rows(repository, archive))
+    assert model.samples == {"BUY": 41, "SELL": 41, "HOLD": 41}
+    path = str(tmp_path / "models" / "local_analyst.json")
+    model.save(path)
+    model = LocalAnalystModel.load(path)
+
+    def decide(change):
+        return model.analyze({"pct_change_24h": change}, {"pct_change_24h": change})
+
+    assert decide(1.5)["recommendation"] == "BUY"
+    assert decide(-1.5)["recommendation"] == "SELL"
+    assert decide(0.0)["recommendation"] == "HOLD"
+    assert decide(1.5)["source"] == "local_model" and decide(1.5)["confidence"] > 60
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        decide(0.7)
+    assert time.perf_counter() - start < 0.5  # well under a millisecond per call
+
+# --- Workflow Tests ---
+def offline_graph(monkeypatch):
+    """graph.py wired to fixed quotes, canned news and an LLM that echoes its prompt."""
+    import graph
+    from backend.services.market_data import MarketDataService, ProviderRegistry, Quote, QuoteProvider
+
+    class FixedQuotes(QuoteProvider):
+        name = "fixed"
+        calls = []
+
+        def get_quote(self, symbol, label=None):
+            self.calls.append(symbol)
+            return Quote(symbol=symbol, price={"gold_spot": 2660.0, "usd_egp": 48.0}.get(symbol, 3.67),
+                         source="Fixture", provider=self.name)
+
+    class EchoLLM:
+        class Response:
+            def __init__(self, messages):
+                self.content = "HOLD" if "Gold steadies" in messages[-1].content else "missing news"
+
+        def invoke(self, messages):
+            return self.Response(messages)
+
+        async def ainvoke(self, messages):
+            return self.Response(messages)
+
+    registry = ProviderRegistry()
+    registry.register("fixed", FixedQuotes)
+    chains = {name: [{"provider": "fixed", "symbol": name}] for name in ("gold_spot", "usd_egp", "usd_aed")}
+    # No quote cache, so every fetch reaches the provider
+    service = MarketDataService(registry, chains, cache_ttl_seconds=0)
+    news_queries = []
+    monkeypatch.setattr(graph, "get_market_data", lambda: service)
+    monkeypatch.setattr(graph, "fetch_market_news", lambda query=None: news_queries.append(query) or [{"title": "Gold steadies", "source": "Fixture"}])
+    monkeypatch.setattr(graph, "build_llm", EchoLLM)
+    return graph, FixedQuotes.calls, news_queries
+
+def test_graph_fans_out_fetches_and_joins(monkeypatch, tmp_path):
+    import asyncio
+    from backend.graph_cache import SqliteNodeCache
+
+    graph, _, news_queries = offline_graph(monkeypatch)
+    app = graph.workflow.compile()
+    for result in (app.invoke({}), asyncio.run(app.ainvoke({}))):
+        assert result["analysis"] == "HOLD"
+        assert result["gold_data"]["asset"] == "Gold (Fixture)"
+        assert result["gold_data"]["rates"] == {"USD/EGP": 48.0, "USD/AED": 3.67}
+
+    # Node outputs persist across processes; only nodes whose inputs changed rerun
+    news_queries.clear()
+    cache_path = str(tmp_path / "nodes.db")
+    assert graph.workflow.compile(cache=SqliteNodeCache(cache_path)).invoke({})["analysis"] == "HOLD"
+    cached = graph.workflow.compile(cache=SqliteNodeCache(cache_path))
+    result = asyncio.run(cached.ainvoke({}))
+    assert result["analysis"] == "HOLD" and result["gold_data"]["rates"]["USD/EGP"] == 48.0
+    assert len(news_queries) == 1
+    cached.clear_cache(["news"])
+    cached.invoke({})
+    assert len(news_queries) == 2
+
+def test_failed_news_fetch_is_not_cached(monkeypatch, tmp_path):
+    from backend.graph_cache import SqliteNodeCache
+
+    graph, _, _ = offline_graph(monkeypatch)
+    attempts = []
+
+    def flaky_news(query=None):
+        attempts.append(query)
+        if len(attempts) == 1:
+            return [{"title": "News Unavailable", "source": "System", "link": "#", "error": "timeout"}]
+        return [{"title": "Gold steadies", "source": "Fixture"}]
+
+    monkeypatch.setattr(graph, "fetch_market_news", flaky_news)
+    cache_path = str(tmp_path / "nodes.db")
+    app = graph.workflow.compile(cache=SqliteNodeCache(cache_path, cacheable=graph.cacheable_writes))
+    assert app.invoke({})["analysis"] == "missing news"
+    # The placeholder was not stored, so the next run fetches again
+    assert app.invoke({})["analysis"] == "HOLD"
+    assert app.invoke({})["analysis"] == "HOLD"
+    assert len(attempts) == 2
+
+def test_batch_runs_share_one_snapshot(monkeypatch, tmp_path):
+    import asyncio
+    import io
+    import main
+
+    graph, quote_calls, news_queries = offline_graph(monkeypatch)
+    monkeypatch.setattr(main, "app", graph.workflow.compile())
+    monkeypatch.setattr(main, "get_market_data", graph.get_market_data)
+    queries = tmp_path / "queries.txt"
+    queries.write_text("gold central bank buying\n\n# skipped\n"
+                       '{"query": "gold ETF flows", "timeframe": "the next month"}\ngold miners\n')
+
+    runs = main.read_runs(str(queries))
+    assert runs[1] == {"query": "gold ETF flows", "timeframe": "the next month"}
+    out = io.StringIO()
+    asyncio.run(main.run_batch(runs, concurrency=2, out=out))
+
+    records = sorted((json.loads(line) for line in out.getvalue().splitlines()), key=lambda r: r["index"])
+    assert [r["query"] for r in records] == ["gold central bank buying", "gold ETF flows", "gold miners"]
+    assert all(r["analysis"] == "HOLD" and r["gold_price"] == 2660.0 and r["elapsed_ms"] >= 0 for r in records)
+    assert sorted(news_queries) == sorted(r["query"] for r in records)
+    # gold_spot, usd_egp and usd_aed fetched once for the whole batch
+    assert sorted(quote_calls) == ["gold_spot", "usd_aed", "usd_egp"]
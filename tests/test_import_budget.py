@@ -0,0 +1,10 @@
+import os
+import pytest
+from benchmarks.import_budget import BUDGETS, check
+
+# CI runners are slower and noisier than a laptop; scale the time budgets there
+SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "2"))
+
+@pytest.mark.parametrize("module", sorted(BUDGETS))
+def test_import_budget(module):
+    assert check(module, SCALE) == []
@@ -0,0 +1,67 @@
+import asyncio
+import httpx
+import numpy as np
+
+from backend.services.history import Bars
+from backend.services.recorder import BarRecorder, BarStore, RingBuffer, to_records
+
+DAY = 86400
+
+def minute_bars(start, n, price=2600.0):
+    t = start + np.arange(n, dtype=np.int64) * 60
+    close = price + np.arange(n, dtype=np.float64)
+    return Bars(t, close, close + 0.5, close - 0.5, close, np.full(n, 10, dtype=np.int64))
+
+# --- Ring Buffer Tests ---
+def test_ring_buffer_wraps_and_readers_share_the_mapping(tmp_path):
+    path = str(tmp_path / "GC_F.bars")
+    ring = RingBuffer(path, capacity=5)
+    ring.extend(to_records(minute_bars(0, 3)))
+    ring.extend(to_records(minute_bars(180, 4)))
+
+    assert ring.count == 7 and len(ring) == 5
+    assert np.concatenate(ring.segments())["t"].tolist() == [120, 180, 240, 300, 360]
+    assert ring.tail(3)["t"].tolist() == [240, 300, 360]
+    assert ring.last_t == 360
+
+    reader = RingBuffer(path, capacity=0, readonly=True)
+    assert reader.capacity == 5
+    view = reader.segments()[-1]
+    assert np.shares_memory(view, reader._records)
+    ring.extend(to_records(minute_bars(420, 1)))
+    ring.flush()
+    assert reader.last_t == 420
+
+# --- Recorder Tests ---
+def test_recorder_skips_forming_bar_and_compacts_days(tmp_path):
+    start = 20000 * DAY + 9 * 3600
+    bars = minute_bars(start, 120)
+
+    def chart(request):
+        quote = {"open": bars.open.tolist(), "high": bars.high.tolist(), "low": bars.low.tolist(),
+                 "close": bars.close.tolist(), "volume": bars.volume.tolist()}
+        return httpx.Response(200, json={"chart": {"result": [{"timestamp": bars.t.tolist(), "indicators": {"quote": [quote]}}]}})
+
+    store = BarStore(str(tmp_path), retention_days=1)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(chart)) as client:
+            recorder = BarRecorder(store, ["GC=F"], client, "https://chart.test", compact_every_seconds=0)
+            # 30s into the last minute: that bar is still forming
+            first = await recorder.record_once(now=float(bars.t[-1] + 30))
+            again = await recorder.record_once(now=float(bars.t[-1] + 60))
+            next_day = await recorder.record_once(now=float(start + DAY))
+            return first, again, next_day
+
+    first, again, next_day = asyncio.run(run())
+    assert first == {"GC=F": 119}
+    assert again == {"GC=F": 1}
+    assert next_day == {"GC=F": 0}
+
+    daily = store.daily("GC=F").to_bars()
+    assert daily.t.tolist() == [20000 * DAY]
+    assert daily.open.tolist() == [2600.0]
+    assert daily.close.tolist() == [2719.0]
+    assert daily.volume.tolist() == [1200]
+    # Already compacted days are not appended twice
+    assert store.compact("GC=F", now=float(start + 2 * DAY)) == 0
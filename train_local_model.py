@@ -0,0 +1,41 @@
+"""
+Fits the local analyst model that /analyze falls back to when Gemini is
+slow or down, from predictions that already have a 1d outcome (in the
+table and in the Parquet archive).
+
+    python train_local_model.py
+    python train_local_model.py --db gold_analyst.db --output data/models/local_analyst.json
+
+Rerun after evaluation has scored more predictions; the API picks up the
+new file on restart.
+"""
+import argparse
+
+from backend.archive import PredictionArchive
+from backend.config import get_section
+from backend.local_model import ACTIONS, train, training_rows
+from src.logger import repository_for
+
+
+def main(argv=None):
+    default_output = get_section("analysis").get("local_model_path", "data/models/local_analyst.json")
+    parser = argparse.ArgumentParser(description="Train the local fallback analyst from evaluated predictions.")
+    parser.add_argument("--db", help="SQLite file (default: DATABASE_URL, else gold_analyst.db)")
+    parser.add_argument("--output", default=default_output, help=f"Model file (default: {default_output})")
+    parser.add_argument("--l2", type=float, default=1.0, help="L2 regularization strength")
+    args = parser.parse_args(argv)
+
+    # Archived predictions (archive_predictions.py) are labelled too
+    archive = PredictionArchive(get_section("predictions").get("archive_dir", "data/archive/predictions"))
+    model = train(training_rows(repository_for(args.db), archive), l2=args.l2)
+    if not model.trained_utc:
+        print("No evaluated predictions yet; nothing to train on.")
+        return
+    model.save(args.output)
+    for action in ACTIONS:
+        print(f"{action}: {model.samples.get(action, 0)} samples")
+    print(f"Saved local analyst model to {args.output}")
+
+
+if __name__ == "__main__":
+    main()